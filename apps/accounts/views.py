@@ -7,7 +7,11 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 
+from core.ratelimit import ratelimit
 
+
+@ratelimit('login', ip='20/m', email='5/5m',
+           message='Muitas tentativas de login. Aguarde alguns minutos.')
 def login_view(request):
     """
     View para login por email
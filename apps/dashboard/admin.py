@@ -1,3 +1,59 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.admin_performance import CappedRelatedFieldListFilter, ScalableModelAdmin
+from .models import Client, MetricRollup, Project, RevenueEntry, Task
+
+
+@admin.register(Client)
+class ClientAdmin(ScalableModelAdmin):
+    list_display = ('name', 'email', 'active', 'created_at')
+    list_filter = ('active',)
+    search_fields = ('name', 'email')
+    list_editable = ('active',)
+    ordering = ('name',)
+
+
+class TaskInline(admin.TabularInline):
+    model = Task
+    extra = 0
+    autocomplete_fields = ('assignee',)
+
+
+@admin.register(Project)
+class ProjectAdmin(ScalableModelAdmin):
+    list_display = ('name', 'client', 'owner', 'status', 'progress', 'deadline', 'completed_at')
+    list_filter = ('status', ('client', CappedRelatedFieldListFilter))
+    search_fields = ('name', 'client__name')
+    list_select_related = ('client', 'owner')
+    autocomplete_fields = ('client', 'owner')
+    readonly_fields = ('completed_at',)
+    inlines = [TaskInline]
+
+
+@admin.register(Task)
+class TaskAdmin(ScalableModelAdmin):
+    list_display = ('title', 'project', 'assignee', 'status', 'due_date')
+    list_filter = ('status', ('assignee', CappedRelatedFieldListFilter))
+    search_fields = ('title', 'project__name')
+    list_select_related = ('project', 'assignee')
+    autocomplete_fields = ('project', 'assignee')
+
+
+@admin.register(RevenueEntry)
+class RevenueEntryAdmin(ScalableModelAdmin):
+    list_display = ('client', 'project', 'amount', 'date', 'description')
+    list_filter = (('client', CappedRelatedFieldListFilter),)
+    search_fields = ('client__name', 'description')
+    list_select_related = ('client', 'project')
+    autocomplete_fields = ('client', 'project')
+    ordering = ('-date', 'pk')
+
+
+@admin.register(MetricRollup)
+class MetricRollupAdmin(ScalableModelAdmin):
+    list_display = ('metric', 'bucket', 'key', 'value')
+    list_filter = ('metric',)
+    readonly_fields = ('metric', 'bucket', 'key', 'value')
+
+    def has_add_permission(self, request):
+        return False
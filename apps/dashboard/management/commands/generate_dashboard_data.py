@@ -0,0 +1,121 @@
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.dashboard.models import Client, Project, RevenueEntry, Task
+from apps.dashboard.rollups import rebuild
+from apps.hr.management.commands.generate_hr_data import chunked_create
+
+User = get_user_model()
+
+SYNTHETIC_EMAIL_DOMAIN = 'clientes.synthetic.bytenest.local'
+CLIENT_PREFIXES = ['Tech', 'Retail', 'Agro', 'Fin', 'Health', 'Edu', 'Log', 'Media']
+CLIENT_SUFFIXES = ['Corp', 'Max', 'Brasil', 'Labs', 'Group', 'Solutions']
+PROJECT_NAMES = [
+    'Site Corporativo', 'App Mobile', 'Sistema de Vendas', 'Portal do Cliente',
+    'Integração ERP', 'E-commerce', 'Dashboard BI', 'Migração para Nuvem',
+]
+TASK_NAMES = ['Levantamento', 'Protótipo', 'Desenvolvimento', 'Testes', 'Implantação', 'Documentação']
+
+
+class Command(BaseCommand):
+    help = 'Gera clientes, projetos, tarefas e receitas sintéticos para o dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20)
+        parser.add_argument('--projects', type=int, default=60)
+        parser.add_argument('--years', type=int, default=2,
+                            help='Anos de histórico de receitas e projetos')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--as-of', type=date.fromisoformat,
+                            help='Data de referência "hoje" (AAAA-MM-DD)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Remove os dados sintéticos gerados antes')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = options['as_of'] or timezone.localdate()
+        history_start = today - timedelta(days=365 * options['years'])
+
+        if options['clear']:
+            with transaction.atomic():
+                clients = Client.objects.filter(email__endswith='@' + SYNTHETIC_EMAIL_DOMAIN)
+                RevenueEntry.objects.filter(client__in=clients).delete()
+                Project.objects.filter(client__in=clients).delete()
+                clients.delete()
+        elif Client.objects.filter(email__endswith='@' + SYNTHETIC_EMAIL_DOMAIN).exists():
+            raise CommandError('Já existem dados sintéticos; use --clear para gerar novamente.')
+
+        users = list(User.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)[:200])
+        tz = timezone.get_current_timezone()
+        with transaction.atomic():
+            clients = Client.objects.bulk_create([
+                Client(
+                    name=f'{rng.choice(CLIENT_PREFIXES)}{rng.choice(CLIENT_SUFFIXES)} {index + 1:03d}',
+                    email=f'cliente{index:04d}@{SYNTHETIC_EMAIL_DOMAIN}',
+                    active=rng.random() > 0.1,
+                )
+                for index in range(options['clients'])
+            ])
+
+            projects = []
+            for index in range(options['projects']):
+                start = history_start + timedelta(days=rng.randint(0, (today - history_start).days))
+                deadline = start + timedelta(days=rng.randint(30, 240))
+                status = ('COMPLETED' if deadline < today and rng.random() < 0.9
+                          else rng.choice(['PLANNING', 'IN_PROGRESS', 'IN_PROGRESS']))
+                completed = min(deadline + timedelta(days=rng.randint(-20, 20)), today)
+                projects.append(Project(
+                    name=f'{rng.choice(PROJECT_NAMES)} {index + 1:03d}',
+                    client=rng.choice(clients),
+                    owner_id=rng.choice(users) if users else None,
+                    status=status,
+                    progress=100 if status == 'COMPLETED' else rng.randint(0, 95),
+                    deadline=deadline,
+                    completed_at=(timezone.make_aware(datetime.combine(completed, time(18)), tz)
+                                  if status == 'COMPLETED' else None),
+                ))
+            projects = Project.objects.bulk_create(projects)
+
+            def tasks():
+                for project in projects:
+                    for title in rng.sample(TASK_NAMES, rng.randint(2, len(TASK_NAMES))):
+                        yield Task(
+                            project=project,
+                            assignee_id=rng.choice(users) if users else None,
+                            title=title,
+                            status='DONE' if project.status == 'COMPLETED' else rng.choice(['TODO', 'IN_PROGRESS', 'DONE']),
+                            due_date=project.deadline,
+                        )
+
+            def revenue():
+                # Monthly invoices of every project from its start until completion or today
+                for project in projects:
+                    month = (project.deadline - timedelta(days=rng.randint(30, 240))).replace(day=1)
+                    end = project.completed_at.date() if project.completed_at else today
+                    monthly = Decimal(rng.randrange(3_000, 40_000, 100))
+                    while month <= end:
+                        day = min(month.replace(day=rng.randint(1, 28)), today)
+                        if day >= history_start:
+                            yield RevenueEntry(
+                                client_id=project.client_id,
+                                project=project,
+                                amount=monthly,
+                                date=day,
+                                description=f'Fatura {month:%m/%Y}',
+                            )
+                        month = (month + timedelta(days=32)).replace(day=1)
+
+            self.stdout.write(f'Clientes: {len(clients)}')
+            self.stdout.write(f'Projetos: {len(projects)}')
+            self.stdout.write(f'Tarefas: {chunked_create(Task, tasks())}')
+            self.stdout.write(f'Receitas: {chunked_create(RevenueEntry, revenue())}')
+
+        # bulk_create não dispara signals: recalcular as métricas agregadas
+        self.stdout.write(f'Métricas agregadas: {rebuild()}')
+        self.stdout.write(self.style.SUCCESS('Dados sintéticos do dashboard gerados.'))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as métricas agregadas do dashboard (após cargas em massa)'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = rebuild()
+        self.stdout.write(f'Métricas agregadas: {rows} linhas '
+                          f'({(time.perf_counter() - start) * 1000:.0f} ms)')
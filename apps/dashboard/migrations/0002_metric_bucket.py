@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=30)),
+                ('bucket', models.DateField()),
+            ],
+            options={
+                'verbose_name': 'Período de Métrica',
+                'verbose_name_plural': 'Períodos de Métricas',
+                'constraints': [models.UniqueConstraint(fields=('metric', 'bucket'), name='dashboard_metric_bucket_unique')],
+            },
+        ),
+    ]
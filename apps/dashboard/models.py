@@ -1,3 +1,170 @@
 from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
-# Create your models here.
+User = get_user_model()
+
+
+class Client(models.Model):
+    """
+    Cliente da ByteNest
+    """
+    name = models.CharField(max_length=150, unique=True)
+    email = models.EmailField(blank=True)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Cliente'
+        verbose_name_plural = 'Clientes'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Project(models.Model):
+    """
+    Projeto de um cliente
+    """
+    STATUS_CHOICES = [
+        ('PLANNING', 'Planejamento'),
+        ('IN_PROGRESS', 'Em andamento'),
+        ('COMPLETED', 'Concluído'),
+    ]
+
+    name = models.CharField(max_length=200)
+    client = models.ForeignKey(Client, on_delete=models.PROTECT,
+                               related_name='projects')
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL,
+                              null=True, blank=True,
+                              related_name='owned_projects')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES,
+                              default='PLANNING')
+    progress = models.PositiveSmallIntegerField(default=0,
+                                                validators=[MaxValueValidator(100)])
+    deadline = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Projeto'
+        verbose_name_plural = 'Projetos'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='dashboard_project_status_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if self.status == 'COMPLETED':
+            self.progress = 100
+            if self.completed_at is None:
+                self.completed_at = timezone.now()
+        else:
+            self.completed_at = None
+        super().save(*args, **kwargs)
+
+
+class Task(models.Model):
+    """
+    Tarefa de um projeto
+    """
+    STATUS_CHOICES = [
+        ('TODO', 'A fazer'),
+        ('IN_PROGRESS', 'Em andamento'),
+        ('DONE', 'Concluída'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE,
+                                related_name='tasks')
+    assignee = models.ForeignKey(User, on_delete=models.SET_NULL,
+                                 null=True, blank=True,
+                                 related_name='tasks')
+    title = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES,
+                              default='TODO')
+    due_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        ordering = ['due_date', 'pk']
+        indexes = [
+            models.Index(fields=['assignee', 'status'], name='dashboard_task_assignee_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class RevenueEntry(models.Model):
+    """
+    Lançamento de receita de um cliente
+    """
+    client = models.ForeignKey(Client, on_delete=models.PROTECT,
+                               related_name='revenue_entries')
+    project = models.ForeignKey(Project, on_delete=models.SET_NULL,
+                                null=True, blank=True,
+                                related_name='revenue_entries')
+    amount = models.DecimalField(max_digits=12, decimal_places=2,
+                                 validators=[MinValueValidator(0)])
+    date = models.DateField(default=timezone.localdate)
+    description = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        verbose_name = 'Receita'
+        verbose_name_plural = 'Receitas'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='dashboard_revenue_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client} - {self.date}: {self.amount}"
+
+
+class MetricRollup(models.Model):
+    """
+    Métrica pré-agregada por mês, mantida por apps.dashboard.rollups
+    """
+    metric = models.CharField(max_length=30)
+    bucket = models.DateField()
+    key = models.CharField(max_length=50, blank=True, default='')
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Métrica Agregada'
+        verbose_name_plural = 'Métricas Agregadas'
+        ordering = ['metric', 'bucket', 'key']
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'bucket', 'key'],
+                                    name='dashboard_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.bucket} {self.key}: {self.value}"
+
+
+class MetricBucket(models.Model):
+    """
+    Um mês (ou ``CURRENT``) de uma métrica, travado por
+    apps.dashboard.rollups enquanto suas linhas são recalculadas
+    """
+    metric = models.CharField(max_length=30)
+    bucket = models.DateField()
+
+    class Meta:
+        verbose_name = 'Período de Métrica'
+        verbose_name_plural = 'Períodos de Métricas'
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'bucket'],
+                                    name='dashboard_metric_bucket_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.bucket}"
@@ -0,0 +1,254 @@
+"""
+Métricas do dashboard pré-agregadas em ``MetricRollup``.
+
+Cada linha é ``(metric, bucket, key) -> value``:
+
+* ``revenue``: receita do mês ``bucket`` por cliente (``key`` = id do
+  cliente),
+* ``projects_completed``: projetos concluídos no mês ``bucket``,
+* ``project_status``: projetos por status (``key``) hoje,
+* ``tasks``: tarefas por responsável e status hoje (``key`` =
+  ``"<user_id>:<status>"``, ``0`` para tarefas sem responsável),
+* ``clients``: clientes ativos hoje.
+
+Contagens do momento atual usam ``bucket = CURRENT``. Os signals recalculam
+só os meses e usuários afetados a cada alteração, depois do commit, a
+partir das tabelas de origem, então o valor não deriva com o tempo. Cada
+recálculo trava o ``MetricBucket`` de ``(metric, bucket)`` antes de contar,
+então recálculos simultâneos são serializados e o segundo conta também o
+que o primeiro viu; ``rebuild()``
+(``manage.py rebuild_dashboard_rollups``) refaz tudo depois de cargas em
+massa. As páginas leem apenas as linhas da janela exibida, com uma
+consulta, independentemente de quantos anos de dados existam.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Client, MetricBucket, MetricRollup, Project, RevenueEntry, Task
+
+CURRENT = date(1, 1, 1)
+MONTH_LABELS = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
+                'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+PENDING_TASK_STATUSES = ('TODO', 'IN_PROGRESS')
+
+
+def month_start(day):
+    if isinstance(day, datetime):
+        day = timezone.localtime(day).date() if timezone.is_aware(day) else day.date()
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _lock(metric, buckets):
+    """
+    Trava os ``buckets`` de ``metric`` (todos quando ``None``) até o fim da
+    transação, em ordem para não gerar deadlocks
+    """
+    locked = MetricBucket.objects.select_for_update().filter(metric=metric)
+    if buckets is not None:
+        buckets = sorted(set(buckets))
+        MetricBucket.objects.bulk_create(
+            [MetricBucket(metric=metric, bucket=bucket) for bucket in buckets],
+            ignore_conflicts=True,
+        )
+        locked = locked.filter(bucket__in=buckets)
+    list(locked.order_by('bucket').values_list('pk', flat=True))
+
+
+def _store(metric, buckets, scope, compute):
+    """
+    Substitui as linhas de ``metric`` dentro de ``scope`` por ``compute()``
+    (``{(bucket, key): value}``; zeros não são gravados), com os ``buckets``
+    travados: a contagem só é feita depois da trava, então inclui tudo o que
+    foi confirmado antes dela
+    """
+    with transaction.atomic():
+        _lock(metric, buckets)
+        values = compute()
+        MetricRollup.objects.filter(scope, metric=metric).delete()
+        MetricRollup.objects.bulk_create(
+            [MetricRollup(metric=metric, bucket=bucket, key=key, value=value)
+             for (bucket, key), value in values.items() if value],
+            update_conflicts=True,
+            unique_fields=['metric', 'bucket', 'key'],
+            update_fields=['value'],
+        )
+
+
+def _month_range(month):
+    """
+    Início e fim de ``month`` no fuso horário atual
+    """
+    tz = timezone.get_current_timezone()
+    return (timezone.make_aware(datetime.combine(month, time.min), tz),
+            timezone.make_aware(datetime.combine(add_months(month, 1), time.min), tz))
+
+
+def _revenue(**filters):
+    rows = (RevenueEntry.objects.filter(**filters)
+            .annotate(month=TruncMonth('date'))
+            .values('month', 'client_id').annotate(total=Sum('amount')).order_by())
+    return {(row['month'], str(row['client_id'])): row['total'] for row in rows}
+
+
+def _completed(**filters):
+    rows = (Project.objects.filter(completed_at__isnull=False, **filters)
+            .annotate(month=TruncMonth('completed_at', output_field=DateField()))
+            .values('month').annotate(total=Count('pk')).order_by())
+    return {(row['month'], ''): row['total'] for row in rows}
+
+
+def refresh_revenue(months):
+    for month in {month_start(day) for day in months if day}:
+        _store('revenue', [month], Q(bucket=month),
+               lambda: _revenue(date__gte=month, date__lt=add_months(month, 1)))
+
+
+def refresh_completed(months):
+    for month in {month_start(day) for day in months if day}:
+        start, end = _month_range(month)
+        _store('projects_completed', [month], Q(bucket=month),
+               lambda: _completed(completed_at__gte=start, completed_at__lt=end))
+
+
+def refresh_project_status():
+    def compute():
+        rows = Project.objects.values('status').annotate(total=Count('pk')).order_by()
+        return {(CURRENT, row['status']): row['total'] for row in rows}
+    _store('project_status', [CURRENT], Q(bucket=CURRENT), compute)
+
+
+def refresh_tasks(user_ids=None):
+    """
+    Contagem de tarefas dos ``user_ids`` (``None`` na lista para as tarefas
+    sem responsável), ou de todos quando ``user_ids`` é ``None``
+    """
+    tasks = Task.objects.all()
+    scope = Q(bucket=CURRENT)
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        assigned = Q(assignee_id__in=[pk for pk in user_ids if pk is not None])
+        if None in user_ids:
+            assigned |= Q(assignee__isnull=True)
+        tasks = tasks.filter(assigned)
+        scope &= Q(key__regex=r'^({}):'.format('|'.join(str(pk or 0) for pk in user_ids)))
+
+    def compute():
+        rows = tasks.values('assignee_id', 'status').annotate(total=Count('pk')).order_by()
+        return {(CURRENT, f"{row['assignee_id'] or 0}:{row['status']}"): row['total']
+                for row in rows}
+    _store('tasks', [CURRENT], scope, compute)
+
+
+def refresh_clients():
+    _store('clients', [CURRENT], Q(bucket=CURRENT),
+           lambda: {(CURRENT, 'active'): Client.objects.filter(active=True).count()})
+
+
+def rebuild():
+    """
+    Recalcula todas as métricas a partir das tabelas de origem
+    """
+    with transaction.atomic():
+        _store('revenue', None, Q(), _revenue)
+        _store('projects_completed', None, Q(), _completed)
+        refresh_project_status()
+        refresh_tasks()
+        refresh_clients()
+    return MetricRollup.objects.count()
+
+
+def home_stats(user):
+    """
+    Contagem de projetos e tarefas pendentes do usuário, em uma consulta
+    """
+    rows = MetricRollup.objects.filter(
+        Q(metric='project_status') | Q(metric='tasks', key__startswith=f'{user.pk}:'),
+        bucket=CURRENT,
+    ).values_list('metric', 'key', 'value')
+    status = defaultdict(int)
+    pending = 0
+    for metric, key, value in rows:
+        if metric == 'project_status':
+            status[key] = int(value)
+        elif key.split(':', 1)[1] in PENDING_TASK_STATUSES:
+            pending += int(value)
+    return {
+        'total_projects': sum(status.values()),
+        'active_projects': status['IN_PROGRESS'],
+        'completed_projects': status['COMPLETED'],
+        'pending_tasks': pending,
+    }
+
+
+def analytics(months=6, today=None):
+    """
+    Receita por mês, distribuição dos status dos projetos, tarefas
+    concluídas por usuário e maiores clientes dos últimos ``months`` meses,
+    em uma consulta
+    """
+    current = month_start(today or timezone.localdate())
+    window = [add_months(current, offset) for offset in range(1 - months, 1)]
+    rows = MetricRollup.objects.filter(
+        Q(metric__in=['revenue', 'projects_completed'], bucket__gte=window[0], bucket__lte=current)
+        | Q(metric__in=['project_status', 'tasks', 'clients'], bucket=CURRENT)
+    ).values_list('metric', 'bucket', 'key', 'value')
+
+    revenue = defaultdict(Decimal)
+    clients = defaultdict(Decimal)
+    status = defaultdict(int)
+    tasks = defaultdict(lambda: {'done': 0, 'total': 0})
+    completed = active_clients = 0
+    for metric, bucket, key, value in rows:
+        if metric == 'revenue':
+            revenue[bucket] += value
+            clients[int(key)] += value
+        elif metric == 'projects_completed':
+            completed += int(value)
+        elif metric == 'project_status':
+            status[key] = int(value)
+        elif metric == 'tasks':
+            user_id, task_status = key.split(':', 1)
+            tasks[int(user_id)]['total'] += int(value)
+            if task_status == 'DONE':
+                tasks[int(user_id)]['done'] += int(value)
+        else:
+            active_clients = int(value)
+
+    def share(part, whole):
+        return round(100 * part / whole) if whole else 0
+
+    total_projects = sum(status.values())
+    done = sum(counts['done'] for counts in tasks.values())
+    total_tasks = sum(counts['total'] for counts in tasks.values())
+    return {
+        'monthly_revenue': revenue[current],
+        'projects_completed': completed,
+        'active_clients': active_clients,
+        'team_productivity': share(done, total_tasks),
+        'revenue_chart': [
+            {'month': MONTH_LABELS[month.month - 1], 'date': month, 'revenue': revenue[month]}
+            for month in window
+        ],
+        'project_status': {code: share(status[code], total_projects)
+                           for code, _ in Project.STATUS_CHOICES},
+        'team': sorted(
+            ({'user_id': user_id, 'rate': share(counts['done'], counts['total']), **counts}
+             for user_id, counts in tasks.items() if user_id),
+            key=lambda row: (-row['total'], row['user_id']),
+        ),
+        'top_clients': sorted(
+            ({'client_id': client_id, 'revenue': amount} for client_id, amount in clients.items()),
+            key=lambda row: -row['revenue'],
+        ),
+    }
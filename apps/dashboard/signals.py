@@ -0,0 +1,87 @@
+"""
+Atualização das métricas agregadas do dashboard quando os dados mudam.
+
+Os recálculos rodam depois do commit de quem alterou os dados, cada um na
+sua própria transação curta: a trava do ``MetricBucket`` não fica presa
+enquanto o resto da transação do chamador roda. Uma alteração desfeita por
+rollback não recalcula nada.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups
+from .models import Client, Project, RevenueEntry, Task
+
+_PREVIOUS = {
+    RevenueEntry: ('date',),
+    Project: ('status', 'completed_at'),
+    Task: ('assignee_id', 'status'),
+}
+
+
+@receiver(pre_save, sender=RevenueEntry)
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=Task)
+def remember_previous(sender, instance, raw, **kwargs):
+    # The months and users the row counted for before this save
+    instance._rollup_previous = None
+    if not raw and instance.pk is not None:
+        instance._rollup_previous = (
+            sender.objects.filter(pk=instance.pk).values(*_PREVIOUS[sender]).first())
+
+
+def _take_previous(instance, signal):
+    """
+    Valores de antes do save, consumidos por ele: uma exclusão posterior da
+    mesma instância conta só os valores atuais
+    """
+    previous = instance.__dict__.pop('_rollup_previous', None)
+    return previous if signal is post_save else None
+
+
+def _after_commit(refresh, *args):
+    # A failed refresh must not fail a write that already committed;
+    # rebuild_dashboard_rollups repairs it
+    transaction.on_commit(lambda: refresh(*args), robust=True)
+
+
+@receiver(post_save, sender=RevenueEntry)
+@receiver(post_delete, sender=RevenueEntry)
+def revenue_changed(sender, instance, signal, raw=False, **kwargs):
+    if raw:
+        return
+    previous = _take_previous(instance, signal)
+    _after_commit(rollups.refresh_revenue, [instance.date, previous and previous['date']])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, signal, raw=False, **kwargs):
+    if raw:
+        return
+    previous = _take_previous(instance, signal)
+    if previous is None or previous['status'] != instance.status:
+        _after_commit(rollups.refresh_project_status)
+    if previous is None or previous['completed_at'] != instance.completed_at:
+        _after_commit(rollups.refresh_completed,
+                      [instance.completed_at, previous and previous['completed_at']])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, signal, raw=False, **kwargs):
+    if raw:
+        return
+    previous = _take_previous(instance, signal)
+    if previous is None:
+        _after_commit(rollups.refresh_tasks, {instance.assignee_id})
+    elif previous != {'assignee_id': instance.assignee_id, 'status': instance.status}:
+        _after_commit(rollups.refresh_tasks, {instance.assignee_id, previous['assignee_id']})
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def client_changed(sender, raw=False, **kwargs):
+    if not raw:
+        _after_commit(rollups.refresh_clients)
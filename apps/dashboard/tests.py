@@ -1,3 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from apps.monitoring import benchmark
+from apps.monitoring.testing import QueryBudgetMixin
+
+from . import rollups
+from .models import Client, MetricRollup, Project, Task
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Páginas do dashboard dentro do orçamento de queries declarado
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = benchmark.benchmark_user()
+        call_command('generate_dashboard_data', clients=5, projects=12, years=1, seed=7,
+                     stdout=StringIO())
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_routes_within_budget(self):
+        self.assertRoutesWithinBudget(self.client, 'dashboard:')
+
+
+class RollupSignalTests(TestCase):
+    """
+    Métricas recalculadas pelos signals depois do commit
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.ana = User.objects.create_user('ana', 'ana@example.com')
+        cls.bruno = User.objects.create_user('bruno', 'bruno@example.com')
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.project = Project.objects.create(name='Portal', client=Client.objects.create(name='ACME'))
+
+    def tasks(self):
+        return dict(MetricRollup.objects.filter(metric='tasks', bucket=rollups.CURRENT)
+                    .values_list('key', 'value'))
+
+    def test_refresh_runs_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            task = Task.objects.create(project=self.project, assignee=self.ana, title='Login')
+            self.assertEqual(self.tasks(), {})
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(self.tasks(), {f'{self.ana.pk}:TODO': 1})
+
+        # Nothing counted changed: nothing to recalculate
+        with self.captureOnCommitCallbacks() as callbacks:
+            task.title = 'Login com SSO'
+            task.save()
+        self.assertEqual(callbacks, [])
+
+    def test_rolled_back_changes_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Task.objects.create(project=self.project, assignee=self.ana, title='Login')
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+
+    def test_reassignment_moves_the_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(project=self.project, assignee=self.ana, title='Login')
+        with self.captureOnCommitCallbacks(execute=True):
+            task.assignee = self.bruno
+            task.status = 'DONE'
+            task.save()
+        self.assertEqual(self.tasks(), {f'{self.bruno.pk}:DONE': 1})
+
+    def test_delete_after_an_unchanged_save(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(project=self.project, assignee=self.ana, title='Login')
+            task.save()
+        self.assertFalse(hasattr(task, '_rollup_previous'))
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(self.tasks(), {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.status = 'COMPLETED'
+            self.project.save()
+            self.project.delete()
+        self.assertFalse(MetricRollup.objects.filter(
+            metric__in=['project_status', 'projects_completed']).exists())
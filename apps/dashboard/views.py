@@ -3,10 +3,20 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
 import json
 
+from apps.monitoring.budgets import query_budget
+from core.replica import read_replica
+
+from . import rollups
+from .models import Client, Project
+
 
 @login_required
+@read_replica
+@query_budget(3)
 def dashboard_home(request):
     """
     Dashboard principal do usuário
@@ -14,17 +24,13 @@ def dashboard_home(request):
     context = {
         'user': request.user,
         'page_title': 'Dashboard - ByteNest',
-        'stats': {
-            'total_projects': 0,
-            'active_projects': 0,
-            'completed_projects': 0,
-            'pending_tasks': 0,
-        }
+        'stats': rollups.home_stats(request.user),
     }
     return render(request, 'dashboard/home.html', context)
 
 
 @login_required
+@query_budget(2)
 def profile_view(request):
     """
     Visualização e edição do perfil do usuário
@@ -63,6 +69,7 @@ def profile_view(request):
 
 
 @login_required
+@query_budget(2)
 def settings_view(request):
     """
     Configurações do usuário
@@ -75,70 +82,66 @@ def settings_view(request):
 
 
 @login_required
+@read_replica
+@query_budget(4)
 def projects_view(request):
     """
     Visualização de projetos
     """
-    # Simular dados de projetos (em produção viria do banco)
-    projects = [
-        {
-            'id': 1,
-            'name': 'Site Corporativo',
-            'status': 'Em andamento',
-            'progress': 75,
-            'deadline': '2024-12-15',
-            'client': 'TechCorp',
-        },
-        {
-            'id': 2,
-            'name': 'App Mobile',
-            'status': 'Planejamento',
-            'progress': 25,
-            'deadline': '2025-02-20',
-            'client': 'StartupXYZ',
-        },
-        {
-            'id': 3,
-            'name': 'Sistema de Vendas',
-            'status': 'Concluído',
-            'progress': 100,
-            'deadline': '2024-11-30',
-            'client': 'RetailMax',
-        },
-    ]
-    
+    projects = Project.objects.select_related('client').order_by('-created_at', '-pk')
+    status_filter = request.GET.get('status', '')
+    if status_filter in dict(Project.STATUS_CHOICES):
+        projects = projects.filter(status=status_filter)
+    else:
+        status_filter = ''
+
+    paginator = Paginator(projects, 12)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
     context = {
         'user': request.user,
         'page_title': 'Projetos - ByteNest',
-        'projects': projects,
+        'projects': page_obj,
+        'page_obj': page_obj,
+        'status_filter': status_filter,
+        'status_choices': Project.STATUS_CHOICES,
     }
     return render(request, 'dashboard/projects.html', context)
 
 
 @login_required
+@read_replica
+@query_budget(5)
 def analytics_view(request):
     """
     Analytics e relatórios
     """
-    # Simular dados de analytics (em produção viria do banco)
-    analytics_data = {
-        'monthly_revenue': 45000,
-        'projects_completed': 12,
-        'client_satisfaction': 98,
-        'team_productivity': 92,
-        'revenue_chart': [
-            {'month': 'Jan', 'revenue': 35000},
-            {'month': 'Fev', 'revenue': 42000},
-            {'month': 'Mar', 'revenue': 38000},
-            {'month': 'Abr', 'revenue': 45000},
-            {'month': 'Mai', 'revenue': 48000},
-            {'month': 'Jun', 'revenue': 45000},
-        ]
+    analytics_data = rollups.analytics(months=6)
+
+    # Barras do gráfico com até 200px, proporcionais ao maior mês
+    peak = max((row['revenue'] for row in analytics_data['revenue_chart']), default=0)
+    for row in analytics_data['revenue_chart']:
+        row['height'] = int(200 * row['revenue'] / peak) if peak else 0
+
+    team = analytics_data['team'][:5]
+    names = {
+        user.pk: user.get_full_name() or user.email
+        for user in get_user_model().objects.filter(pk__in=[row['user_id'] for row in team])
+        .only('first_name', 'last_name', 'email')
     }
-    
+    for row in team:
+        row['name'] = names.get(row['user_id'], '')
+    top_clients = analytics_data['top_clients'][:5]
+    clients = dict(Client.objects.filter(pk__in=[row['client_id'] for row in top_clients])
+                   .values_list('pk', 'name'))
+    for row in top_clients:
+        row['name'] = clients.get(row['client_id'], '')
+
     context = {
         'user': request.user,
         'page_title': 'Analytics - ByteNest',
         'analytics': analytics_data,
+        'team': team,
+        'top_clients': top_clients,
     }
     return render(request, 'dashboard/analytics.html', context)
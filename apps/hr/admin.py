@@ -1,25 +1,33 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
+
+from core.admin_performance import CappedRelatedFieldListFilter, ScalableModelAdmin
+from . import documents, enrollment, review_cycles
 from .models import (
     Department, Position, Employee, Dependent, Vacation, Attendance,
     Benefit, EmployeeBenefit, Training, EmployeeTraining,
-    Evaluation, Document
+    Evaluation, ReviewCycle, Document, DocumentBlob
 )
 
 
 @admin.register(Department)
-class DepartmentAdmin(admin.ModelAdmin):
+class DepartmentAdmin(ScalableModelAdmin):
     list_display = ('name', 'manager', 'budget', 'active', 'created_at')
     list_filter = ('active', 'created_at')
+    list_select_related = ('manager__user',)
+    autocomplete_fields = ('manager',)
     search_fields = ('name', 'description')
     list_editable = ('active',)
     ordering = ('name',)
 
 
 @admin.register(Position)
-class PositionAdmin(admin.ModelAdmin):
+class PositionAdmin(ScalableModelAdmin):
     list_display = ('name', 'department', 'base_salary', 'contract_type', 'hierarchy_level', 'active')
-    list_filter = ('department', 'contract_type', 'hierarchy_level', 'active')
+    list_filter = (('department', CappedRelatedFieldListFilter), 'contract_type', 'hierarchy_level', 'active')
+    list_select_related = ('department',)
+    autocomplete_fields = ('department',)
     search_fields = ('name', 'description')
     list_editable = ('active',)
     ordering = ('department', 'hierarchy_level', 'name')
@@ -33,12 +41,18 @@ class DependentInline(admin.TabularInline):
 class EmployeeBenefitInline(admin.TabularInline):
     model = EmployeeBenefit
     extra = 0
+    autocomplete_fields = ('benefit',)
 
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(ScalableModelAdmin):
     list_display = ('employee_id', 'name', 'position', 'department', 'hire_date', 'current_salary', 'active')
-    list_filter = ('department', 'position', 'contract_type', 'active', 'on_vacation', 'on_leave')
+    list_filter = (
+        ('department', CappedRelatedFieldListFilter), ('position', CappedRelatedFieldListFilter),
+        'contract_type', 'active', 'on_vacation', 'on_leave',
+    )
+    list_select_related = ('user', 'position__department', 'department')
+    autocomplete_fields = ('user', 'position', 'department')
     search_fields = ('user__first_name', 'user__last_name', 'user__email', 'employee_id', 'cpf')
     list_editable = ('active',)
     inlines = [DependentInline, EmployeeBenefitInline]
@@ -65,33 +79,41 @@ class EmployeeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Dependent)
-class DependentAdmin(admin.ModelAdmin):
+class DependentAdmin(ScalableModelAdmin):
     list_display = ('name', 'employee', 'relationship', 'birth_date', 'active')
     list_filter = ('relationship', 'active')
     search_fields = ('name', 'employee__user__first_name', 'employee__user__last_name')
+    list_select_related = ('employee__user',)
+    autocomplete_fields = ('employee',)
     list_editable = ('active',)
 
 
 @admin.register(Vacation)
-class VacationAdmin(admin.ModelAdmin):
+class VacationAdmin(ScalableModelAdmin):
     list_display = ('employee', 'start_date', 'end_date', 'days_requested', 'status', 'request_date')
     list_filter = ('status', 'start_date', 'request_date')
     search_fields = ('employee__user__first_name', 'employee__user__last_name')
+    list_select_related = ('employee__user',)
+    autocomplete_fields = ('employee', 'approved_by')
     list_editable = ('status',)
     date_hierarchy = 'start_date'
 
 
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(ScalableModelAdmin):
     list_display = ('employee', 'date', 'check_in', 'check_out', 'hours_worked', 'overtime_hours')
-    list_filter = ('date', 'employee__department')
+    # No date_hierarchy: its year/month links run DISTINCT queries over the
+    # whole table; the date filter's choices are static
+    list_filter = ('date', ('employee__department', CappedRelatedFieldListFilter))
     search_fields = ('employee__user__first_name', 'employee__user__last_name')
-    date_hierarchy = 'date'
-    ordering = ('-date', 'employee')
+    list_select_related = ('employee__user',)
+    autocomplete_fields = ('employee',)
+    # By employee_id, not Employee's ordering (a join on the user table)
+    ordering = ('-date', 'employee_id')
 
 
 @admin.register(Benefit)
-class BenefitAdmin(admin.ModelAdmin):
+class BenefitAdmin(ScalableModelAdmin):
     list_display = ('name', 'benefit_type', 'value', 'active')
     list_filter = ('benefit_type', 'active')
     search_fields = ('name', 'description')
@@ -99,15 +121,18 @@ class BenefitAdmin(admin.ModelAdmin):
 
 
 @admin.register(EmployeeBenefit)
-class EmployeeBenefitAdmin(admin.ModelAdmin):
+class EmployeeBenefitAdmin(ScalableModelAdmin):
     list_display = ('employee', 'benefit', 'value', 'start_date', 'end_date', 'active')
-    list_filter = ('benefit', 'active', 'start_date')
+    list_filter = (('benefit', CappedRelatedFieldListFilter), 'active', 'start_date')
     search_fields = ('employee__user__first_name', 'employee__user__last_name', 'benefit__name')
+    list_select_related = ('employee__user', 'benefit')
+    autocomplete_fields = ('employee', 'benefit')
 
 
 @admin.register(Training)
-class TrainingAdmin(admin.ModelAdmin):
-    list_display = ('name', 'instructor', 'start_date', 'end_date', 'duration_hours', 'status', 'max_participants')
+class TrainingAdmin(ScalableModelAdmin):
+    list_display = ('name', 'instructor', 'start_date', 'end_date', 'duration_hours', 'status', 'seats_taken', 'max_participants')
+    readonly_fields = ('seats_taken',)
     list_filter = ('status', 'start_date', 'instructor')
     search_fields = ('name', 'description', 'instructor')
     list_editable = ('status',)
@@ -115,24 +140,100 @@ class TrainingAdmin(admin.ModelAdmin):
 
 
 @admin.register(EmployeeTraining)
-class EmployeeTrainingAdmin(admin.ModelAdmin):
+class EmployeeTrainingAdmin(ScalableModelAdmin):
     list_display = ('employee', 'training', 'status', 'grade', 'certificate')
-    list_filter = ('status', 'certificate', 'training')
+    list_filter = ('status', 'certificate', ('training', CappedRelatedFieldListFilter))
     search_fields = ('employee__user__first_name', 'employee__user__last_name', 'training__name')
+    list_select_related = ('employee__user', 'training')
+    autocomplete_fields = ('employee', 'training')
     list_editable = ('status', 'grade', 'certificate')
 
+    # Edits here bypass apps.hr.enrollment: resync the seat counters
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        enrollment.resync({obj.training_id, form.initial.get('training') or obj.training_id})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        enrollment.resync([obj.training_id])
+
+    def delete_queryset(self, request, queryset):
+        training_ids = set(queryset.values_list('training_id', flat=True))
+        super().delete_queryset(request, queryset)
+        enrollment.resync(training_ids)
+
 
 @admin.register(Evaluation)
-class EvaluationAdmin(admin.ModelAdmin):
+class EvaluationAdmin(ScalableModelAdmin):
     list_display = ('employee', 'evaluation_type', 'period_start', 'period_end', 'evaluator', 'overall_grade', 'evaluation_date')
-    list_filter = ('evaluation_type', 'evaluation_date', 'evaluator')
+    list_filter = ('evaluation_type', 'evaluation_date', 'cycle', ('evaluator', CappedRelatedFieldListFilter))
     search_fields = ('employee__user__first_name', 'employee__user__last_name', 'evaluator__first_name')
+    list_select_related = ('employee__user', 'evaluator')
+    autocomplete_fields = ('employee', 'evaluator')
     date_hierarchy = 'evaluation_date'
 
 
+@admin.register(ReviewCycle)
+class ReviewCycleAdmin(ScalableModelAdmin):
+    list_display = ('name', 'evaluation_type', 'period_start', 'period_end', 'default_evaluator', 'generated_at')
+    list_filter = ('evaluation_type',)
+    list_select_related = ('default_evaluator',)
+    autocomplete_fields = ('default_evaluator',)
+    readonly_fields = ('generated_at',)
+    search_fields = ('name',)
+    actions = ['generate_evaluations']
+
+    @admin.action(description='Generate missing evaluations')
+    def generate_evaluations(self, request, queryset):
+        for cycle in queryset:
+            result = review_cycles.generate(cycle)
+            self.message_user(
+                request,
+                f"{cycle}: {result['created']} evaluations created, {result['existing']} already existed"
+                + (f", {len(result['unassigned'])} employees without an evaluator" if result['unassigned'] else ''),
+            )
+
+
+class DocumentForm(forms.ModelForm):
+    upload = forms.FileField(required=False, help_text='Replaces the current content')
+
+    class Meta:
+        model = Document
+        fields = ('employee', 'document_type', 'name', 'description')
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get('upload') and not (self.instance.blob_id or self.instance.file):
+            self.add_error('upload', 'Upload the document file.')
+        return cleaned
+
+
 @admin.register(Document)
-class DocumentAdmin(admin.ModelAdmin):
-    list_display = ('employee', 'document_type', 'name', 'upload_date')
+class DocumentAdmin(ScalableModelAdmin):
+    form = DocumentForm
+    list_display = ('employee', 'document_type', 'name', 'filename', 'upload_date')
     list_filter = ('document_type', 'upload_date')
     search_fields = ('employee__user__first_name', 'employee__user__last_name', 'name')
+    list_select_related = ('employee__user',)
+    autocomplete_fields = ('employee',)
+    readonly_fields = ('filename', 'blob')
     date_hierarchy = 'upload_date'
+
+    def save_model(self, request, obj, form, change):
+        upload = form.cleaned_data.get('upload')
+        if upload:
+            # Stored once per content; the signals count the reference
+            obj.blob = documents.store(upload)
+            obj.filename = upload.name
+            obj.file = ''
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(DocumentBlob)
+class DocumentBlobAdmin(ScalableModelAdmin):
+    list_display = ('sha256', 'size', 'content_type', 'ref_count', 'last_used_at')
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'size', 'content_type', 'ref_count', 'created_at', 'last_used_at')
+
+    def has_add_permission(self, request):
+        return False
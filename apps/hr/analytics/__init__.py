@@ -0,0 +1,46 @@
+"""
+Batch HR analytics: each module loads the columns it needs in one query
+and computes with NumPy arrays instead of per-row Python or per-day SQL.
+"""
+from datetime import date
+
+import numpy as np
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+_EPOCH = date(1970, 1, 1).toordinal()
+_NAT = np.iinfo(np.int64).min
+
+
+def date_array(values):
+    """
+    ``datetime64[D]`` array from dates (``None`` becomes ``NaT``). Much
+    faster than ``np.array(values, dtype='datetime64[D]')``, which converts
+    each ``date`` object separately.
+    """
+    return np.fromiter(
+        (_NAT if value is None else value.toordinal() - _EPOCH for value in values),
+        dtype=np.int64, count=len(values),
+    ).astype('datetime64[D]')
+
+
+def grouped_percentiles(groups, values, percentiles=PERCENTILES):
+    """
+    Linear-interpolated percentiles of ``values`` per group, for all groups
+    at once: ``(group_keys, array of shape (groups, len(percentiles)))``
+    """
+    if not len(values):
+        return np.array([], dtype=groups.dtype), np.empty((0, len(percentiles)))
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    keys, starts, sizes = np.unique(groups, return_index=True, return_counts=True)
+    position = (sizes[:, None] - 1) * (np.asarray(percentiles) / 100)[None, :]
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    low_values = values[starts[:, None] + low]
+    high_values = values[starts[:, None] + high]
+    return keys, low_values + (high_values - low_values) * (position - low)
+
+
+def percentile_dict(row, percentiles=PERCENTILES, digits=1):
+    return {f'p{percentile}': round(float(value), digits) for percentile, value in zip(percentiles, row)}
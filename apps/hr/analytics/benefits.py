@@ -0,0 +1,160 @@
+"""
+Benefit costs: current monthly spend per benefit and per department, and
+the committed spend for the next months.
+
+``load()`` runs one grouped query: enrollments summed by benefit,
+department, start month and end month (the enrollment's end date, or the
+employee's termination date when it has none). Each group adds its value
+to every month from its start to its end, which is a difference array over
+(benefit, department, month) and one cumulative sum, so no month or
+enrollment is expanded in Python. Inactive enrollments without an end
+date are left out.
+
+The projection assumes current enrollments continue until their end date
+with today's values (no new hires, raises or renegotiated plans).
+``summary()`` caches the result per benefits-dataset version; enrollment
+and employee changes bump it. Benefit rows do not enter the totals (each
+enrollment carries its own value), and deleting one deletes its
+enrollments, whose signals bump it.
+"""
+import numpy as np
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from . import cache
+from ..models import Employee, EmployeeBenefit
+
+DATASET = 'benefits'
+EMPLOYEE_FIELDS = ('department_id', 'termination_date', 'active')
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _month_label(index):
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def load():
+    """
+    ``(benefit_ids, department_ids, start_months, end_months, totals,
+    counts)`` of the enrollment groups; open ends are ``-1``
+    """
+    end = Coalesce('end_date', 'employee__termination_date', output_field=DateField())
+    rows = list(
+        EmployeeBenefit.objects.filter(Q(active=True) | Q(end_date__isnull=False))
+        .annotate(start_month=TruncMonth('start_date'),
+                  end_month=TruncMonth(end, output_field=DateField()))
+        .values_list('benefit_id', 'employee__department_id', 'start_month', 'end_month')
+        .annotate(total=Sum('value'), count=Count('pk'))
+        .order_by()
+    )
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty, empty, empty.astype(np.float64), empty
+    benefits, departments, starts, ends, totals, counts = zip(*rows)
+    return (
+        np.array(benefits, dtype=np.int64),
+        np.array(departments, dtype=np.int64),
+        np.array([_month_index(day) for day in starts], dtype=np.int64),
+        np.array([-1 if day is None else _month_index(day) for day in ends], dtype=np.int64),
+        np.array(totals, dtype=np.float64),
+        np.array(counts, dtype=np.int64),
+    )
+
+
+def monthly_costs(benefits, departments, starts, ends, totals, counts, first, months):
+    """
+    Cost and enrollments per (benefit, department) for ``months`` months
+    from month index ``first``: ``(benefit_keys, department_keys, cost,
+    enrollments)`` with arrays of shape (benefits, departments, months)
+    """
+    benefit_keys, benefit_index = np.unique(benefits, return_inverse=True)
+    department_keys, department_index = np.unique(departments, return_inverse=True)
+    group = benefit_index.reshape(-1) * len(department_keys) + department_index.reshape(-1)
+
+    # A group counts from its start month through its end month
+    begin = np.clip(starts - first, 0, months)
+    stop = np.where(ends < 0, months, np.clip(ends - first + 1, 0, months))
+    valid = begin < stop
+    shape = (len(benefit_keys) * len(department_keys), months + 1)
+    cost = np.zeros(shape)
+    enrolled = np.zeros(shape, dtype=np.int64)
+    for target, values in ((cost, totals), (enrolled, counts)):
+        np.add.at(target, (group[valid], begin[valid]), values[valid])
+        np.add.at(target, (group[valid], stop[valid]), -values[valid])
+    reshape = (len(benefit_keys), len(department_keys), months)
+    return (
+        benefit_keys,
+        department_keys,
+        np.cumsum(cost, axis=1)[:, :months].reshape(reshape),
+        np.cumsum(enrolled, axis=1)[:, :months].reshape(reshape),
+    )
+
+
+def summary(horizon=12, today=None):
+    """
+    Monthly benefit cost of the current month and the ``horizon`` following
+    ones (``projected``, ``projected_total`` sums the following ones), per
+    benefit and per department (with the cost per active employee)
+    """
+    today = today or timezone.localdate()
+    first = _month_index(today)
+    months = horizon + 1
+
+    def compute():
+        benefit_keys, department_keys, cost, enrolled = monthly_costs(*load(), first, months)
+        headcount = dict(
+            Employee.objects.filter(active=True).values_list('department_id')
+            .annotate(count=Count('pk')).order_by()
+        )
+        total = cost.sum(axis=(0, 1)) if cost.size else np.zeros(months)
+
+        def series(values):
+            return [round(float(value), 2) for value in values]
+
+        by_benefit = cost.sum(axis=1)
+        by_department = cost.sum(axis=0)
+        return {
+            'months': [_month_label(first + offset) for offset in range(months)],
+            'current': round(float(total[0]), 2),
+            'projected': series(total),
+            'projected_total': round(float(total[1:].sum()), 2),
+            'benefits': [
+                {
+                    'id': int(key),
+                    'current': round(float(by_benefit[row, 0]), 2),
+                    'enrollments': int(enrolled[row, :, 0].sum()),
+                    'projected': series(by_benefit[row]),
+                    'projected_total': round(float(by_benefit[row, 1:].sum()), 2),
+                }
+                for row, key in enumerate(benefit_keys)
+            ],
+            'departments': [
+                {
+                    'id': int(key),
+                    'current': round(float(by_department[column, 0]), 2),
+                    'headcount': headcount.get(int(key), 0),
+                    'per_employee': (round(float(by_department[column, 0]) / headcount[int(key)], 2)
+                                     if headcount.get(int(key)) else None),
+                    'projected': series(by_department[column]),
+                    'projected_total': round(float(by_department[column, 1:].sum()), 2),
+                }
+                for column, key in enumerate(department_keys)
+            ],
+        }
+
+    params = {'horizon': horizon, 'month': _month_label(first)}
+    return cache.cached('benefits', DATASET, params, compute)
+
+
+def department_summary(department_id, horizon=12, today=None):
+    """
+    The ``summary()`` row of one department, or ``None``
+    """
+    for row in summary(horizon=horizon, today=today)['departments']:
+        if row['id'] == department_id:
+            return row
+    return None
@@ -0,0 +1,90 @@
+"""
+Versioned caching for analytics results.
+
+Each dataset (e.g. ``'employees'``) has a version number in the
+``AnalyticsDataset`` table; results are stored under keys that include
+it, so ``bump()`` invalidates every cached result for that dataset at once
+without enumerating keys, in every process. The version is read from the
+primary and bumped once the change commits: a result computed before the
+commit can only be stored under the old version, and results are computed
+on the replica only once it has replayed the version they are stored under.
+While a result is computed, the version it will be stored under stands for
+its dataset: the loads and nested ``cached()`` calls inside read the same
+data without querying the version again.
+"""
+import hashlib
+import json
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db.models import F
+
+from core.replica import use_primary
+
+from ..models import AnalyticsDataset
+
+
+# {dataset: version} of the results being computed
+_computing = ContextVar('analytics_computing', default={})
+
+
+def version(dataset, using=DEFAULT_DB_ALIAS):
+    stamps = _computing.get()
+    if using == DEFAULT_DB_ALIAS and dataset in stamps:
+        return stamps[dataset]
+    return (
+        AnalyticsDataset.objects.using(using).filter(name=dataset)
+        .values_list('version', flat=True).first()
+    ) or 0
+
+
+def computing(dataset, stamp):
+    """
+    Context to compute results of ``dataset`` at version ``stamp`` in:
+    reads go to the primary unless the database they are routed to has
+    already reached that version
+    """
+    if _computing.get().get(dataset) == stamp:
+        # Inside a computation of that version, which already chose
+        return nullcontext()
+    alias = router.db_for_read(AnalyticsDataset)
+    if alias != DEFAULT_DB_ALIAS and version(dataset, using=alias) < stamp:
+        return use_primary()
+    return nullcontext()
+
+
+def _increment(datasets):
+    for dataset in datasets:
+        if not AnalyticsDataset.objects.filter(name=dataset).update(version=F('version') + 1):
+            AnalyticsDataset.objects.get_or_create(name=dataset, defaults={'version': 1})
+
+
+def bump(*datasets):
+    """
+    Invalidate the cached results of ``datasets`` once the current
+    transaction commits (right away outside one)
+    """
+    transaction.on_commit(lambda: _increment(datasets))
+
+
+def cached(name, dataset, params, compute):
+    """
+    ``compute()``, cached until ``dataset`` changes (or for
+    ``HR_ANALYTICS_CACHE_SECONDS`` at most)
+    """
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    stamp = version(dataset)
+    key = f'hr:analytics:{name}:{stamp}:{digest}'
+    result = cache.get(key)
+    if result is None:
+        with computing(dataset, stamp):
+            token = _computing.set({**_computing.get(), dataset: stamp})
+            try:
+                result = compute()
+            finally:
+                _computing.reset(token)
+        cache.set(key, result, settings.HR_ANALYTICS_CACHE_SECONDS)
+    return result
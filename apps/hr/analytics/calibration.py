@@ -0,0 +1,231 @@
+"""
+Performance-evaluation calibration: grade distributions, percentiles,
+evaluator leniency and trends.
+
+Every graded evaluation is loaded once per dataset version (one query:
+grade, evaluator, type, review cycle and the employee's department) into
+arrays kept in process memory. Cycles are identified by the ``ReviewCycle``
+pk; evaluations from before cycles existed are grouped by the year their
+period ends, identified by ``-year``. Each request then masks those arrays
+by cycle, department, type and evaluator, and the result is cached per
+cycle and filter combination.
+
+Leniency compares each evaluator's mean grade with the company mean of
+the cycle; ``z`` is that difference in standard errors of the evaluator's
+mean, and evaluators with ``|z| >= CALIBRATION_Z_THRESHOLD`` (and at least
+``CALIBRATION_MIN_EVALUATIONS`` evaluations) are flagged.
+"""
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+
+from . import cache, grouped_percentiles, percentile_dict
+from ..models import Evaluation
+
+DATASET = 'evaluations'
+TYPES = [code for code, _ in Evaluation.TYPE_CHOICES]
+GRADE_BINS = np.arange(0, 11)
+
+_frame = (None, None)
+
+
+def _cycle(cycle_id, name, end, period_end):
+    """
+    ``(id, name, period end)`` of the cycle of an evaluation
+    """
+    if cycle_id is None:
+        return -period_end.year, str(period_end.year), date(period_end.year, 12, 31)
+    return cycle_id, name, end
+
+
+def load():
+    """
+    Column arrays of every graded evaluation, from one query. ``cycle``
+    holds indexes into ``cycle_ids``, which is in chronological order.
+    """
+    rows = list(
+        Evaluation.objects.filter(overall_grade__isnull=False)
+        .values_list('overall_grade', 'evaluator_id', 'evaluation_type',
+                     'employee__department_id', 'cycle_id', 'cycle__name',
+                     'cycle__period_end', 'period_end')
+        .order_by()
+    )
+    keys = [_cycle(*row[4:]) for row in rows]
+    ordered = sorted(set(keys), key=lambda key: (key[2], key[0]))
+    index = {key[0]: position for position, key in enumerate(ordered)}
+    columns = list(zip(*rows)) if rows else [()] * 8
+    grades, evaluators, types, departments = columns[:4]
+    return {
+        'grade': np.array(grades, dtype=np.float64),
+        'evaluator': np.array(evaluators, dtype=np.int64),
+        'type': np.array([TYPES.index(code) if code in TYPES else -1 for code in types],
+                         dtype=np.int64),
+        'department': np.array(departments, dtype=np.int64),
+        'cycle': np.array([index[key[0]] for key in keys], dtype=np.int64),
+        'cycle_ids': [key[0] for key in ordered],
+        'cycles': [{'id': key, 'name': name, 'period_end': end}
+                   for key, name, end in reversed(ordered)],
+    }
+
+
+def frame():
+    """
+    Column arrays for the current dataset version, loaded once per process
+    """
+    global _frame
+    version = cache.version(DATASET)
+    if _frame[0] != version:
+        with cache.computing(DATASET, version):
+            _frame = (version, load())
+    return _frame[1]
+
+
+def cycles():
+    """
+    Review cycles with graded evaluations (``{'id', 'name',
+    'period_end'}``), most recent first
+    """
+    return frame()['cycles']
+
+
+def _mask(data, filters):
+    mask = np.ones(len(data['grade']), dtype=bool)
+    for name in ('department', 'evaluator'):
+        if filters.get(name):
+            mask &= np.isin(data[name], filters[name])
+    if filters.get('type'):
+        mask &= np.isin(data['type'], [TYPES.index(code) for code in filters['type'] if code in TYPES])
+    return mask
+
+
+def _means(keys, values):
+    """
+    ``(keys, counts, means, standard deviations)`` per key
+    """
+    groups, index = np.unique(keys, return_inverse=True)
+    index = index.reshape(-1)
+    counts = np.bincount(index, minlength=len(groups))
+    sums = np.bincount(index, weights=values, minlength=len(groups))
+    squares = np.bincount(index, weights=values * values, minlength=len(groups))
+    means = sums / counts
+    std = np.sqrt(np.maximum(squares / counts - means * means, 0))
+    return groups, counts, means, std
+
+
+def _distribution(grades):
+    if not len(grades):
+        return {'count': 0}
+    histogram, _ = np.histogram(grades, bins=GRADE_BINS)
+    _, percentiles = grouped_percentiles(np.zeros(len(grades), dtype=np.int64), grades)
+    return {
+        'count': int(len(grades)),
+        'mean': round(float(grades.mean()), 3),
+        'std': round(float(grades.std()), 3),
+        'percentiles': percentile_dict(percentiles[0], digits=2),
+        # histogram[i]: grades in [i, i + 1), the last bin includes 10
+        'histogram': histogram.tolist(),
+    }
+
+
+def _department_stats(departments, grades):
+    if not len(grades):
+        return []
+    keys, percentiles = grouped_percentiles(departments, grades)
+    _, counts, means, _ = _means(departments, grades)
+    return [
+        {
+            'id': int(key),
+            'count': int(counts[row]),
+            'mean': round(float(means[row]), 3),
+            **percentile_dict(percentiles[row], digits=2),
+        }
+        for row, key in enumerate(keys)
+    ]
+
+
+def _leniency(evaluators, grades, company_mean, company_std):
+    if not len(grades):
+        return []
+    groups, counts, means, _ = _means(evaluators, grades)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (means - company_mean) / (company_std / np.sqrt(counts))
+    z = np.nan_to_num(z)
+    flagged = (counts >= settings.CALIBRATION_MIN_EVALUATIONS) & (
+        np.abs(z) >= settings.CALIBRATION_Z_THRESHOLD)
+    order = np.argsort(-np.abs(z), kind='stable')
+    return [
+        {
+            'evaluator': int(groups[row]),
+            'count': int(counts[row]),
+            'mean': round(float(means[row]), 3),
+            'difference': round(float(means[row] - company_mean), 3),
+            'z': round(float(z[row]), 2),
+            'flag': ('lenient' if z[row] > 0 else 'severe') if flagged[row] else None,
+        }
+        for row in order
+    ]
+
+
+def _trend(cycle_ids, cycles_, keys, grades):
+    """
+    Mean grade and count per key and cycle, as ``{key: {cycle id: {...}}}``
+    with cycles in chronological order
+    """
+    if not len(grades):
+        return {}
+    span = len(cycle_ids)
+    groups, counts, means, _ = _means(keys * span + cycles_, grades)
+    trend = {}
+    for code, mean, count in zip(groups.tolist(), means.tolist(), counts.tolist()):
+        key, cycle = divmod(code, span)
+        trend.setdefault(key, {})[cycle_ids[cycle]] = {'mean': round(mean, 3), 'count': count}
+    return trend
+
+
+def calibrate(cycle=None, filters=None):
+    """
+    Calibration data for the cycle with id ``cycle`` (latest when
+    ``None``) and ``filters``
+    (``{'department': [ids], 'type': [codes], 'evaluator': [ids]}``)
+    """
+    filters = filters or {}
+    if cycle is None:
+        available = cycles()
+        if not available:
+            return {'cycle': None, 'cycles': []}
+        cycle = available[0]['id']
+
+    def compute():
+        data = frame()
+        if cycle in data['cycle_ids']:
+            in_cycle = data['cycle'] == data['cycle_ids'].index(cycle)
+        else:
+            in_cycle = np.zeros(len(data['grade']), dtype=bool)
+        selected = _mask(data, filters)
+        company = data['grade'][in_cycle]
+        company_mean = float(company.mean()) if len(company) else 0.0
+        company_std = float(company.std()) if len(company) else 0.0
+
+        current = in_cycle & selected
+        grades = data['grade'][current]
+        departments = data['department'][current]
+        by_type = _trend(data['cycle_ids'], data['cycle'][selected], data['type'][selected],
+                         data['grade'][selected])
+        return {
+            'cycle': cycle,
+            'cycles': cycles(),
+            'company': {'count': int(len(company)), 'mean': round(company_mean, 3),
+                        'std': round(company_std, 3)},
+            'distribution': _distribution(grades),
+            'departments': _department_stats(departments, grades),
+            'evaluators': _leniency(data['evaluator'][current], grades, company_mean, company_std),
+            'trends': {
+                'department': _trend(data['cycle_ids'], data['cycle'][selected],
+                                     data['department'][selected], data['grade'][selected]),
+                'type': {TYPES[key]: value for key, value in by_type.items() if key >= 0},
+            },
+        }
+
+    params = {'cycle': cycle, 'filters': filters}
+    return cache.cached('calibration', DATASET, params, compute)
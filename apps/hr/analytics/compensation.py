@@ -0,0 +1,201 @@
+"""
+Compensation analytics: compa-ratios, salary percentiles, band outliers
+and gender pay gaps.
+
+``load()`` runs one query (employees joined with their position's base
+salary and level) into column arrays. The arrays are kept in process
+memory per dataset version, so slicing by department, position, level,
+gender and status is a NumPy mask over them rather than a new query; the
+Employee and Position signals bump the version on salary, position,
+gender or status changes.
+
+The compa-ratio is ``current_salary / position.base_salary``; salaries
+outside ``COMPENSATION_BAND`` of the base are reported as outliers. Pay
+gaps compare median salaries (raw gap) and median compa-ratios (gap within
+comparable positions) of women against men.
+"""
+import numpy as np
+from django.conf import settings
+
+from . import cache, grouped_percentiles, percentile_dict
+from ..models import Employee
+
+DATASET = 'compensation'
+FIELDS = ('current_salary', 'position_id', 'department_id', 'gender', 'active')
+DIMENSIONS = {
+    'department': 'department',
+    'position': 'position',
+    'level': 'level',
+    'gender': 'gender',
+}
+GENDERS = [code for code, _ in Employee.GENDER_CHOICES]
+
+_frame = (None, None)
+
+
+def load():
+    """
+    Column arrays of every employee, from one query
+    """
+    rows = list(Employee.objects.values_list(
+        'pk', 'employee_id', 'user__first_name', 'user__last_name',
+        'department_id', 'position_id', 'position__hierarchy_level',
+        'position__base_salary', 'gender', 'current_salary', 'active',
+    ))
+    columns = list(zip(*rows)) if rows else [()] * 11
+    (pks, employee_ids, first_names, last_names, departments, positions,
+     levels, base_salaries, genders, salaries, active) = columns
+    return {
+        'id': np.array(pks, dtype=np.int64),
+        'employee_id': np.array(employee_ids, dtype=object),
+        'name': np.array([f'{first} {last}'.strip() for first, last in zip(first_names, last_names)],
+                         dtype=object),
+        'department': np.array(departments, dtype=np.int64),
+        'position': np.array(positions, dtype=np.int64),
+        'level': np.array(levels, dtype=np.int64),
+        'base_salary': np.array(base_salaries, dtype=np.float64),
+        'gender': np.array([GENDERS.index(code) if code in GENDERS else -1 for code in genders],
+                           dtype=np.int64),
+        'salary': np.array(salaries, dtype=np.float64),
+        'active': np.array(active, dtype=bool),
+    }
+
+
+def frame():
+    """
+    Column arrays for the current dataset version, loaded once per process
+    """
+    global _frame
+    version = cache.version(DATASET)
+    if _frame[0] != version:
+        with cache.computing(DATASET, version):
+            _frame = (version, load())
+    return _frame[1]
+
+
+def _select(data, filters):
+    mask = np.ones(len(data['id']), dtype=bool)
+    if filters.get('active', True):
+        mask &= data['active']
+    for dimension, column in DIMENSIONS.items():
+        values = filters.get(dimension)
+        if values:
+            if dimension == 'gender':
+                values = [GENDERS.index(code) for code in values if code in GENDERS]
+            mask &= np.isin(data[column], values)
+    return {name: values[mask] for name, values in data.items()}
+
+
+def _compa_ratio(data):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(data['base_salary'] > 0, data['salary'] / data['base_salary'], np.nan)
+
+
+def _group_stats(keys, salary, compa):
+    """
+    Per group: count, salary percentiles and compa-ratio mean and median
+    """
+    if not len(keys):
+        return []
+    groups, salary_percentiles = grouped_percentiles(keys, salary)
+    known = ~np.isnan(compa)
+    compa_groups, compa_median = grouped_percentiles(keys[known], compa[known], (50,))
+    median_by_group = dict(zip(compa_groups.tolist(), compa_median[:, 0].tolist()))
+    index = np.searchsorted(groups, keys)
+    counts = np.bincount(index, minlength=len(groups))
+    compa_counts = np.bincount(index[known], minlength=len(groups))
+    compa_sums = np.bincount(index[known], weights=compa[known], minlength=len(groups))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        compa_mean = compa_sums / compa_counts
+    return [
+        {
+            'key': int(group),
+            'count': int(counts[row]),
+            'salary': percentile_dict(salary_percentiles[row], digits=2),
+            'compa_ratio_mean': None if np.isnan(compa_mean[row]) else round(float(compa_mean[row]), 3),
+            'compa_ratio_median': (round(median_by_group[int(group)], 3)
+                                   if int(group) in median_by_group else None),
+        }
+        for row, group in enumerate(groups)
+    ]
+
+
+def _pay_gap(keys, genders, salary, compa):
+    """
+    Per group: median salary and compa-ratio of women and men, and the gaps
+    relative to men
+    """
+    female, male = GENDERS.index('F'), GENDERS.index('M')
+    selected = np.isin(genders, (female, male))
+    codes = keys[selected] * 2 + (genders[selected] == female)
+    known = ~np.isnan(compa[selected])
+    salary_codes, salary_medians = grouped_percentiles(codes, salary[selected], (50,))
+    compa_codes, compa_medians = grouped_percentiles(codes[known], compa[selected][known], (50,))
+    salary_median = dict(zip(salary_codes.tolist(), np.round(salary_medians[:, 0], 2).tolist()))
+    compa_median = dict(zip(compa_codes.tolist(), compa_medians[:, 0].tolist()))
+
+    def gap(medians, key):
+        men, women = medians.get(key * 2), medians.get(key * 2 + 1)
+        if not men or women is None:
+            return None
+        return round((men - women) / men, 4)
+
+    return [
+        {
+            'key': int(key),
+            'median_salary_men': salary_median.get(int(key) * 2),
+            'median_salary_women': salary_median.get(int(key) * 2 + 1),
+            'salary_gap': gap(salary_median, int(key)),
+            'compa_ratio_gap': gap(compa_median, int(key)),
+        }
+        for key in np.unique(keys[selected])
+    ]
+
+
+def analyze(filters=None, group_by='position', outlier_limit=50, employee_limit=0):
+    """
+    Compensation summary for the employees matching ``filters``
+    (``{dimension: [values]}`` plus ``active``), grouped by ``group_by``
+    """
+    filters = filters or {}
+    params = {'filters': filters, 'group_by': group_by,
+              'outliers': outlier_limit, 'employees': employee_limit}
+
+    def compute():
+        data = _select(frame(), filters)
+        compa = _compa_ratio(data)
+        low, high = settings.COMPENSATION_BAND
+        known = ~np.isnan(compa)
+        keys = data[DIMENSIONS[group_by]]
+        everyone = np.zeros(len(keys), dtype=np.int64)
+
+        outside = np.flatnonzero(known & ((compa < low) | (compa > high)))
+        # Furthest from a compa-ratio of 1 first (log scale: 0.5 and 2 tie)
+        outside = outside[np.argsort(-np.abs(np.log(compa[outside])), kind='stable')]
+
+        def employee(row):
+            return {
+                'id': int(data['id'][row]),
+                'employee_id': data['employee_id'][row],
+                'name': data['name'][row],
+                'department': int(data['department'][row]),
+                'position': int(data['position'][row]),
+                'salary': float(data['salary'][row]),
+                'base_salary': float(data['base_salary'][row]),
+                'compa_ratio': None if np.isnan(compa[row]) else round(float(compa[row]), 3),
+            }
+
+        overall = _group_stats(everyone, data['salary'], compa)
+        gap = _pay_gap(everyone, data['gender'], data['salary'], compa)
+        return {
+            'band': [low, high],
+            'summary': overall[0] if overall else {'count': 0},
+            'pay_gap': gap[0] if gap else None,
+            'groups': _group_stats(keys, data['salary'], compa),
+            'pay_gap_by_group': _pay_gap(keys, data['gender'], data['salary'], compa),
+            'outlier_count': len(outside),
+            'outliers': [employee(row) for row in outside[:outlier_limit]],
+            'employees': [employee(row) for row in range(min(employee_limit, len(keys)))],
+        }
+
+    return cache.cached('compensation', DATASET, params, compute)
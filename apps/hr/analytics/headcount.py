@@ -0,0 +1,241 @@
+"""
+Headcount, hires and terminations per day, department and position.
+
+``sweep()`` loads every employee's hire and termination date in one query
+and turns them into per-day event counts with a single ``bincount`` over
+(group, day) codes; the headcount is the running sum of hires minus
+terminations on top of the employees already present when the window
+opens. There is no per-day query or loop.
+
+The series is stored in ``HeadcountDay`` and extended by
+``refresh_headcount()`` (``manage.py refresh_headcount``, run daily) from
+the last stored day. Employee changes that rewrite history (hire or
+termination date, department, position, deletion) mark the series dirty
+from the earliest affected day, right after the change and in its
+transaction, and the next refresh (in whichever process) recomputes from
+there. Each mark is a new ``HeadcountRefresh`` row: writers only insert,
+so concurrent employee changes never wait on a shared row, and
+``take_dirty()`` collapses the rows into the earliest day.
+
+Employees count in their current department and position (transfers are
+not tracked), and a termination counts on its date: the headcount of a
+day is the one at its end.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from . import date_array
+from ..models import Employee, HeadcountDay, HeadcountRefresh
+
+HISTORY_FIELDS = ('hire_date', 'termination_date', 'department_id', 'position_id')
+GROUPS = {'department': 'department_id', 'position': 'position_id'}
+FREQUENCIES = ('day', 'week', 'month')
+
+
+def load_events():
+    """
+    ``(department_ids, position_ids, hire_dates, termination_dates)`` of
+    every employee as arrays; open terminations are ``NaT``
+    """
+    rows = list(Employee.objects.values_list(
+        'department_id', 'position_id', 'hire_date', 'termination_date'))
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty.astype('datetime64[D]'), empty.astype('datetime64[D]')
+    departments, positions, hired, terminated = zip(*rows)
+    return (
+        np.array(departments, dtype=np.int64),
+        np.array(positions, dtype=np.int64),
+        date_array(hired),
+        date_array(terminated),
+    )
+
+
+def sweep(start, end, events=None):
+    """
+    Daily series from ``start`` to ``end`` (inclusive). Returns a dict with
+    ``dates`` (D,), ``groups`` (K, 2) of (department_id, position_id) and
+    ``headcount``, ``hires``, ``terminations`` as (K, D) arrays.
+    """
+    department, position, hired, terminated = events if events is not None else load_events()
+    first = np.datetime64(start, 'D')
+    days = int((np.datetime64(end, 'D') - first).astype(np.int64)) + 1
+    dates = first + np.arange(max(days, 0))
+
+    # Terminations before the hire date are data errors; leave them out
+    valid = np.isnat(terminated) | (terminated >= hired)
+    department, position = department[valid], position[valid]
+    hired, terminated = hired[valid], terminated[valid]
+    if days <= 0 or not len(hired):
+        shape = (0, len(dates))
+        return {
+            'dates': dates, 'groups': np.empty((0, 2), dtype=np.int64),
+            'headcount': np.zeros(shape, dtype=np.int64),
+            'hires': np.zeros(shape, dtype=np.int64),
+            'terminations': np.zeros(shape, dtype=np.int64),
+        }
+
+    groups, group_index = np.unique(
+        np.stack([department, position], axis=1), axis=0, return_inverse=True)
+    group_index = group_index.reshape(-1)
+    count = len(groups)
+
+    hire_day = (hired - first).astype(np.int64)
+    # Open-ended employments terminate after the window
+    term_day = np.full(len(terminated), days, dtype=np.int64)
+    closed = ~np.isnat(terminated)
+    term_day[closed] = (terminated[closed] - first).astype(np.int64)
+
+    def per_day(day):
+        inside = (day >= 0) & (day < days)
+        codes = group_index[inside] * days + day[inside]
+        return np.bincount(codes, minlength=count * days).reshape(count, days)
+
+    hires = per_day(hire_day)
+    terminations = per_day(term_day)
+    present = (hire_day < 0) & (term_day >= 0)
+    opening = np.bincount(group_index[present], minlength=count)
+    headcount = opening[:, None] + np.cumsum(hires - terminations, axis=1)
+    return {
+        'dates': dates, 'groups': groups, 'headcount': headcount,
+        'hires': hires, 'terminations': terminations,
+    }
+
+
+def mark_dirty(day):
+    """
+    Recompute the stored series from ``day`` on the next refresh
+    """
+    HeadcountRefresh.objects.create(dirty_from=day)
+
+
+def take_dirty():
+    """
+    Earliest dirty day, or ``None``, clearing the marks it was taken from
+    """
+    marks = list(HeadcountRefresh.objects.values_list('pk', 'dirty_from'))
+    # By primary key: marks committed meanwhile stay for the next refresh
+    HeadcountRefresh.objects.filter(pk__in=[pk for pk, _ in marks]).delete()
+    return min((day for _, day in marks if day is not None), default=None)
+
+
+def affected_since(old, new):
+    """
+    Earliest day whose headcount changes when an employee goes from ``old``
+    to ``new`` (dicts of ``HISTORY_FIELDS``; ``old`` is ``None`` on
+    create), or ``None``
+    """
+    if old is None:
+        return new['hire_date']
+    if any(old[field] != new[field] for field in ('hire_date', 'department_id', 'position_id')):
+        return min(old['hire_date'], new['hire_date'])
+    if old['termination_date'] != new['termination_date']:
+        return min(day for day in (old['termination_date'], new['termination_date']) if day)
+    return None
+
+
+def refresh_headcount(today=None):
+    """
+    Extend the stored series up to ``today`` and recompute dirty days.
+    Returns the number of rows written.
+    """
+    today = today or timezone.localdate()
+    first = today - timedelta(days=settings.HEADCOUNT_HISTORY_DAYS - 1)
+    last_stored = HeadcountDay.objects.aggregate(last=Max('date'))['last']
+    start = first if last_stored is None else max(first, last_stored + timedelta(days=1))
+
+    # Take the mark before computing: changes made meanwhile mark it again
+    dirty = take_dirty()
+    if dirty is not None:
+        start = max(first, min(start, dirty))
+    if start > today:
+        return 0
+
+    try:
+        series = sweep(start, today)
+        group_rows, day_columns = np.nonzero(
+            series['headcount'] | series['hires'] | series['terminations'])
+        rows = [
+            HeadcountDay(
+                date=series['dates'][day].item(),
+                department_id=int(series['groups'][group, 0]),
+                position_id=int(series['groups'][group, 1]),
+                headcount=int(series['headcount'][group, day]),
+                hires=int(series['hires'][group, day]),
+                terminations=int(series['terminations'][group, day]),
+            )
+            for group, day in zip(group_rows, day_columns)
+        ]
+        with transaction.atomic():
+            HeadcountDay.objects.filter(date__lt=first).delete()
+            HeadcountDay.objects.filter(date__gte=start).delete()
+            HeadcountDay.objects.bulk_create(rows, batch_size=2000)
+    except Exception:
+        if dirty is not None:
+            mark_dirty(dirty)
+        raise
+    return len(rows)
+
+
+def stored_series(start, end, group='department', department=None, frequency='day'):
+    """
+    Chart-ready series from ``HeadcountDay`` in one grouped query:
+    ``{'dates': [...], 'series': {group_id: {'headcount', 'hires',
+    'terminations'}}}``. Weekly and monthly buckets report the headcount
+    at the end of the bucket and the hires and terminations within it.
+    """
+    column = GROUPS[group]
+    queryset = HeadcountDay.objects.filter(date__range=(start, end))
+    if department is not None:
+        queryset = queryset.filter(department_id=department)
+    rows = list(
+        queryset.values_list('date', column)
+        .annotate(Sum('headcount'), Sum('hires'), Sum('terminations'))
+        .order_by()
+    )
+
+    first = np.datetime64(start, 'D')
+    dates = first + np.arange(int((np.datetime64(end, 'D') - first).astype(np.int64)) + 1)
+    if rows:
+        days, keys, headcount, hires, terminations = (np.array(values) for values in zip(*rows))
+        keys_order, key_index = np.unique(keys, return_inverse=True)
+        day_index = (days.astype('datetime64[D]') - first).astype(np.int64)
+    else:
+        keys_order = np.array([], dtype=np.int64)
+    grid = {
+        name: np.zeros((len(keys_order), len(dates)), dtype=np.int64)
+        for name in ('headcount', 'hires', 'terminations')
+    }
+    if rows:
+        grid['headcount'][key_index, day_index] = headcount
+        grid['hires'][key_index, day_index] = hires
+        grid['terminations'][key_index, day_index] = terminations
+
+    if frequency != 'day' and len(dates):
+        if frequency == 'week':
+            # Day 0 (1970-01-01) is a Thursday: shift so weeks start on Monday
+            buckets = (dates.astype(np.int64) + 3) // 7
+        else:
+            buckets = dates.astype('datetime64[M]')
+        # Index of the first and of the last day of each bucket
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(dates)] - 1
+        grid = {
+            'headcount': grid['headcount'][:, ends],
+            'hires': np.add.reduceat(grid['hires'], starts, axis=1),
+            'terminations': np.add.reduceat(grid['terminations'], starts, axis=1),
+        }
+        dates = dates[starts]
+
+    return {
+        'dates': [str(day) for day in dates],
+        'series': {
+            int(key): {name: values[row].tolist() for name, values in grid.items()}
+            for row, key in enumerate(keys_order)
+        },
+    }
@@ -0,0 +1,147 @@
+"""
+Retention, turnover and tenure for the whole employee history.
+
+``load()`` reads only department, hire and termination dates (one
+``values_list`` query) into arrays; every metric is then computed with
+NumPy over all employees at once, so no ``Employee`` is instantiated and
+there is no per-employee Python loop:
+
+* ``retention()``: share of each hire-month cohort still employed N months
+  after hire (``None`` where the cohort is not that old yet),
+* ``turnover()``: terminations in a period over the average of the
+  opening and closing headcount, per department,
+* ``tenure_percentiles()``: tenure of the active employees, overall and per
+  department.
+
+``summary()`` caches all three per employee-dataset version; the Employee
+signals bump the version whenever a hire, termination or department
+changes.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from . import cache, date_array, grouped_percentiles, percentile_dict
+from ..models import Employee
+
+DATASET = 'employees'
+
+
+def load():
+    """
+    ``(department_ids, hire_dates, termination_dates)``; open terminations
+    are ``NaT``
+    """
+    rows = list(Employee.objects.values_list('department_id', 'hire_date', 'termination_date'))
+    if not rows:
+        return (np.array([], dtype=np.int64), np.array([], dtype='datetime64[D]'),
+                np.array([], dtype='datetime64[D]'))
+    departments, hired, terminated = zip(*rows)
+    return (
+        np.array(departments, dtype=np.int64),
+        date_array(hired),
+        date_array(terminated),
+    )
+
+
+def retention(hired, terminated, today, months=24, cohorts=24):
+    """
+    Retention curves of the last ``cohorts`` hire months, ``months`` months
+    after hire
+    """
+    today_month = np.datetime64(today, 'M')
+    first_cohort = today_month - (cohorts - 1)
+    hire_month = hired.astype('datetime64[M]')
+    selected = (hire_month >= first_cohort) & (hire_month <= today_month)
+    hire_month, terminated = hire_month[selected], terminated[selected]
+
+    cohort = (hire_month - first_cohort).astype(np.int64)
+    sizes = np.bincount(cohort, minlength=cohorts)
+
+    # Leavers by cohort and by the tenure month they left in
+    left = ~np.isnat(terminated)
+    tenure_month = (terminated[left].astype('datetime64[M]') - hire_month[left]).astype(np.int64)
+    in_range = (tenure_month >= 0) & (tenure_month <= months)
+    width = months + 1
+    leavers = np.bincount(
+        cohort[left][in_range] * width + tenure_month[in_range], minlength=cohorts * width,
+    ).reshape(cohorts, width)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        curves = 1 - np.cumsum(leavers, axis=1) / sizes[:, None]
+    # A cohort hired k months ago has only been observed for k months
+    age = (cohorts - 1) - np.arange(cohorts)
+    observed = np.arange(width)[None, :] <= age[:, None]
+    curves = np.where(observed & (sizes[:, None] > 0), np.round(curves, 4), np.nan)
+
+    return {
+        'cohorts': [str(first_cohort + index) for index in range(cohorts)],
+        'sizes': sizes.tolist(),
+        'curves': [[None if np.isnan(value) else float(value) for value in row] for row in curves],
+    }
+
+
+def turnover(departments, hired, terminated, start, end):
+    """
+    Per department: terminations between ``start`` and ``end`` and the
+    turnover rate over the average of the opening and closing headcount
+    """
+    start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    still_open = np.isnat(terminated)
+    opening = (hired < start) & (still_open | (terminated >= start))
+    closing = (hired <= end) & (still_open | (terminated > end))
+    leaving = ~still_open & (terminated >= start) & (terminated <= end)
+
+    keys, index = np.unique(departments, return_inverse=True)
+    index = index.reshape(-1)
+    opening, closing, leaving = (
+        np.bincount(index[mask], minlength=len(keys)) for mask in (opening, closing, leaving))
+    average = (opening + closing) / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rates = np.where(average > 0, leaving / average, 0.0)
+    return [
+        {
+            'id': int(key),
+            'terminations': int(leaving[row]),
+            'average_headcount': float(average[row]),
+            'rate': round(float(rates[row]), 4),
+        }
+        for row, key in enumerate(keys)
+    ]
+
+
+def tenure_percentiles(departments, hired, terminated, today):
+    """
+    Tenure in days of active employees: overall and per department
+    """
+    today = np.datetime64(today, 'D')
+    active = (hired <= today) & (np.isnat(terminated) | (terminated > today))
+    days = (today - hired[active]).astype(np.int64)
+    _, overall = grouped_percentiles(np.zeros(len(days), dtype=np.int64), days)
+    keys, per_department = grouped_percentiles(departments[active], days)
+    return {
+        'overall': percentile_dict(overall[0]) if len(overall) else {},
+        'departments': [
+            {'id': int(key), **percentile_dict(row)} for key, row in zip(keys, per_department)
+        ],
+    }
+
+
+def summary(months=24, cohorts=24, period_days=365, today=None):
+    """
+    Retention, turnover and tenure, cached per employee-dataset version
+    """
+    today = today or timezone.localdate()
+
+    def compute():
+        departments, hired, terminated = load()
+        return {
+            'retention': retention(hired, terminated, today, months=months, cohorts=cohorts),
+            'turnover': turnover(departments, hired, terminated,
+                                 today - timedelta(days=period_days - 1), today),
+            'tenure': tenure_percentiles(departments, hired, terminated, today),
+        }
+
+    params = {'months': months, 'cohorts': cohorts, 'period_days': period_days, 'today': today}
+    return cache.cached('tenure', DATASET, params, compute)
@@ -5,3 +5,6 @@ class HrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.hr'
     verbose_name = 'Recursos Humanos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,343 @@
+"""
+Content-addressed storage of employee documents.
+
+Every document points to a ``DocumentBlob``: its content, stored once per
+SHA-256 as ``MEDIA_ROOT/documents/blobs/ab/cd/<sha256>`` however many
+employees share it (the same contract template for everyone).
+
+* Uploads: the document upload view installs ``HashingUploadHandler`` in
+  front of the default handlers. It writes each uploaded file in chunks to
+  a staging file next to the blobs, hashing it on the way; nothing is held
+  in memory, and ``store()`` only renames the staging file into place.
+  Files uploaded anywhere else (the admin) are copied there first.
+* References: ``ref_count`` follows the documents pointing at a blob, with
+  conditional UPDATEs from the Document signals; ``recount_references()``
+  rebuilds it after bulk loads. ``collect_garbage()`` (``manage.py
+  collect_document_blobs``) deletes a blob once no document used it for
+  ``DOCUMENT_BLOB_GRACE_SECONDS``, so uploading the same content meanwhile
+  reuses it; a file is only removed when it was not rewritten within the
+  grace period either.
+* Downloads: ``serve()`` answers with ``X-Accel-Redirect``/``X-Sendfile``
+  when ``DOCUMENT_SENDFILE`` is set, so the proxy sends the bytes and
+  handles ranges. Otherwise it streams the file in chunks itself, with
+  single ``Range`` requests, ``If-Range`` and ``If-None-Match`` (the ETag is
+  the content hash). Under ASGI the chunks come from an async iterator:
+  Django reads a synchronous one whole into memory before sending it.
+
+Blobs live in ``default_storage``, which must be a ``FileSystemStorage``.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from datetime import timedelta
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from .models import Document, DocumentBlob
+
+BLOB_DIR = 'documents/blobs'
+STAGING_DIR = 'documents/staging'
+CHUNK_SIZE = 256 * 1024
+# Blob names checked per query when looking for orphaned files
+GC_BATCH = 1000
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def blob_name(sha256):
+    """
+    Storage name of the blob with this hash
+    """
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def _staging_file():
+    directory = default_storage.path(STAGING_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=directory, suffix='.upload')
+
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    """
+    Uploaded file written to the staging directory, with the SHA-256 and
+    size of what was written
+    """
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        # Not TemporaryUploadedFile.__init__: staged on the blobs' filesystem
+        UploadedFile.__init__(self, _staging_file(), name, content_type, size, charset,
+                              content_type_extra)
+        self.hash = hashlib.sha256()
+        self.written = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.written += len(data)
+        return self.file.write(data)
+
+    @property
+    def sha256(self):
+        return self.hash.hexdigest()
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Streams every uploaded file to the staging directory, whatever its
+    size, hashing it chunk by chunk. Install it per request, first:
+    ``request.upload_handlers.insert(0, HashingUploadHandler(request))``
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset,
+                                       self.content_type_extra)
+        # The handlers after this one would only open files of their own
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            # The staging file is deleted when closed
+            self.file.close()
+
+
+def store(file, content_type=''):
+    """
+    The blob holding the content of ``file``, created when new. A file
+    uploaded through ``HashingUploadHandler`` is renamed into place; any
+    other Django ``File`` is first copied to the staging directory.
+    """
+    staged = file
+    if not isinstance(file, HashedUploadedFile):
+        staged = HashedUploadedFile(os.path.basename(file.name or ''), content_type, 0, None)
+        for chunk in file.chunks(CHUNK_SIZE):
+            staged.write(chunk)
+    content_type = (content_type or getattr(file, 'content_type', None)
+                    or mimetypes.guess_type(file.name or '')[0] or '')
+    staged.flush()
+    path = default_storage.path(blob_name(staged.sha256))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.chmod(staged.temporary_file_path(), default_storage.file_permissions_mode or 0o644)
+
+    try:
+        while True:
+            with transaction.atomic():
+                blob, _ = DocumentBlob.objects.get_or_create(
+                    sha256=staged.sha256,
+                    defaults={'size': staged.written, 'content_type': content_type[:100]},
+                )
+                # Zero rows: collect_garbage() just deleted it, create it again
+                if DocumentBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now()):
+                    # Same bytes when it already exists; the new mtime keeps
+                    # collect_garbage() from removing it
+                    os.replace(staged.temporary_file_path(), path)
+                    return blob
+    finally:
+        staged.close()
+
+
+def add_reference(blob_id):
+    DocumentBlob.objects.filter(pk=blob_id).update(
+        ref_count=F('ref_count') + 1, last_used_at=timezone.now())
+
+
+def release(blob_id):
+    DocumentBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1, last_used_at=timezone.now())
+
+
+def recount_references(blob_ids=None):
+    """
+    Recompute ``ref_count`` from the documents, in one UPDATE
+    """
+    references = (
+        Document.objects.filter(blob=OuterRef('pk'))
+        .values('blob').annotate(total=Count('pk')).values('total')
+    )
+    blobs = DocumentBlob.objects.all()
+    if blob_ids is not None:
+        blobs = blobs.filter(pk__in=blob_ids)
+    return blobs.update(ref_count=Coalesce(Subquery(references), Value(0)))
+
+
+def _remove_stale(path, cutoff):
+    """
+    Delete ``path`` unless it was written after ``cutoff``
+    """
+    try:
+        if os.path.getmtime(path) < cutoff.timestamp():
+            os.remove(path)
+            return True
+    except FileNotFoundError:
+        pass
+    return False
+
+
+def _stored_files(directory):
+    root = default_storage.path(directory)
+    for parent, _, names in os.walk(root):
+        for name in names:
+            yield name, os.path.join(parent, name)
+
+
+def collect_garbage():
+    """
+    Delete the blobs no document used for ``DOCUMENT_BLOB_GRACE_SECONDS``
+    with their files, plus blob files without a row and abandoned staging
+    files of that age. Returns ``(blobs, files)`` removed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.DOCUMENT_BLOB_GRACE_SECONDS)
+    with transaction.atomic():
+        # Locked: a concurrent store() of the same content waits, then
+        # finds the row gone and creates it again
+        stale = dict(
+            DocumentBlob.objects.select_for_update(skip_locked=True)
+            .filter(ref_count=0, last_used_at__lt=cutoff)
+            .exclude(Exists(Document.objects.filter(blob=OuterRef('pk'))))
+            .values_list('pk', 'sha256')
+        )
+        DocumentBlob.objects.filter(pk__in=list(stale)).delete()
+    removed = sum(_remove_stale(default_storage.path(blob_name(sha256)), cutoff)
+                  for sha256 in stale.values())
+
+    batch = []
+
+    def orphans():
+        known = set(DocumentBlob.objects.filter(sha256__in=[name for name, _ in batch])
+                    .values_list('sha256', flat=True))
+        return sum(_remove_stale(path, cutoff) for name, path in batch if name not in known)
+
+    for entry in _stored_files(BLOB_DIR):
+        batch.append(entry)
+        if len(batch) >= GC_BATCH:
+            removed += orphans()
+            batch = []
+    if batch:
+        removed += orphans()
+    removed += sum(_remove_stale(path, cutoff) for _, path in _stored_files(STAGING_DIR))
+    return len(stale), removed
+
+
+def _byte_range(header, size):
+    """
+    Inclusive ``(first, last)`` byte of a single ``bytes=`` range, ``None``
+    to send the whole file (no header, or several ranges), ``False`` when
+    it cannot be satisfied
+    """
+    match = _RANGE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return False
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or last < first:
+        return False
+    return first, last
+
+
+def _chunks(path, offset, length):
+    with open(path, 'rb') as handle:
+        handle.seek(offset)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def _achunks(path, offset, length):
+    read = sync_to_async(lambda handle, size: handle.read(size), thread_sensitive=False)
+    handle = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        handle.seek(offset)
+        while length > 0:
+            chunk = await read(handle, min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def serve(request, document):
+    """
+    Download response for ``document`` (its blob, or its file from before
+    blobs); the bytes never go through Python with ``DOCUMENT_SENDFILE``
+    """
+    if document.blob_id is not None:
+        name = blob_name(document.blob.sha256)
+        etag = f'"{document.blob.sha256}"'
+    elif document.file:
+        name, etag = document.file.name, None
+    else:
+        raise Http404('Document has no content')
+    path = default_storage.path(name)
+    filename = document.filename or os.path.basename(name)
+    content_type = (mimetypes.guess_type(filename)[0]
+                    or (document.blob.content_type if document.blob_id else '')
+                    or 'application/octet-stream')
+    headers = {
+        'Content-Disposition': content_disposition_header(True, filename),
+        'Cache-Control': 'private, no-cache',
+        'Accept-Ranges': 'bytes',
+    }
+    if etag:
+        headers['ETag'] = etag
+        if etag in request.headers.get('If-None-Match', ''):
+            return HttpResponseNotModified(headers={'ETag': etag})
+
+    mode = settings.DOCUMENT_SENDFILE
+    if mode == 'x-accel':
+        headers['X-Accel-Redirect'] = quote(settings.DOCUMENT_ACCEL_PREFIX.rstrip('/') + '/' + name)
+        return HttpResponse(content_type=content_type, headers=headers)
+    if mode == 'x-sendfile':
+        headers['X-Sendfile'] = path
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        raise Http404('Document file is missing')
+    byte_range = _byte_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range != etag:
+        byte_range = None
+    if byte_range is False:
+        return HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}'})
+
+    first, last = byte_range or (0, size - 1)
+    length = last - first + 1 if size else 0
+    chunks = _achunks if isinstance(request, ASGIRequest) else _chunks
+    response = StreamingHttpResponse(chunks(path, first, length), content_type=content_type,
+                                     status=206 if byte_range else 200, headers=headers)
+    response['Content-Length'] = str(length)
+    if byte_range:
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+    return response
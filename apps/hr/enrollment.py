@@ -0,0 +1,176 @@
+"""
+Training enrollment with a capacity limit and a waitlist.
+
+``Training.seats_taken`` counts the participations holding a seat (every
+status but waitlisted and cancelled). A seat is claimed with one
+conditional UPDATE::
+
+    UPDATE hr_training SET seats_taken = seats_taken + 1
+    WHERE id = %s AND seats_taken < max_participants
+
+so concurrent enrollments never over-book and nobody reads a count and
+then inserts. The participation row is inserted first and the seat is
+claimed last, right before the commit: the training row is locked only
+between that UPDATE and the COMMIT, not while the rest of the request
+runs, so concurrent enrollments do not queue behind each other.
+
+When the claim fails the participation is waitlisted. Releasing a seat
+(``cancel()``) or raising ``max_participants`` calls ``promote_waitlist()``,
+which hands free seats to the waitlist in request order; waitlisted rows
+are taken with ``SKIP LOCKED`` so concurrent promotions never pick the
+same row.
+
+An employee cannot enroll (nor join the waitlist) in a training that
+overlaps another of their participations (``scheduling``); the employee row
+is locked for the check so two concurrent enrollments cannot both pass.
+
+Participations created, edited or deleted elsewhere (admin, bulk loads)
+must call ``resync()`` or ``recount_seats()`` afterwards.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import scheduling
+from .models import Employee, EmployeeTraining, Training
+
+OPEN_STATUSES = ('PLANNED',)
+
+
+class EnrollmentError(Exception):
+    """
+    The enrollment or cancellation is not allowed; the message says why
+    """
+
+
+def _claim_seat(training_id):
+    return Training.objects.filter(
+        pk=training_id, status__in=OPEN_STATUSES, seats_taken__lt=F('max_participants'),
+    ).update(seats_taken=F('seats_taken') + 1) == 1
+
+
+def _release_seat(training_id):
+    Training.objects.filter(pk=training_id, seats_taken__gt=0).update(
+        seats_taken=F('seats_taken') - 1)
+
+
+def enroll(training, employee_id, waitlist=True):
+    """
+    Enroll ``employee_id`` in ``training``: returns the participation,
+    ``ENROLLED`` when a seat was free and ``WAITLISTED`` otherwise (or
+    ``EnrollmentError`` when ``waitlist`` is false)
+    """
+    if training.status not in OPEN_STATUSES:
+        raise EnrollmentError('This training is not open for enrollment.')
+
+    with transaction.atomic():
+        # One enrollment per employee at a time, so the overlap check holds
+        list(Employee.objects.select_for_update().filter(pk=employee_id).values_list('pk'))
+        clashes = scheduling.participant_conflicts(training, [employee_id])
+        if clashes:
+            raise EnrollmentError(f'Overlaps with {scheduling.describe(clashes[0])}.')
+        try:
+            with transaction.atomic():
+                participation = EmployeeTraining.objects.create(
+                    training_id=training.pk, employee_id=employee_id, status='ENROLLED')
+        except IntegrityError:
+            # Enrolled before: only a cancelled participation can enroll again
+            participation = EmployeeTraining.objects.select_for_update().get(
+                training_id=training.pk, employee_id=employee_id)
+            if participation.status != 'CANCELLED':
+                raise EnrollmentError('Already enrolled or waitlisted in this training.')
+            participation.status = 'ENROLLED'
+            participation.requested_at = timezone.now()
+            participation.save(update_fields=['status', 'requested_at'])
+
+        if not _claim_seat(training.pk):
+            if not waitlist:
+                raise EnrollmentError('This training is full.')
+            participation.status = 'WAITLISTED'
+            participation.save(update_fields=['status'])
+
+    if participation.status == 'WAITLISTED':
+        # A seat released while this transaction was open saw no waitlist
+        promoted = promote_waitlist(training.pk)
+        if any(row.pk == participation.pk for row in promoted):
+            participation.status = 'ENROLLED'
+    return participation
+
+
+def cancel(participation):
+    """
+    Cancel an enrolled or waitlisted participation, giving a released seat
+    to the waitlist
+    """
+    with transaction.atomic():
+        released = EmployeeTraining.objects.filter(
+            pk=participation.pk, status='ENROLLED').update(status='CANCELLED') == 1
+        if released:
+            _release_seat(participation.training_id)
+        elif not EmployeeTraining.objects.filter(
+                pk=participation.pk, status='WAITLISTED').update(status='CANCELLED'):
+            raise EnrollmentError('Only enrolled or waitlisted participations can be cancelled.')
+    participation.status = 'CANCELLED'
+    if released:
+        promote_waitlist(participation.training_id)
+    return participation
+
+
+def promote_waitlist(training_id):
+    """
+    Enroll waitlisted participations, oldest request first, while seats are
+    free. Returns the promoted participations.
+    """
+    promoted = []
+    while True:
+        with transaction.atomic():
+            candidate = (
+                EmployeeTraining.objects.select_for_update(skip_locked=True)
+                .filter(training_id=training_id, status='WAITLISTED')
+                .order_by('requested_at', 'pk').first()
+            )
+            if candidate is None or not _claim_seat(training_id):
+                return promoted
+            candidate.status = 'ENROLLED'
+            candidate.save(update_fields=['status'])
+        promoted.append(candidate)
+
+
+def waitlist_position(participation):
+    """
+    1-based position of a waitlisted participation, or ``None``
+    """
+    if participation.status != 'WAITLISTED':
+        return None
+    ahead = EmployeeTraining.objects.filter(
+        Q(requested_at__lt=participation.requested_at)
+        | Q(requested_at=participation.requested_at, pk__lt=participation.pk),
+        training_id=participation.training_id, status='WAITLISTED',
+    ).count()
+    return ahead + 1
+
+
+def resync(training_ids):
+    """
+    Recount the seats of ``training_ids`` and fill freed ones from the
+    waitlist, after participations changed outside this module
+    """
+    recount_seats(training_ids)
+    for training_id in training_ids:
+        promote_waitlist(training_id)
+
+
+def recount_seats(training_ids=None):
+    """
+    Recompute ``seats_taken`` from the participations, in one UPDATE
+    """
+    seats = (
+        EmployeeTraining.objects.filter(training=OuterRef('pk'))
+        .exclude(status__in=EmployeeTraining.SEATLESS_STATUSES)
+        .values('training').annotate(total=Count('pk')).values('total')
+    )
+    trainings = Training.objects.all()
+    if training_ids is not None:
+        trainings = trainings.filter(pk__in=training_ids)
+    return trainings.update(seats_taken=Coalesce(Subquery(seats), Value(0)))
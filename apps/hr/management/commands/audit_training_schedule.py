@@ -0,0 +1,46 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.hr.scheduling import audit
+
+LABELS = {
+    'instructor': 'Instructor',
+    'location': 'Location',
+    'participant': 'Participants',
+}
+
+
+class Command(BaseCommand):
+    help = 'List trainings of a year that double-book an instructor, a room or a participant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None,
+                            help='Calendar year to audit (default: the current one)')
+        parser.add_argument('--fail', action='store_true',
+                            help='Exit with an error when conflicts are found')
+
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.localdate().year
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime(year, 1, 1), tz)
+        end = timezone.make_aware(datetime(year + 1, 1, 1), tz)
+
+        began = time.perf_counter()
+        trainings, overlaps = audit(start, end)
+        elapsed = (time.perf_counter() - began) * 1000
+
+        def label(pk):
+            name, begin, finish = trainings[pk]
+            return f'#{pk} "{name}" {timezone.localtime(begin):%Y-%m-%d %H:%M}'
+
+        for overlap in overlaps:
+            keys = overlap.keys if overlap.kind != 'participant' else [f'{len(overlap.keys)} employee(s)']
+            self.stdout.write(f'{LABELS[overlap.kind]:<13} {", ".join(map(str, keys))}: '
+                              f'{label(overlap.first)} / {label(overlap.second)}')
+        self.stdout.write(f'{year}: {len(trainings)} trainings, {len(overlaps)} conflicts '
+                          f'({elapsed:.0f} ms)')
+        if overlaps and options['fail']:
+            raise CommandError(f'{len(overlaps)} schedule conflicts in {year}')
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.hr import documents
+
+
+class Command(BaseCommand):
+    help = 'Delete document blobs no document has used for DOCUMENT_BLOB_GRACE_SECONDS (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute the reference counts first (after bulk loads or raw SQL)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['recount']:
+            self.stdout.write(f'Reference counts recomputed: {documents.recount_references()} blobs')
+        blobs, files = documents.collect_garbage()
+        self.stdout.write(f'Blobs deleted: {blobs}, files removed: {files} '
+                          f'({(time.perf_counter() - start) * 1000:.0f} ms)')
@@ -0,0 +1,407 @@
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.hr import documents as document_storage
+from apps.hr import enrollment
+from apps.hr.analytics import benefits, cache, calibration, compensation, headcount, tenure
+from apps.hr.models import (
+    Department, Position, Employee, Dependent, Vacation, Attendance,
+    Benefit, EmployeeBenefit, Training, EmployeeTraining,
+    Evaluation, Document
+)
+
+User = get_user_model()
+
+SYNTHETIC_TAG = '[synthetic]'
+EMAIL_DOMAIN = 'synthetic.bytenest.local'
+BATCH_SIZE = 5000
+
+SCALES = {
+    'small': {'departments': 5, 'employees': 100, 'years': 1},
+    'medium': {'departments': 12, 'employees': 1000, 'years': 3},
+    'large': {'departments': 30, 'employees': 10000, 'years': 5},
+}
+
+DEPARTMENT_NAMES = [
+    'Engineering', 'Sales', 'Marketing', 'Finance', 'Human Resources',
+    'Operations', 'Support', 'Legal', 'Product', 'Data', 'Infrastructure',
+    'Security', 'Procurement', 'Logistics', 'Quality',
+]
+POSITION_NAMES = [
+    'Intern', 'Assistant', 'Analyst', 'Specialist', 'Coordinator',
+    'Senior Analyst', 'Lead', 'Manager', 'Senior Manager', 'Director',
+]
+FIRST_NAMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela',
+    'Henrique', 'Isabela', 'João', 'Larissa', 'Marcos', 'Natália', 'Otávio',
+    'Paula', 'Rafael', 'Sofia', 'Thiago', 'Vanessa', 'William',
+]
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa',
+    'Ferreira', 'Almeida', 'Ribeiro', 'Carvalho', 'Gomes', 'Martins',
+    'Rocha', 'Barbosa',
+]
+BENEFITS = [
+    ('Meal Voucher', 'MEAL_VOUCHER', '900.00'),
+    ('Food Voucher', 'FOOD_VOUCHER', '600.00'),
+    ('Transport Voucher', 'TRANSPORT_VOUCHER', '250.00'),
+    ('Health Plan', 'HEALTH_PLAN', '750.00'),
+    ('Dental Plan', 'DENTAL_PLAN', '60.00'),
+    ('Life Insurance', 'LIFE_INSURANCE', '45.00'),
+    ('Education Aid', 'EDUCATION_AID', '500.00'),
+]
+INSTRUCTORS = ['Carlos Mendes', 'Juliana Prado', 'Ricardo Alves', 'Fernanda Luz', 'Paulo Reis']
+LOCATIONS = ['Room A', 'Room B', 'Auditorium', 'Online', 'Lab 1']
+
+
+def chunked_create(model, objects, batch_size=BATCH_SIZE):
+    """
+    ``bulk_create`` from a generator without holding every row in memory
+    """
+    batch = []
+    total = 0
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            total += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+    return total
+
+
+class Command(BaseCommand):
+    help = 'Generate a seeded synthetic HR dataset for benchmarks and query-plan checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--departments', type=int)
+        parser.add_argument('--employees', type=int)
+        parser.add_argument('--years', type=int,
+                            help='Years of attendance, vacation and evaluation history')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--as-of', type=date.fromisoformat,
+                            help='Reference "today" (YYYY-MM-DD), for reproducible dates')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated synthetic data first')
+
+    def handle(self, *args, **options):
+        params = dict(SCALES[options['scale']])
+        for key in ('departments', 'employees', 'years'):
+            if options[key] is not None:
+                params[key] = options[key]
+        if params['departments'] > params['employees']:
+            raise CommandError('Need at least one employee per department.')
+
+        self.rng = random.Random(options['seed'])
+        self.today = options['as_of'] or timezone.localdate()
+        self.years = params['years']
+        self.history_start = self.today - timedelta(days=365 * self.years)
+
+        if options['clear']:
+            self.clear()
+        elif Department.objects.filter(description=SYNTHETIC_TAG).exists():
+            raise CommandError('Synthetic data already exists; use --clear to regenerate.')
+
+        with transaction.atomic():
+            departments = self.create_departments(params['departments'])
+            positions = self.create_positions(departments)
+            employees = self.create_employees(params['employees'], departments, positions)
+            self.assign_managers(departments, employees)
+            benefit_rows = self.create_benefits()
+            self.log('Employee benefits', chunked_create(EmployeeBenefit, self.employee_benefits(employees, benefit_rows)))
+            self.log('Dependents', chunked_create(Dependent, self.dependents(employees)))
+            self.log('Documents', chunked_create(Document, self.documents(employees)))
+            document_storage.recount_references()
+            self.log('Vacations', chunked_create(Vacation, self.vacations(employees)))
+            self.log('Evaluations', chunked_create(Evaluation, self.evaluations(employees, departments)))
+            trainings = self.create_trainings(departments)
+            self.log('Training participations', chunked_create(EmployeeTraining, self.participations(employees, trainings)))
+            enrollment.recount_seats()
+        # Attendance is by far the largest table; commit it in its own transaction
+        with transaction.atomic():
+            self.log('Attendance records', chunked_create(Attendance, self.attendance(employees)))
+
+        # bulk_create sends no signals: invalidate the analytics by hand
+        headcount.mark_dirty(min(employee.hire_date for employee in employees))
+        cache.bump(tenure.DATASET, compensation.DATASET, calibration.DATASET, benefits.DATASET)
+
+        self.stdout.write(self.style.SUCCESS('Synthetic dataset generated.'))
+
+    def log(self, label, count):
+        self.stdout.write(f'{label}: {count}')
+
+    def clear(self):
+        with transaction.atomic():
+            Department.objects.filter(description=SYNTHETIC_TAG).update(manager=None)
+            Employee.objects.filter(user__email__endswith='@' + EMAIL_DOMAIN).delete()
+            User.objects.filter(email__endswith='@' + EMAIL_DOMAIN).delete()
+            Position.objects.filter(department__description=SYNTHETIC_TAG).delete()
+            Department.objects.filter(description=SYNTHETIC_TAG).delete()
+            Benefit.objects.filter(description=SYNTHETIC_TAG).delete()
+            Training.objects.filter(description=SYNTHETIC_TAG).delete()
+        self.stdout.write('Previous synthetic data removed.')
+
+    def random_date(self, start, end):
+        span = (end - start).days
+        return start + timedelta(days=self.rng.randint(0, max(span, 0)))
+
+    def create_departments(self, count):
+        departments = []
+        for index in range(count):
+            base = DEPARTMENT_NAMES[index % len(DEPARTMENT_NAMES)]
+            suffix = index // len(DEPARTMENT_NAMES)
+            departments.append(Department(
+                name=f'{base} {suffix + 1:02d}' if suffix else base,
+                description=SYNTHETIC_TAG,
+                budget=Decimal(self.rng.randrange(200_000, 5_000_000, 1000)),
+                active=self.rng.random() > 0.05,
+            ))
+        departments = Department.objects.bulk_create(departments)
+        self.log('Departments', len(departments))
+        return departments
+
+    def create_positions(self, departments):
+        positions = []
+        for department in departments:
+            levels = sorted(self.rng.sample(range(1, 11), self.rng.randint(3, 8)))
+            for level in levels:
+                positions.append(Position(
+                    name=POSITION_NAMES[level - 1],
+                    department=department,
+                    base_salary=Decimal(2000 + level * 1500 + self.rng.randint(0, 800)),
+                    contract_type='INTERNSHIP' if level == 1 else self.rng.choice(['CLT', 'CLT', 'CLT', 'PJ']),
+                    hierarchy_level=level,
+                    active=True,
+                ))
+        positions = Position.objects.bulk_create(positions)
+        self.log('Positions', len(positions))
+        return positions
+
+    def create_employees(self, count, departments, positions):
+        positions_by_department = {}
+        for position in positions:
+            positions_by_department.setdefault(position.department_id, []).append(position)
+
+        password = make_password('synthetic')
+        users = []
+        for index in range(count):
+            users.append(User(
+                username=f'synthetic{index:06d}',
+                email=f'employee{index:06d}@{EMAIL_DOMAIN}',
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                password=password,
+            ))
+        users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+        oldest_hire = self.history_start - timedelta(days=365 * 5)
+        employees = []
+        for index, user in enumerate(users):
+            # Round-robin first so every department has at least one employee
+            department = departments[index] if index < len(departments) else self.rng.choice(departments)
+            position = self.rng.choice(positions_by_department[department.id])
+            hire_date = self.random_date(oldest_hire, self.today - timedelta(days=30))
+            termination_date = None
+            if self.rng.random() < 0.12:
+                termination_date = self.random_date(hire_date + timedelta(days=30), self.today)
+            salary = position.base_salary * Decimal(str(round(self.rng.uniform(0.8, 1.25), 3)))
+            employees.append(Employee(
+                user=user,
+                cpf=f'{index:011d}',
+                birth_date=self.random_date(date(1960, 1, 1), date(2004, 12, 31)),
+                gender=self.rng.choice(['M', 'F', 'M', 'F', 'O']),
+                marital_status=self.rng.choice([c[0] for c in Employee.MARITAL_STATUS_CHOICES]),
+                city='São Paulo',
+                state='SP',
+                employee_id=f'SYN{index:07d}',
+                position=position,
+                department=department,
+                hire_date=hire_date,
+                termination_date=termination_date,
+                current_salary=salary.quantize(Decimal('0.01')),
+                contract_type=position.contract_type,
+                active=termination_date is None,
+                on_vacation=termination_date is None and self.rng.random() < 0.04,
+                on_leave=termination_date is None and self.rng.random() < 0.02,
+            ))
+        employees = Employee.objects.bulk_create(employees, batch_size=BATCH_SIZE)
+        self.log('Employees', len(employees))
+        return employees
+
+    def assign_managers(self, departments, employees):
+        by_department = {}
+        for employee in employees:
+            if employee.active:
+                by_department.setdefault(employee.department_id, []).append(employee)
+        for department in departments:
+            candidates = by_department.get(department.id)
+            if candidates:
+                department.manager = max(candidates, key=lambda e: e.position.hierarchy_level)
+        Department.objects.bulk_update(departments, ['manager'])
+
+    def create_benefits(self):
+        benefits = Benefit.objects.bulk_create([
+            Benefit(name=name, benefit_type=benefit_type, value=Decimal(value),
+                    description=SYNTHETIC_TAG, active=True)
+            for name, benefit_type, value in BENEFITS
+        ])
+        self.log('Benefits', len(benefits))
+        return benefits
+
+    def employee_benefits(self, employees, benefits):
+        for employee in employees:
+            for benefit in self.rng.sample(benefits, self.rng.randint(2, 5)):
+                yield EmployeeBenefit(
+                    employee=employee,
+                    benefit=benefit,
+                    value=benefit.value,
+                    start_date=employee.hire_date,
+                    end_date=employee.termination_date,
+                    active=employee.active,
+                )
+
+    def dependents(self, employees):
+        relationships = [c[0] for c in Dependent.RELATIONSHIP_CHOICES]
+        for employee in employees:
+            for _ in range(self.rng.choice([0, 0, 1, 1, 2, 3])):
+                yield Dependent(
+                    employee=employee,
+                    name=f'{self.rng.choice(FIRST_NAMES)} {employee.user.last_name}',
+                    birth_date=self.random_date(date(1950, 1, 1), self.today),
+                    relationship=self.rng.choice(relationships),
+                )
+
+    def documents(self, employees):
+        # One contract template for everyone: a single stored blob
+        contract = document_storage.store(
+            ContentFile(b'%PDF-1.4\n% ' + SYNTHETIC_TAG.encode() + b' employment contract\n%%EOF\n',
+                        name='contract.pdf'),
+            'application/pdf',
+        )
+        for employee in employees:
+            yield Document(
+                employee=employee,
+                document_type='CONTRACT',
+                name='Employment Contract',
+                blob=contract,
+                filename=f'contract_{employee.employee_id}.pdf',
+            )
+
+    def employment_window(self, employee):
+        start = max(employee.hire_date, self.history_start)
+        end = employee.termination_date or self.today
+        return start, end
+
+    def vacations(self, employees):
+        for employee in employees:
+            start, end = self.employment_window(employee)
+            years = max((end - start).days // 365, 0)
+            for _ in range(years + (1 if self.rng.random() < 0.5 else 0)):
+                vacation_start = self.random_date(start, end)
+                days = self.rng.choice([10, 15, 20, 30])
+                status = 'COMPLETED' if vacation_start < self.today else self.rng.choice(
+                    ['REQUESTED', 'APPROVED', 'REJECTED'])
+                if vacation_start > self.today - timedelta(days=60) and self.rng.random() < 0.3:
+                    status = 'REQUESTED'
+                approved = status in ('APPROVED', 'COMPLETED', 'REJECTED')
+                yield Vacation(
+                    employee=employee,
+                    start_date=vacation_start,
+                    end_date=vacation_start + timedelta(days=days - 1),
+                    days_requested=days,
+                    status=status,
+                    approval_date=timezone.make_aware(
+                        datetime.combine(vacation_start - timedelta(days=15), time(10))
+                    ) if approved else None,
+                )
+
+    def evaluations(self, employees, departments):
+        managers = {d.id: d.manager.user_id for d in departments if d.manager_id}
+        fallback = next(iter(managers.values()))
+        for employee in employees:
+            start, end = self.employment_window(employee)
+            for year in range(start.year, end.year + 1):
+                period_end = date(year, 12, 31)
+                if period_end > end:
+                    continue
+                yield Evaluation(
+                    employee=employee,
+                    evaluation_type='ANNUAL',
+                    period_start=date(year, 1, 1),
+                    period_end=period_end,
+                    evaluator_id=managers.get(employee.department_id, fallback),
+                    overall_grade=Decimal(str(round(min(max(self.rng.gauss(7.2, 1.2), 0), 10), 2))),
+                )
+
+    def create_trainings(self, departments):
+        trainings = []
+        # Roughly one training per department per quarter of history
+        for _ in range(max(len(departments) * self.years * 4, 4)):
+            start = timezone.make_aware(datetime.combine(
+                self.random_date(self.history_start, self.today + timedelta(days=120)),
+                time(self.rng.choice([9, 14]))))
+            hours = self.rng.choice([2, 4, 8, 16])
+            status = 'COMPLETED' if start.date() < self.today else 'PLANNED'
+            trainings.append(Training(
+                name=f'{self.rng.choice(["Leadership", "Python", "Security", "Compliance", "Sales", "Excel"])} '
+                     f'{self.rng.choice(["Basics", "Advanced", "Workshop", "Bootcamp"])}',
+                description=SYNTHETIC_TAG,
+                instructor=self.rng.choice(INSTRUCTORS),
+                start_date=start,
+                end_date=start + timedelta(hours=hours),
+                duration_hours=hours,
+                location=self.rng.choice(LOCATIONS),
+                status=status,
+                cost=Decimal(self.rng.randint(500, 20000)),
+                max_participants=self.rng.choice([10, 20, 30, 50]),
+            ))
+        trainings = Training.objects.bulk_create(trainings)
+        self.log('Trainings', len(trainings))
+        return trainings
+
+    def participations(self, employees, trainings):
+        for training in trainings:
+            size = self.rng.randint(1, training.max_participants)
+            completed = training.status == 'COMPLETED'
+            for employee in self.rng.sample(employees, min(size, len(employees))):
+                passed = completed and self.rng.random() > 0.1
+                yield EmployeeTraining(
+                    employee=employee,
+                    training=training,
+                    status=('PASSED' if passed else 'FAILED') if completed else 'ENROLLED',
+                    grade=Decimal(str(round(self.rng.uniform(5, 10), 2))) if completed else None,
+                    certificate=passed,
+                )
+
+    def attendance(self, employees):
+        check_in = time(9)
+        lunch_out = time(12)
+        lunch_in = time(13)
+        for employee in employees:
+            start, end = self.employment_window(employee)
+            day = start
+            while day <= end:
+                if day.weekday() < 5 and self.rng.random() > 0.03:
+                    overtime = self.rng.choice([0, 0, 0, 0, 1, 2])
+                    yield Attendance(
+                        employee=employee,
+                        date=day,
+                        check_in=check_in,
+                        lunch_out=lunch_out,
+                        lunch_in=lunch_in,
+                        check_out=time(18 + overtime),
+                        hours_worked=Decimal(8 + overtime),
+                        overtime_hours=Decimal(overtime),
+                    )
+                day += timedelta(days=1)
@@ -0,0 +1,68 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.hr import review_cycles
+from apps.hr.models import Evaluation, ReviewCycle
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Create the evaluations of a review cycle for every active employee (idempotent)'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--cycle', type=int, help='Id of an existing review cycle')
+        target.add_argument('--year', type=int,
+                            help='Calendar-year cycle, created when missing ("<year> <type> Review")')
+        parser.add_argument('--type', default='ANNUAL',
+                            choices=[code for code, _ in Evaluation.TYPE_CHOICES],
+                            help='Evaluation type of a new --year cycle (default: ANNUAL)')
+        parser.add_argument('--default-evaluator',
+                            help='Login (email) of the user evaluating employees without a department manager')
+        parser.add_argument('--batch-size', type=int, default=review_cycles.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cycle = self.cycle(options)
+        if options['default_evaluator']:
+            evaluator = User.objects.filter(**{User.USERNAME_FIELD: options['default_evaluator']}).first()
+            if evaluator is None:
+                raise CommandError(f"Unknown user: {options['default_evaluator']}")
+            cycle.default_evaluator = evaluator
+            cycle.save(update_fields=['default_evaluator'])
+
+        start = time.perf_counter()
+
+        def progress(created, processed, total):
+            self.stdout.write(f'  {processed}/{total} employees, {created} evaluations created '
+                              f'({(time.perf_counter() - start):.1f} s)')
+
+        result = review_cycles.generate(cycle, batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"{cycle}: {result['created']} created, {result['existing']} already existed "
+            f'({(time.perf_counter() - start) * 1000:.0f} ms)'))
+        if result['unassigned']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(result['unassigned'])} employees have no evaluator (department without "
+                f"a manager, or its manager); set --default-evaluator: "
+                f"{', '.join(map(str, result['unassigned'][:20]))}"))
+
+    def cycle(self, options):
+        if options['cycle']:
+            cycle = ReviewCycle.objects.filter(pk=options['cycle']).first()
+            if cycle is None:
+                raise CommandError(f"Review cycle {options['cycle']} does not exist")
+            return cycle
+        year = options['year']
+        label = dict(Evaluation.TYPE_CHOICES)[options['type']].split()[0]
+        cycle, created = ReviewCycle.objects.get_or_create(
+            name=f'{year} {label} Review',
+            defaults={'evaluation_type': options['type'],
+                      'period_start': date(year, 1, 1), 'period_end': date(year, 12, 31)},
+        )
+        if created:
+            self.stdout.write(f'Created review cycle "{cycle}"')
+        return cycle
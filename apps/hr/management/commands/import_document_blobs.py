@@ -0,0 +1,40 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.hr import documents
+from apps.hr.models import Document
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Move documents stored as one file each into the deduplicated blob storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-files', action='store_true',
+                            help='Leave the original files in place')
+
+    def handle(self, *args, **options):
+        pending = list(Document.objects.filter(blob__isnull=True).exclude(file='')
+                       .order_by('pk').values_list('pk', flat=True))
+        moved = missing = freed = 0
+        for offset in range(0, len(pending), BATCH_SIZE):
+            for document in Document.objects.filter(pk__in=pending[offset:offset + BATCH_SIZE]):
+                name = document.file.name
+                if not default_storage.exists(name):
+                    missing += 1
+                    continue
+                with default_storage.open(name, 'rb') as handle:
+                    document.blob = documents.store(handle)
+                document.filename = document.filename or os.path.basename(name)
+                document.file = ''
+                document.save(update_fields=['blob', 'filename', 'file'])
+                moved += 1
+                if not options['keep_files'] and not Document.objects.filter(file=name).exists():
+                    freed += default_storage.size(name)
+                    default_storage.delete(name)
+            self.stdout.write(f'  {min(offset + BATCH_SIZE, len(pending))}/{len(pending)} documents')
+        self.stdout.write(self.style.SUCCESS(
+            f'Documents moved: {moved}, files missing: {missing}, bytes freed: {freed}'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.hr.analytics.headcount import refresh_headcount
+
+
+class Command(BaseCommand):
+    help = 'Extend the stored daily headcount series up to today (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and refresh periodically')
+        parser.add_argument('--interval', type=float, default=3600.0,
+                            help='Seconds between refreshes with --loop (default: 3600)')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            written = refresh_headcount()
+            self.stdout.write(f'Headcount rows written: {written} '
+                              f'({(time.perf_counter() - start) * 1000:.0f} ms)')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
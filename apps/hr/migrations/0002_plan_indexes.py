@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='hr_att_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['active', 'department'], name='hr_emp_active_dept_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacation',
+            index=models.Index(fields=['status', '-request_date'], name='hr_vac_status_req_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0002_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadcountDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('headcount', models.PositiveIntegerField(default=0)),
+                ('hires', models.PositiveIntegerField(default=0)),
+                ('terminations', models.PositiveIntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hr.department')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hr.position')),
+            ],
+            options={
+                'verbose_name': 'Headcount Day',
+                'verbose_name_plural': 'Headcount Series',
+                'ordering': ['date'],
+                'unique_together': {('date', 'department', 'position')},
+            },
+        ),
+    ]
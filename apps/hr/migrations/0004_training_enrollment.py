@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:43
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_seats(apps, schema_editor):
+    Training = apps.get_model('hr', 'Training')
+    EmployeeTraining = apps.get_model('hr', 'EmployeeTraining')
+    seats = (
+        EmployeeTraining.objects.filter(training=OuterRef('pk'))
+        .exclude(status__in=['WAITLISTED', 'CANCELLED'])
+        .values('training').annotate(total=Count('pk')).values('total')
+    )
+    Training.objects.update(seats_taken=Coalesce(Subquery(seats), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0003_headcount_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeetraining',
+            name='requested_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='training',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='employeetraining',
+            name='status',
+            field=models.CharField(choices=[('ENROLLED', 'Enrolled'), ('PRESENT', 'Present'), ('ABSENT', 'Absent'), ('PASSED', 'Passed'), ('FAILED', 'Failed'), ('WAITLISTED', 'Waitlisted'), ('CANCELLED', 'Cancelled')], default='ENROLLED', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='employeetraining',
+            index=models.Index(fields=['training', 'status', 'requested_at'], name='hr_training_waitlist_idx'),
+        ),
+        migrations.RunPython(count_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:10
+
+from django.db import migrations
+
+# Range-overlap indexes for apps.hr.scheduling: the instructor or location
+# equality plus tstzrange(start_date, end_date) && ... in one GiST index
+# (btree_gist provides the equality operators). PostgreSQL only. Rows ending
+# before they start are left out: tstzrange() raises on them (migration
+# 0010 repairs them).
+INDEXES = {
+    'hr_training_instructor_span_idx': 'instructor',
+    'hr_training_location_span_idx': 'location',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON hr_training '
+            f'USING gist ({column}, tstzrange(start_date, end_date)) '
+            f"WHERE status <> 'CANCELLED' AND start_date <= end_date"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0004_training_enrollment'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
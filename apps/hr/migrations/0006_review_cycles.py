@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0005_training_schedule_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewCycle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('evaluation_type', models.CharField(choices=[('ANNUAL', 'Annual Evaluation'), ('PROBATION', 'Probation Period'), ('PROMOTION', 'Promotion Evaluation'), ('DEVELOPMENT', 'Development Evaluation')], default='ANNUAL', max_length=20)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('generated_at', models.DateTimeField(blank=True, null=True)),
+                ('default_evaluator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='default_review_cycles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Review Cycle',
+                'verbose_name_plural': 'Review Cycles',
+                'ordering': ['-period_end'],
+            },
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='cycle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='evaluations', to='hr.reviewcycle'),
+        ),
+        migrations.AddConstraint(
+            model_name='evaluation',
+            constraint=models.UniqueConstraint(fields=('cycle', 'employee'), name='hr_evaluation_cycle_unique'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:15
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def create_row(apps, schema_editor):
+    # Marks kept in per-process caches before this table existed may have
+    # been lost: recompute the whole stored series on the next refresh
+    HeadcountDay = apps.get_model('hr', 'HeadcountDay')
+    HeadcountRefresh = apps.get_model('hr', 'HeadcountRefresh')
+    first = HeadcountDay.objects.aggregate(first=Min('date'))['first']
+    HeadcountRefresh.objects.create(pk=1, dirty_from=first)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0007_document_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadcountRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dirty_from', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Headcount Refresh',
+            },
+        ),
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:17
+
+from django.db import migrations, models
+
+
+def create_rows(apps, schema_editor):
+    AnalyticsDataset = apps.get_model('hr', 'AnalyticsDataset')
+    AnalyticsDataset.objects.bulk_create([
+        AnalyticsDataset(name=name, version=1)
+        for name in ('employees', 'compensation', 'evaluations', 'benefits')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0008_headcount_refresh'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsDataset',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Analytics Dataset',
+            },
+        ),
+        migrations.RunPython(create_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:29
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def repair_dates(apps, schema_editor):
+    # Nothing validated the dates before: swap inverted ones and give
+    # zero-length trainings their duration (at least an hour)
+    Training = apps.get_model('hr', 'Training')
+    rows = Training.objects.filter(end_date__lte=models.F('start_date')).values_list(
+        'pk', 'start_date', 'end_date', 'duration_hours')
+    for pk, start, end, hours in rows:
+        if end < start:
+            start, end = end, start
+        else:
+            end = start + timedelta(hours=max(hours or 0, 1))
+        Training.objects.filter(pk=pk).update(start_date=start, end_date=end)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0009_analytics_dataset'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_dates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='training',
+            constraint=models.CheckConstraint(condition=models.Q(('end_date__gt', models.F('start_date'))), name='hr_training_ends_after_start', violation_error_message='The training must end after it starts.'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:02
+
+from django.db import migrations
+
+
+def renumber_row(apps, schema_editor):
+    # 0008 created the row with an explicit pk, which does not advance the
+    # id sequence; marks are inserted now, so give it a generated id
+    HeadcountRefresh = apps.get_model('hr', 'HeadcountRefresh')
+    for row in HeadcountRefresh.objects.all():
+        row.delete()
+        if row.dirty_from is not None:
+            HeadcountRefresh.objects.create(dirty_from=row.dirty_from)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0010_training_ends_after_start'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_row, migrations.RunPython.noop),
+    ]
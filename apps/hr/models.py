@@ -132,6 +132,9 @@ class Employee(models.Model):
         verbose_name = 'Employee'
         verbose_name_plural = 'Employees'
         ordering = ['user__first_name', 'employee_id']
+        indexes = [
+            models.Index(fields=['active', 'department'], name='hr_emp_active_dept_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.employee_id}"
@@ -211,6 +214,9 @@ class Vacation(models.Model):
         verbose_name = 'Vacation'
         verbose_name_plural = 'Vacations'
         ordering = ['-request_date']
+        indexes = [
+            models.Index(fields=['status', '-request_date'], name='hr_vac_status_req_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.name} - {self.start_date} to {self.end_date}"
@@ -236,6 +242,10 @@ class Attendance(models.Model):
         verbose_name_plural = 'Attendance Records'
         ordering = ['-date', 'employee']
         unique_together = ['employee', 'date']
+        indexes = [
+            # unique_together leads with employee; date-range reports need their own
+            models.Index(fields=['date'], name='hr_att_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.name} - {self.date}"
@@ -315,15 +325,38 @@ class Training(models.Model):
                              default='PLANNED')
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     max_participants = models.IntegerField(default=20)
+    # Participations holding a seat, maintained by apps.hr.enrollment
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name = 'Training'
         verbose_name_plural = 'Training Programs'
         ordering = ['-start_date']
+        constraints = [
+            # apps.hr.scheduling builds ranges from the two dates
+            models.CheckConstraint(condition=models.Q(end_date__gt=models.F('start_date')),
+                                   name='hr_training_ends_after_start',
+                                   violation_error_message='The training must end after it starts.'),
+        ]
     
     def __str__(self):
         return self.name
 
+    def clean(self):
+        # Double bookings (apps.hr.scheduling imports this module)
+        from .scheduling import validate
+        validate(self)
+
+    def save(self, *args, **kwargs):
+        # seats_taken only changes through conditional UPDATEs; saving a
+        # stale instance (e.g. from the admin) must not overwrite it
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'seats_taken'
+            ]
+        super().save(*args, **kwargs)
+
 
 class EmployeeTraining(models.Model):
     """
@@ -335,7 +368,11 @@ class EmployeeTraining(models.Model):
         ('ABSENT', 'Absent'),
         ('PASSED', 'Passed'),
         ('FAILED', 'Failed'),
+        ('WAITLISTED', 'Waitlisted'),
+        ('CANCELLED', 'Cancelled'),
     ]
+    # Statuses that do not hold a seat of the training
+    SEATLESS_STATUSES = ('WAITLISTED', 'CANCELLED')
     
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, 
                                 related_name='employee_trainings')
@@ -347,11 +384,17 @@ class EmployeeTraining(models.Model):
                                blank=True, null=True)
     certificate = models.BooleanField(default=False)
     notes = models.TextField(blank=True, null=True)
+    requested_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         verbose_name = 'Training Participation'
         verbose_name_plural = 'Training Participations'
         unique_together = ['employee', 'training']
+        indexes = [
+            # Waitlist order
+            models.Index(fields=['training', 'status', 'requested_at'],
+                         name='hr_training_waitlist_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.name} - {self.training.name}"
@@ -370,6 +413,9 @@ class Evaluation(models.Model):
     
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, 
                                 related_name='evaluations')
+    cycle = models.ForeignKey('ReviewCycle', on_delete=models.SET_NULL,
+                              null=True, blank=True,
+                              related_name='evaluations')
     evaluation_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     period_start = models.DateField()
     period_end = models.DateField()
@@ -386,11 +432,69 @@ class Evaluation(models.Model):
         verbose_name = 'Evaluation'
         verbose_name_plural = 'Evaluations'
         ordering = ['-evaluation_date']
+        constraints = [
+            # Generating a cycle again skips the employees it already has
+            models.UniqueConstraint(fields=['cycle', 'employee'],
+                                    name='hr_evaluation_cycle_unique'),
+        ]
     
     def __str__(self):
         return f"{self.employee.name} - {self.get_evaluation_type_display()}"
 
 
+class ReviewCycle(models.Model):
+    """
+    Model for review cycles: one evaluation per active employee, generated
+    by apps.hr.review_cycles
+    """
+    name = models.CharField(max_length=100, unique=True)
+    evaluation_type = models.CharField(max_length=20, choices=Evaluation.TYPE_CHOICES,
+                                       default='ANNUAL')
+    period_start = models.DateField()
+    period_end = models.DateField()
+    # Evaluator of employees whose department has no manager (and of the
+    # managers themselves)
+    default_evaluator = models.ForeignKey(User, on_delete=models.SET_NULL,
+                                          null=True, blank=True,
+                                          related_name='default_review_cycles')
+    created_at = models.DateTimeField(auto_now_add=True)
+    generated_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Review Cycle'
+        verbose_name_plural = 'Review Cycles'
+        ordering = ['-period_end']
+
+    def __str__(self):
+        return self.name
+
+
+class DocumentBlob(models.Model):
+    """
+    Content of employee documents, stored once per SHA-256 by
+    apps.hr.documents
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    # Documents pointing here, maintained by apps.hr.documents
+    ref_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Document Blob'
+        verbose_name_plural = 'Document Blobs'
+        indexes = [
+            # Garbage collection of unreferenced blobs
+            models.Index(fields=['last_used_at'], condition=models.Q(ref_count=0),
+                         name='hr_blob_unreferenced_idx'),
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
 class Document(models.Model):
     """
     Model for employee documents
@@ -409,7 +513,12 @@ class Document(models.Model):
                                 related_name='documents')
     document_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     name = models.CharField(max_length=200)
-    file = models.FileField(upload_to='documents/')
+    blob = models.ForeignKey(DocumentBlob, on_delete=models.PROTECT,
+                             null=True, blank=True, related_name='documents')
+    # Name of the uploaded file, served as the download name
+    filename = models.CharField(max_length=255, blank=True)
+    # Before blobs: one stored file per document (import_document_blobs)
+    file = models.FileField(upload_to='documents/', blank=True)
     description = models.TextField(blank=True, null=True)
     upload_date = models.DateTimeField(auto_now_add=True)
     
@@ -420,3 +529,57 @@ class Document(models.Model):
     
     def __str__(self):
         return f"{self.employee.name} - {self.name}"
+
+
+class HeadcountDay(models.Model):
+    """
+    Daily headcount, hires and terminations per department and position,
+    maintained by apps.hr.analytics.headcount
+    """
+    date = models.DateField()
+    department = models.ForeignKey(Department, on_delete=models.CASCADE,
+                                   related_name='+')
+    position = models.ForeignKey(Position, on_delete=models.CASCADE,
+                                 related_name='+')
+    headcount = models.PositiveIntegerField(default=0)
+    hires = models.PositiveIntegerField(default=0)
+    terminations = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Headcount Day'
+        verbose_name_plural = 'Headcount Series'
+        ordering = ['date']
+        unique_together = ['date', 'department', 'position']
+
+    def __str__(self):
+        return f"{self.date} - {self.department_id}/{self.position_id}: {self.headcount}"
+
+
+class AnalyticsDataset(models.Model):
+    """
+    Version of an analytics dataset (apps.hr.analytics.cache): cached
+    results are keyed by it and every committed change increments it
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Analytics Dataset'
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class HeadcountRefresh(models.Model):
+    """
+    Day of the stored headcount series that an employee change invalidated,
+    one row per change until the next refresh collapses them (shared by
+    every process)
+    """
+    dirty_from = models.DateField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Headcount Refresh'
+
+    def __str__(self):
+        return f"Headcount dirty from {self.dirty_from or '-'}"
@@ -0,0 +1,103 @@
+"""
+Bulk generation of the evaluations of a review cycle.
+
+Every active employee hired by the end of the period gets one evaluation
+of the cycle, evaluated by the manager of their department (or by the
+cycle's ``default_evaluator`` when the department has no manager or the
+employee is its manager). One query reads each employee with their
+evaluator and whether they already have an evaluation of the cycle (or
+the same type and period from before cycles existed); the new evaluations
+are inserted with ``bulk_create`` in chunks of ``BATCH_SIZE``, one
+transaction each. A chunk that hits the cycle/employee unique constraint
+(another run got there first) is retried without the evaluations that now
+exist, so the counts are of rows actually inserted. Running it again, or
+after an interruption, only creates the missing ones.
+
+No signal fires for ``bulk_create``; the new evaluations have no grade
+yet, so no analytics dataset changes.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Employee, Evaluation
+
+BATCH_SIZE = 2000
+
+
+def pending(cycle):
+    """
+    ``(employee_id, evaluator_id)`` of the employees ``cycle`` still lacks,
+    plus the number of employees that already have an evaluation and the
+    ids of those without an evaluator
+    """
+    existing = Evaluation.objects.filter(
+        Q(cycle=cycle) | Q(cycle__isnull=True, evaluation_type=cycle.evaluation_type,
+                           period_start=cycle.period_start, period_end=cycle.period_end),
+        employee=OuterRef('pk'),
+    )
+    rows = (
+        Employee.objects.filter(active=True, hire_date__lte=cycle.period_end)
+        .annotate(evaluated=Exists(existing))
+        .values_list('pk', 'user_id', 'department__manager__user_id', 'evaluated')
+        .order_by('pk')
+    )
+    todo, done, unassigned = [], 0, []
+    for employee_id, user_id, manager_id, evaluated in rows:
+        if evaluated:
+            done += 1
+            continue
+        evaluator_id = manager_id if manager_id not in (None, user_id) else cycle.default_evaluator_id
+        if evaluator_id is None:
+            unassigned.append(employee_id)
+        else:
+            todo.append((employee_id, evaluator_id))
+    return todo, done, unassigned
+
+
+def _insert(cycle, chunk):
+    """
+    Create the evaluations of ``chunk`` that ``cycle`` still lacks; returns
+    how many were inserted
+    """
+    while chunk:
+        try:
+            with transaction.atomic():
+                Evaluation.objects.bulk_create([
+                    Evaluation(cycle_id=cycle.pk, employee_id=employee_id, evaluator_id=evaluator_id,
+                               evaluation_type=cycle.evaluation_type,
+                               period_start=cycle.period_start, period_end=cycle.period_end)
+                    for employee_id, evaluator_id in chunk
+                ])
+            return len(chunk)
+        except IntegrityError:
+            existing = set(Evaluation.objects.filter(
+                cycle=cycle, employee_id__in=[employee_id for employee_id, _ in chunk],
+            ).values_list('employee_id', flat=True))
+            if not existing:
+                # Not a concurrent insert: e.g. an employee deleted meanwhile
+                raise
+            chunk = [row for row in chunk if row[0] not in existing]
+    return 0
+
+
+def generate(cycle, batch_size=BATCH_SIZE, progress=None):
+    """
+    Create the missing evaluations of ``cycle``; ``progress(created,
+    processed, total)`` is called after each chunk. Returns ``{'created',
+    'existing', 'unassigned'}``: the two counts and the ids of the employees
+    left without an evaluator.
+    """
+    todo, existing, unassigned = pending(cycle)
+    created = 0
+    for offset in range(0, len(todo), batch_size):
+        chunk = todo[offset:offset + batch_size]
+        inserted = _insert(cycle, chunk)
+        created += inserted
+        existing += len(chunk) - inserted
+        if progress is not None:
+            progress(created, offset + len(chunk), len(todo))
+
+    cycle.generated_at = timezone.now()
+    cycle.save(update_fields=['generated_at'])
+    return {'created': created, 'existing': existing, 'unassigned': unassigned}
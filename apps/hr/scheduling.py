@@ -0,0 +1,258 @@
+"""
+Training schedule conflicts: an instructor teaching, a room hosting or an
+employee attending two overlapping sessions.
+
+A training occupies ``[start_date, end_date)``; cancelled trainings and
+cancelled participations occupy nothing, and locations listed in
+``TRAINING_SHARED_LOCATIONS`` (e.g. ``Online``) never conflict. Waitlisted
+participations count, so a promotion from the waitlist cannot create a
+clash.
+
+* ``validate()`` runs when a training is cleaned (admin forms) and saved
+  (``signals.training_schedule``), only when its schedule changed, and
+  raises ``ValidationError``.
+* ``participant_conflicts()`` is checked by ``enrollment.enroll()``.
+* ``audit()`` (``manage.py audit_training_schedule``) lists every conflict
+  between the trainings of a period from two queries: intervals are
+  sorted by key and start and each one is compared only with the still
+  open intervals of its key, so the cost is O(n log n + conflicts).
+
+On PostgreSQL the overlap test is ``start_date <= end_date AND
+tstzrange(start_date, end_date) && tstzrange(...)``, which the partial GiST
+indexes of migration 0005 answer together with the instructor or location
+equality; other backends compare the bounds. The ``hr_training_ends_after_start``
+constraint keeps new trainings from ending before they start.
+"""
+import heapq
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, DateTimeField, Func, Q, Value
+from django.utils import timezone
+
+from .models import EmployeeTraining, Training
+
+SCHEDULE_FIELDS = ('start_date', 'end_date', 'instructor', 'location', 'status')
+INACTIVE_STATUS = 'CANCELLED'
+# Conflicts of each kind named in a ValidationError; the rest are counted
+MAX_MESSAGES = 3
+
+# Another training overlapping the checked one and sharing ``key`` (the
+# instructor, the location or an employee id)
+Conflict = namedtuple('Conflict', 'kind key training_id name start_date end_date')
+# Two overlapping trainings found by ``audit()`` and the keys they share
+Overlap = namedtuple('Overlap', 'kind first second keys')
+
+
+class Overlaps(Func):
+    """
+    ``[start, end)`` of the first two expressions overlaps ``[start, end)``
+    of the last two
+    """
+    arity = 4
+    output_field = BooleanField()
+
+    def _compile(self, compiler):
+        parts = [compiler.compile(expression) for expression in self.get_source_expressions()]
+        return [sql for sql, _ in parts], [list(params) for _, params in parts]
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (start, end, other_start, other_end), params = self._compile(compiler)
+        return (f'({start} < {other_end} AND {end} > {other_start})',
+                params[0] + params[3] + params[1] + params[2])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # The bounds check matches the predicate of the indexes and keeps
+        # tstzrange() from raising on inverted rows
+        (start, end, other_start, other_end), params = self._compile(compiler)
+        return (f'({start} <= {end} AND '
+                f'tstzrange({start}, {end}) && tstzrange({other_start}, {other_end}))',
+                params[0] + params[1] + params[0] + params[1] + params[2] + params[3])
+
+
+def overlapping(queryset, start, end, prefix=''):
+    """
+    Rows of ``queryset`` whose (non-cancelled) training overlaps
+    ``[start, end)``; ``prefix`` is the lookup path to the training
+    """
+    return queryset.filter(Overlaps(
+        f'{prefix}start_date', f'{prefix}end_date',
+        Value(start, output_field=DateTimeField()), Value(end, output_field=DateTimeField()),
+    )).exclude(**{f'{prefix}status': INACTIVE_STATUS})
+
+
+def _occupies(training):
+    return (training.status != INACTIVE_STATUS and training.start_date is not None
+            and training.end_date is not None and training.start_date < training.end_date)
+
+
+def _room(location):
+    return location and location not in settings.TRAINING_SHARED_LOCATIONS
+
+
+def schedule_conflicts(training):
+    """
+    Trainings overlapping ``training`` with the same instructor or in the
+    same room, in one query
+    """
+    if not _occupies(training):
+        return []
+    shared = Q(instructor=training.instructor)
+    if _room(training.location):
+        shared |= Q(location=training.location)
+    rows = (
+        overlapping(Training.objects.filter(shared), training.start_date, training.end_date)
+        .exclude(pk=training.pk)
+        .values_list('pk', 'name', 'start_date', 'end_date', 'instructor', 'location')
+        .order_by('start_date', 'pk')
+    )
+    conflicts = []
+    for pk, name, start, end, instructor, location in rows:
+        if instructor == training.instructor:
+            conflicts.append(Conflict('instructor', instructor, pk, name, start, end))
+        if _room(training.location) and location == training.location:
+            conflicts.append(Conflict('location', location, pk, name, start, end))
+    return conflicts
+
+
+def participant_conflicts(training, employee_ids=None):
+    """
+    Participations of ``employee_ids`` (default: the participants of
+    ``training``) in other trainings overlapping it, in one query
+    """
+    if not _occupies(training):
+        return []
+    participations = EmployeeTraining.objects.exclude(status=INACTIVE_STATUS)
+    if employee_ids is None:
+        if training.pk is None:
+            return []
+        employees = participations.filter(training_id=training.pk).values('employee_id')
+    else:
+        employees = employee_ids
+    rows = (
+        overlapping(participations.filter(employee_id__in=employees),
+                    training.start_date, training.end_date, prefix='training__')
+        .exclude(training_id=training.pk)
+        .values_list('employee_id', 'training_id', 'training__name',
+                     'training__start_date', 'training__end_date')
+        .order_by('training__start_date', 'training_id', 'employee_id')
+    )
+    return [Conflict('participant', *row) for row in rows]
+
+
+def describe(conflict):
+    """
+    ``"Name" (date start-end)`` of the other training of a conflict
+    """
+    start = timezone.localtime(conflict.start_date)
+    end = timezone.localtime(conflict.end_date)
+    until = f'{end:%H:%M}' if end.date() == start.date() else f'{end:%Y-%m-%d %H:%M}'
+    return f'"{conflict.name}" ({start:%Y-%m-%d %H:%M}-{until})'
+
+
+def _messages(conflicts, message):
+    lines = [message(conflict) for conflict in conflicts[:MAX_MESSAGES]]
+    if len(conflicts) > MAX_MESSAGES:
+        lines.append(f'... and {len(conflicts) - MAX_MESSAGES} more.')
+    return lines
+
+
+def _snapshot(training):
+    return tuple(getattr(training, field) for field in SCHEDULE_FIELDS)
+
+
+def validate(training):
+    """
+    Raise ``ValidationError`` when ``training`` would double-book its
+    instructor, its room or one of its participants. Skipped when the
+    schedule did not change since the last check or since it was saved.
+    """
+    snapshot = _snapshot(training)
+    if getattr(training, '_schedule_checked', None) == snapshot:
+        return
+    if training.pk is not None and Training.objects.filter(pk=training.pk).values_list(
+            *SCHEDULE_FIELDS).first() == snapshot:
+        training._schedule_checked = snapshot
+        return
+
+    # Not keyed by field: forms without the field (list_editable) reject
+    # those. Inverted dates are the hr_training_ends_after_start constraint's
+    errors = []
+    by_kind = defaultdict(list)
+    for conflict in schedule_conflicts(training):
+        by_kind[conflict.kind].append(conflict)
+    errors += _messages(
+        by_kind['instructor'],
+        lambda conflict: f'{conflict.key} already teaches {describe(conflict)} at that time.')
+    errors += _messages(
+        by_kind['location'],
+        lambda conflict: f'{conflict.key} is booked for {describe(conflict)} at that time.')
+
+    others = defaultdict(list)
+    for conflict in participant_conflicts(training):
+        others[conflict.training_id].append(conflict)
+    errors += _messages(
+        list(others.values()),
+        lambda group: f'{len(group)} participant(s) also attend {describe(group[0])}.')
+    if errors:
+        raise ValidationError(errors)
+    training._schedule_checked = snapshot
+
+
+def _sweep(intervals):
+    """
+    ``(key, first, second)`` for each pair of overlapping intervals with
+    the same key, from ``(key, start, end, id)`` tuples
+    """
+    current = object()
+    open_ = []
+    for key, start, end, ident in sorted(intervals):
+        if key != current:
+            current, open_ = key, []
+        # Intervals that ended by this start cannot overlap later ones either
+        while open_ and open_[0][0] <= start:
+            heapq.heappop(open_)
+        for _, other in open_:
+            yield key, min(other, ident), max(other, ident)
+        heapq.heappush(open_, (end, ident))
+
+
+def audit(start, end):
+    """
+    Every conflict between trainings overlapping ``[start, end)``:
+    ``(trainings, overlaps)`` with ``trainings`` as ``{id: (name,
+    start_date, end_date)}`` and ``overlaps`` as ``Overlap`` rows, sorted
+    """
+    rows = list(
+        overlapping(Training.objects.all(), start, end)
+        .values_list('pk', 'name', 'start_date', 'end_date', 'instructor', 'location')
+        .order_by()
+    )
+    trainings = {pk: (name, begin, finish) for pk, name, begin, finish, _, _ in rows}
+    spans = {pk: (begin, finish) for pk, _, begin, finish, _, _ in rows}
+    participations = (
+        overlapping(EmployeeTraining.objects.exclude(status=INACTIVE_STATUS),
+                    start, end, prefix='training__')
+        .values_list('employee_id', 'training_id')
+        .order_by()
+    )
+
+    sources = {
+        'instructor': [(instructor, begin, finish, pk)
+                       for pk, _, begin, finish, instructor, _ in rows if instructor and begin < finish],
+        'location': [(location, begin, finish, pk)
+                     for pk, _, begin, finish, _, location in rows if _room(location) and begin < finish],
+        'participant': [(employee_id, *spans[training_id], training_id)
+                        for employee_id, training_id in participations
+                        if training_id in spans and spans[training_id][0] < spans[training_id][1]],
+    }
+    overlaps = []
+    for kind, intervals in sources.items():
+        shared = defaultdict(list)
+        for key, first, second in _sweep(intervals):
+            shared[first, second].append(key)
+        overlaps.extend(Overlap(kind, first, second, sorted(keys))
+                        for (first, second), keys in shared.items())
+    overlaps.sort(key=lambda row: (trainings[row.first][1], row.first, row.second, row.kind))
+    return trainings, overlaps
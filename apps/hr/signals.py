@@ -0,0 +1,128 @@
+"""
+Invalidation of the stored HR analytics when employee data changes,
+waitlist promotion when a training gains capacity, the schedule check of
+saved trainings, and the reference counts of document blobs
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import documents, enrollment, scheduling
+from .analytics import benefits, cache, calibration, compensation, headcount, tenure
+from .models import (
+    Document, Employee, EmployeeBenefit, Evaluation, Position, ReviewCycle, Training,
+)
+
+TRACKED_FIELDS = tuple(dict.fromkeys(
+    headcount.HISTORY_FIELDS + compensation.FIELDS + benefits.EMPLOYEE_FIELDS))
+_TRACKED_NAMES = {field.removesuffix('_id') for field in TRACKED_FIELDS}
+
+
+@receiver(pre_save, sender=Employee)
+def employee_changed(sender, instance, raw, update_fields=None, **kwargs):
+    # Compared with the stored row here; acted on once written (post_save)
+    instance._headcount_dirty_from, instance._changed_datasets = None, ()
+    if raw:
+        return
+    # e.g. save(update_fields=['on_vacation']): nothing to recompute
+    if update_fields is not None and not _TRACKED_NAMES & {
+            field.removesuffix('_id') for field in update_fields}:
+        return
+    old = None
+    if instance.pk is not None:
+        old = Employee.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+    new = {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+    datasets = []
+    instance._headcount_dirty_from = headcount.affected_since(old, new)
+    if instance._headcount_dirty_from is not None:
+        datasets.append(tenure.DATASET)
+    if old is None or any(old[field] != new[field] for field in compensation.FIELDS):
+        datasets.append(compensation.DATASET)
+    if old is None or any(old[field] != new[field] for field in benefits.EMPLOYEE_FIELDS):
+        datasets.append(benefits.DATASET)
+    # Evaluations are grouped by the employee's current department
+    if old is not None and old['department_id'] != new['department_id']:
+        datasets.append(calibration.DATASET)
+    instance._changed_datasets = tuple(datasets)
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    # Marked once the row is written: a refresh running in between must
+    # not clear the mark before it can see the change. Versions are bumped
+    # on commit, so no result computed before it is cached as current
+    if getattr(instance, '_headcount_dirty_from', None) is not None:
+        headcount.mark_dirty(instance._headcount_dirty_from)
+    if getattr(instance, '_changed_datasets', ()):
+        cache.bump(*instance._changed_datasets)
+    instance._headcount_dirty_from, instance._changed_datasets = None, ()
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, **kwargs):
+    headcount.mark_dirty(instance.hire_date)
+    cache.bump(tenure.DATASET, compensation.DATASET, calibration.DATASET, benefits.DATASET)
+
+
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def position_changed(sender, **kwargs):
+    # Base salary and hierarchy level feed the compa-ratios
+    cache.bump(compensation.DATASET)
+
+
+@receiver(post_save, sender=Evaluation)
+@receiver(post_delete, sender=Evaluation)
+@receiver(post_save, sender=ReviewCycle)
+@receiver(post_delete, sender=ReviewCycle)
+def evaluation_changed(sender, **kwargs):
+    # Cycles name and order the calibration cycles; deleting one detaches
+    # its evaluations without their signals
+    cache.bump(calibration.DATASET)
+
+
+@receiver(post_save, sender=EmployeeBenefit)
+@receiver(post_delete, sender=EmployeeBenefit)
+def employee_benefit_changed(sender, **kwargs):
+    cache.bump(benefits.DATASET)
+
+
+@receiver(pre_save, sender=Training)
+def training_schedule(sender, instance, raw, **kwargs):
+    # Forms already ran this in clean(); it is skipped when nothing changed
+    if not raw:
+        scheduling.validate(instance)
+
+
+@receiver(post_save, sender=Training)
+def training_saved(sender, instance, created, raw, **kwargs):
+    # More seats, or enrollment reopened: hand free seats to the waitlist
+    if not created and not raw and instance.seats_taken < instance.max_participants:
+        enrollment.promote_waitlist(instance.pk)
+
+
+@receiver(pre_save, sender=Document)
+def document_previous_blob(sender, instance, raw, **kwargs):
+    instance._previous_blob = None
+    if not raw and not instance._state.adding:
+        instance._previous_blob = (
+            Document.objects.filter(pk=instance.pk).values_list('blob_id', flat=True).first())
+
+
+@receiver(post_save, sender=Document)
+def document_saved(sender, instance, raw, **kwargs):
+    previous = getattr(instance, '_previous_blob', None)
+    if raw or instance.blob_id == previous:
+        return
+    if instance.blob_id is not None:
+        documents.add_reference(instance.blob_id)
+    if previous is not None:
+        documents.release(previous)
+
+
+@receiver(post_delete, sender=Document)
+def document_deleted(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        documents.release(instance.blob_id)
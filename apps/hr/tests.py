@@ -0,0 +1,799 @@
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.monitoring import benchmark
+from apps.monitoring.testing import QueryBudgetMixin
+
+from . import documents, enrollment, review_cycles, scheduling
+from .analytics import benefits, calibration, compensation, headcount, tenure
+from .models import (
+    Benefit, Department, Document, DocumentBlob, Employee, EmployeeBenefit, EmployeeTraining,
+    Evaluation, Position, ReviewCycle, Training,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='hr-tests-')
+
+
+def _user(username, **fields):
+    return get_user_model().objects.create_user(username, f'{username}@example.com', **fields)
+
+
+def _employee(number, department, position, **fields):
+    user = _user(f'employee{number}', first_name='Employee', last_name=str(number))
+    values = {
+        'cpf': f'{number:011d}',
+        'birth_date': date(1990, 1, 1),
+        'gender': 'F',
+        'employee_id': f'E{number:05d}',
+        'hire_date': date(2020, 1, 1),
+        'current_salary': position.base_salary,
+    }
+    values.update(fields)
+    return Employee.objects.create(user=user, department=department, position=position, **values)
+
+
+def _fresh_analytics():
+    # Dataset versions only move on commit, which TestCase never reaches:
+    # drop what earlier tests cached under the same versions
+    django_cache.clear()
+    compensation._frame = calibration._frame = (None, None)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Every HR page stays within its declared query budget on a small
+    synthetic dataset
+    """
+    ANALYTICS_ROUTES = ('hr:benefits_management', 'hr:headcount_series', 'hr:tenure_analytics',
+                        'hr:compensation_analytics', 'hr:calibration_analytics')
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_hr_data', employees=60, departments=4, years=1, seed=7,
+                     stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(benchmark.benchmark_user())
+
+    def test_routes_within_budget(self):
+        self.assertRoutesWithinBudget(self.client, 'hr:')
+
+    def test_analytics_within_budget_on_a_cold_cache(self):
+        for route in benchmark.ROUTES:
+            if route.name in self.ANALYTICS_ROUTES:
+                with self.subTest(route=route.label):
+                    _fresh_analytics()
+                    self.assertQueryBudget(self.client, route.url(), route.params, warm=False)
+
+    def test_routes_declare_budget(self):
+        self.assertEqual([name for name in benchmark.uncovered_routes() if name.startswith('hr:')], [])
+
+
+def _at(day, hour):
+    return timezone.make_aware(datetime(2030, 3, day, hour))
+
+
+def _training(name, start, end, instructor='Ana', location='Room 1', status='PLANNED'):
+    return Training(name=name, description='', instructor=instructor, start_date=start,
+                    end_date=end, duration_hours=int((end - start).total_seconds() // 3600),
+                    location=location, status=status)
+
+
+class SweepTests(SimpleTestCase):
+    """
+    The interval sweep behind ``audit()``
+    """
+
+    def sweep(self, *intervals):
+        return sorted(scheduling._sweep(intervals))
+
+    def test_touching_intervals_do_not_overlap(self):
+        self.assertEqual(self.sweep(('a', 0, 2, 1), ('a', 2, 4, 2)), [])
+
+    def test_nested_intervals_overlap(self):
+        self.assertEqual(self.sweep(('a', 0, 10, 1), ('a', 2, 3, 2), ('a', 4, 5, 3)),
+                         [('a', 1, 2), ('a', 1, 3)])
+
+    def test_keys_are_independent(self):
+        self.assertEqual(self.sweep(('a', 0, 4, 1), ('b', 1, 3, 2)), [])
+
+
+class ScheduleTests(TestCase):
+    """
+    Overlap queries, the conflicts raised on save and the audit command
+    """
+
+    def test_overlapping_lookup(self):
+        Training.objects.bulk_create([
+            _training('Touching', _at(1, 12), _at(1, 14)),
+            _training('Nested', _at(1, 9), _at(1, 10)),
+            _training('Cancelled', _at(1, 8), _at(1, 12), status='CANCELLED'),
+        ])
+        found = scheduling.overlapping(Training.objects.all(), _at(1, 8), _at(1, 12))
+        self.assertEqual(list(found.values_list('name', flat=True)), ['Nested'])
+
+    def test_same_instructor_conflicts(self):
+        _training('Python', _at(2, 9), _at(2, 12), location='Room 1').save()
+        conflicts = scheduling.schedule_conflicts(
+            _training('Django', _at(2, 11), _at(2, 13), location='Room 2'))
+        self.assertEqual([(c.kind, c.key) for c in conflicts], [('instructor', 'Ana')])
+        with self.assertRaisesMessage(ValidationError, 'Ana already teaches "Python"'):
+            _training('Django', _at(2, 11), _at(2, 13), location='Room 2').save()
+
+    def test_same_room_conflicts(self):
+        _training('Python', _at(3, 9), _at(3, 12), instructor='Ana').save()
+        conflicts = scheduling.schedule_conflicts(
+            _training('SQL', _at(3, 10), _at(3, 11), instructor='Bruno'))
+        self.assertEqual([(c.kind, c.key) for c in conflicts], [('location', 'Room 1')])
+        with self.assertRaisesMessage(ValidationError, 'Room 1 is booked for "Python"'):
+            _training('SQL', _at(3, 10), _at(3, 11), instructor='Bruno').save()
+
+    def test_shared_locations_and_cancelled_trainings_never_conflict(self):
+        _training('Webinar', _at(4, 9), _at(4, 12), instructor='Ana', location='Online').save()
+        _training('Old', _at(4, 9), _at(4, 12), instructor='Bruno', status='CANCELLED').save()
+        _training('Live', _at(4, 10), _at(4, 11), instructor='Bruno', location='Online').save()
+        _training('Other', _at(4, 10), _at(4, 11), instructor='Carla', location='Room 1').save()
+        self.assertEqual(Training.objects.count(), 4)
+
+    def test_audit(self):
+        python, django, sql, _ = Training.objects.bulk_create([
+            _training('Python', _at(5, 9), _at(5, 12), instructor='Ana', location='Room 1'),
+            _training('Django', _at(5, 11), _at(5, 13), instructor='Ana', location='Room 2'),
+            _training('SQL', _at(5, 10), _at(5, 11), instructor='Bruno', location='Room 1'),
+            _training('Later', _at(5, 12), _at(5, 14), instructor='Bruno', location='Room 1'),
+        ])
+        _, overlaps = scheduling.audit(_at(1, 0), _at(1, 0) + timedelta(days=30))
+        self.assertEqual(
+            {(o.kind, o.first, o.second, tuple(o.keys)) for o in overlaps},
+            {('instructor', python.pk, django.pk, ('Ana',)),
+             ('location', python.pk, sql.pk, ('Room 1',))},
+        )
+
+        out = StringIO()
+        call_command('audit_training_schedule', year=2030, stdout=out)
+        self.assertIn('2030: 4 trainings, 2 conflicts', out.getvalue())
+        with self.assertRaisesMessage(CommandError, '2 schedule conflicts in 2030'):
+            call_command('audit_training_schedule', year=2030, fail=True, stdout=StringIO())
+
+
+class EnrollmentTests(TestCase):
+    """
+    Seat counter, waitlist and the admin paths that bypass them
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        position = Position.objects.create(name='Developer', department=department)
+        cls.employees = [_employee(number, department, position) for number in range(1, 5)]
+
+    def setUp(self):
+        self.training = _training('Python', _at(10, 9), _at(10, 12))
+        self.training.max_participants = 1
+        self.training.save()
+
+    def enroll(self, employee, **kwargs):
+        return enrollment.enroll(self.training, employee.pk, **kwargs)
+
+    def seats(self):
+        return Training.objects.values_list('seats_taken', flat=True).get(pk=self.training.pk)
+
+    def statuses(self):
+        return dict(EmployeeTraining.objects.filter(training=self.training)
+                    .values_list('employee_id', 'status'))
+
+    def test_claim_refuses_over_capacity(self):
+        self.assertTrue(enrollment._claim_seat(self.training.pk))
+        self.assertFalse(enrollment._claim_seat(self.training.pk))
+        self.assertEqual(self.seats(), 1)
+
+    def test_full_training_waitlists(self):
+        first, second = self.enroll(self.employees[0]), self.enroll(self.employees[1])
+        self.assertEqual((first.status, second.status), ('ENROLLED', 'WAITLISTED'))
+        self.assertEqual(enrollment.waitlist_position(second), 1)
+        with self.assertRaisesMessage(enrollment.EnrollmentError, 'This training is full.'):
+            self.enroll(self.employees[2], waitlist=False)
+        # The refused participation rolled back with its transaction
+        self.assertNotIn(self.employees[2].pk, self.statuses())
+        self.assertEqual(self.seats(), 1)
+
+    def test_cancellation_promotes_the_oldest_once(self):
+        enrolled = self.enroll(self.employees[0])
+        for employee in self.employees[1:]:
+            self.enroll(employee)
+        # Requested in reverse order of the rows
+        for offset, employee in enumerate(reversed(self.employees[1:])):
+            EmployeeTraining.objects.filter(employee=employee).update(
+                requested_at=_at(1, 9) + timedelta(minutes=offset))
+
+        enrollment.cancel(enrolled)
+        self.assertEqual(self.statuses(), {
+            self.employees[0].pk: 'CANCELLED',
+            self.employees[1].pk: 'WAITLISTED',
+            self.employees[2].pk: 'WAITLISTED',
+            self.employees[3].pk: 'ENROLLED',
+        })
+        self.assertEqual(enrollment.promote_waitlist(self.training.pk), [])
+        self.assertEqual(self.seats(), 1)
+
+        # Cancelling from the waitlist releases no seat
+        enrollment.cancel(EmployeeTraining.objects.get(employee=self.employees[1]))
+        self.assertEqual(self.statuses()[self.employees[2].pk], 'WAITLISTED')
+        with self.assertRaisesMessage(enrollment.EnrollmentError, 'Only enrolled or waitlisted'):
+            enrollment.cancel(enrolled)
+
+    def test_stale_training_save_keeps_the_counter(self):
+        stale = Training.objects.get(pk=self.training.pk)
+        self.enroll(self.employees[0])
+        stale.max_participants = 2
+        stale.save()
+        self.assertEqual(self.seats(), 1)
+
+    def test_admin_edits(self):
+        self.enroll(self.employees[0])
+        self.enroll(self.employees[1])
+        self.client.force_login(_user('admin', is_staff=True, is_superuser=True))
+
+        # Raising the capacity in the admin hands the seat to the waitlist
+        response = self.client.post(reverse('admin:hr_training_change', args=[self.training.pk]), {
+            'name': 'Python', 'description': 'Basics', 'instructor': 'Ana',
+            'start_date_0': '2030-03-10', 'start_date_1': '09:00:00',
+            'end_date_0': '2030-03-10', 'end_date_1': '12:00:00',
+            'duration_hours': 3, 'location': 'Room 1', 'status': 'PLANNED',
+            'cost': '0', 'max_participants': 2,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.seats(), 2)
+        self.assertEqual(set(self.statuses().values()), {'ENROLLED'})
+
+        # Deleting a participation there frees its seat
+        participation = EmployeeTraining.objects.get(employee=self.employees[0])
+        self.client.post(reverse('admin:hr_employeetraining_delete', args=[participation.pk]),
+                         {'post': 'yes'})
+        self.assertEqual(self.seats(), 1)
+
+
+class ByteRangeTests(SimpleTestCase):
+    """
+    Parsing of the ``Range`` header against a 10-byte file
+    """
+
+    def test_ranges(self):
+        for header, expected in [
+            (None, None),
+            ('bytes=0-4', (0, 4)),
+            ('bytes=8-100', (8, 9)),
+            # Open-ended and suffix ranges
+            ('bytes=5-', (5, 9)),
+            ('bytes=-3', (7, 9)),
+            ('bytes=-20', (0, 9)),
+            # Several ranges: the whole file
+            ('bytes=0-1,3-4', None),
+            ('items=0-4', None),
+            # Unsatisfiable
+            ('bytes=10-', False),
+            ('bytes=5-2', False),
+            ('bytes=-0', False),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(documents._byte_range(header, 10), expected)
+
+
+@override_settings(DOCUMENT_SENDFILE='', DOCUMENT_BLOB_GRACE_SECONDS=60)
+class DocumentTests(TestCase):
+    """
+    Content-addressed blobs: deduplication, reference counts, garbage
+    collection and downloads
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        position = Position.objects.create(name='Developer', department=department)
+        cls.employee = _employee(1, department, position)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='hr-documents-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def store(self, content, name='contract.pdf'):
+        return documents.store(ContentFile(content, name=name))
+
+    def document(self, blob, name='Contract'):
+        return Document.objects.create(employee=self.employee, document_type='CONTRACT',
+                                       name=name, blob=blob, filename='contract.pdf')
+
+    def ref_counts(self, *blobs):
+        return [DocumentBlob.objects.get(pk=blob.pk).ref_count for blob in blobs]
+
+    def later(self, seconds):
+        return mock.patch.object(timezone, 'now',
+                                 return_value=timezone.now() + timedelta(seconds=seconds))
+
+    def test_same_content_is_stored_once(self):
+        first = self.store(b'0123456789')
+        second = self.store(b'0123456789', name='copy.pdf')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(DocumentBlob.objects.count(), 1)
+        self.assertEqual((first.size, first.content_type), (10, 'application/pdf'))
+        path = default_storage.path(documents.blob_name(first.sha256))
+        with open(path, 'rb') as handle:
+            self.assertEqual(handle.read(), b'0123456789')
+        self.assertNotEqual(self.store(b'other').pk, first.pk)
+
+    def test_references_follow_the_documents(self):
+        template, signed = self.store(b'template'), self.store(b'signed')
+        first, second = self.document(template), self.document(template)
+        self.assertEqual(self.ref_counts(template, signed), [2, 0])
+
+        second.blob = signed
+        second.save()
+        self.assertEqual(self.ref_counts(template, signed), [1, 1])
+        # Saving without replacing the content changes nothing
+        second.name = 'Signed contract'
+        second.save()
+        self.assertEqual(self.ref_counts(template, signed), [1, 1])
+
+        first.delete()
+        second.delete()
+        self.assertEqual(self.ref_counts(template, signed), [0, 0])
+
+    def test_garbage_collection_spares_referenced_blobs(self):
+        kept, drifted, unused = self.store(b'kept'), self.store(b'drifted'), self.store(b'unused')
+        self.document(kept)
+        self.document(drifted)
+        # A counter gone wrong: the document still protects its blob
+        DocumentBlob.objects.filter(pk=drifted.pk).update(ref_count=0)
+        orphan = default_storage.path(documents.blob_name('f' * 64))
+        os.makedirs(os.path.dirname(orphan))
+        with open(orphan, 'wb') as handle:
+            handle.write(b'no row')
+
+        # Within the grace period nothing goes
+        self.assertEqual(documents.collect_garbage(), (0, 0))
+        with self.later(61):
+            self.assertEqual(documents.collect_garbage(), (1, 2))
+        self.assertEqual(set(DocumentBlob.objects.values_list('pk', flat=True)), {kept.pk, drifted.pk})
+        for blob, exists in [(kept, True), (drifted, True), (unused, False)]:
+            with self.subTest(blob=blob.sha256):
+                self.assertEqual(default_storage.exists(documents.blob_name(blob.sha256)), exists)
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_download_ranges(self):
+        document = self.document(self.store(b'0123456789'))
+        self.client.force_login(_user('manager', is_staff=True))
+        url = reverse('hr:download_document', args=[document.pk])
+
+        response = self.client.get(url, headers={'Range': 'bytes=-3'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(url, headers={'Range': 'bytes=10-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+        response = self.client.get(url, headers={'Range': 'bytes=2-', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+
+class HeadcountSweepTests(SimpleTestCase):
+    """
+    The daily series of a small hand-checked dataset
+    """
+
+    def test_sweep(self):
+        events = (
+            np.array([1, 1, 2, 3]),
+            np.array([10, 10, 20, 30]),
+            np.array(['2030-01-02', '2029-12-01', '2030-01-03', '2030-01-03'], dtype='datetime64[D]'),
+            # The last one leaves before joining: a data error, left out
+            np.array(['2030-01-04', 'NaT', 'NaT', '2030-01-02'], dtype='datetime64[D]'),
+        )
+        series = headcount.sweep(date(2030, 1, 1), date(2030, 1, 5), events)
+        self.assertEqual(series['groups'].tolist(), [[1, 10], [2, 20]])
+        self.assertEqual(series['hires'].tolist(), [[0, 1, 0, 0, 0], [0, 0, 1, 0, 0]])
+        self.assertEqual(series['terminations'].tolist(), [[0, 0, 0, 1, 0], [0, 0, 0, 0, 0]])
+        # Counted at the end of the day: the leaver is gone on the 4th
+        self.assertEqual(series['headcount'].tolist(), [[1, 2, 2, 1, 1], [0, 0, 1, 1, 1]])
+
+
+class TenureTests(SimpleTestCase):
+    """
+    Retention, turnover and tenure of a small hand-checked dataset, on
+    2030-06-15
+    """
+    TODAY = date(2030, 6, 15)
+
+    def setUp(self):
+        self.departments = np.array([1, 1, 1, 1, 2, 2])
+        self.hired = np.array(['2030-06-05', '2030-05-16', '2029-06-15', '2030-07-01',
+                               '2030-03-17', '2030-05-02'], dtype='datetime64[D]')
+        self.terminated = np.array(['NaT', 'NaT', '2030-01-01', 'NaT', 'NaT', '2030-06-10'],
+                                   dtype='datetime64[D]')
+
+    def test_retention(self):
+        self.assertEqual(tenure.retention(self.hired, self.terminated, self.TODAY, months=3, cohorts=3), {
+            'cohorts': ['2030-04', '2030-05', '2030-06'],
+            'sizes': [0, 2, 1],
+            # May's cohort lost one of two in its second month
+            'curves': [[None] * 4, [1.0, 0.5, None, None], [1.0, None, None, None]],
+        })
+
+    def test_turnover(self):
+        self.assertEqual(
+            tenure.turnover(self.departments, self.hired, self.terminated, date(2030, 1, 1), self.TODAY),
+            [{'id': 1, 'terminations': 1, 'average_headcount': 1.5, 'rate': 0.6667},
+             {'id': 2, 'terminations': 1, 'average_headcount': 0.5, 'rate': 2.0}],
+        )
+
+    def test_tenure_percentiles(self):
+        # Active today: 10 and 30 days in department 1, 90 in department 2
+        self.assertEqual(tenure.tenure_percentiles(self.departments, self.hired, self.terminated, self.TODAY), {
+            'overall': {'p10': 14.0, 'p25': 20.0, 'p50': 30.0, 'p75': 60.0, 'p90': 78.0},
+            'departments': [
+                {'id': 1, 'p10': 12.0, 'p25': 15.0, 'p50': 20.0, 'p75': 25.0, 'p90': 28.0},
+                {'id': 2, 'p10': 90.0, 'p25': 90.0, 'p50': 90.0, 'p75': 90.0, 'p90': 90.0},
+            ],
+        })
+
+
+class HeadcountDirtyTests(TestCase):
+    """
+    Employee changes mark the stored headcount series dirty by inserting
+    rows; the refresh collapses them
+    """
+
+    def test_marks_collapse_to_the_earliest_day(self):
+        headcount.mark_dirty(date(2029, 5, 1))
+        headcount.mark_dirty(date(2029, 3, 1))
+        headcount.mark_dirty(date(2029, 4, 1))
+        self.assertEqual(headcount.take_dirty(), date(2029, 3, 1))
+        self.assertEqual(headcount.take_dirty(), None)
+
+    def test_employee_changes_mark(self):
+        department = Department.objects.create(name='Engineering')
+        position = Position.objects.create(name='Developer', department=department)
+        employee = _employee(1, department, position, hire_date=date(2029, 6, 1))
+        self.assertEqual(headcount.take_dirty(), date(2029, 6, 1))
+
+        employee.phone = '555-0100'
+        employee.save()
+        self.assertEqual(headcount.take_dirty(), None)
+        employee.termination_date = date(2029, 9, 30)
+        employee.save()
+        self.assertEqual(headcount.take_dirty(), date(2029, 9, 30))
+
+    def test_failed_refresh_keeps_the_mark(self):
+        headcount.mark_dirty(date(2029, 3, 1))
+        with mock.patch.object(headcount, 'sweep', side_effect=RuntimeError('boom')), \
+                self.assertRaisesMessage(RuntimeError, 'boom'):
+            headcount.refresh_headcount(date(2029, 12, 31))
+        self.assertEqual(headcount.take_dirty(), date(2029, 3, 1))
+
+
+@override_settings(HEADCOUNT_HISTORY_DAYS=10)
+class HeadcountSeriesTests(TestCase):
+    """
+    The stored series, refreshed and read back by week
+    """
+
+    def test_weekly_series(self):
+        engineering = Department.objects.create(name='Engineering')
+        sales = Department.objects.create(name='Sales')
+        developer = Position.objects.create(name='Developer', department=engineering)
+        seller = Position.objects.create(name='Seller', department=sales)
+        _employee(1, engineering, developer, hire_date=date(2030, 1, 2),
+                  termination_date=date(2030, 1, 4))
+        _employee(2, engineering, developer, hire_date=date(2029, 12, 1))
+        _employee(3, sales, seller, hire_date=date(2030, 1, 8))
+
+        headcount.refresh_headcount(date(2030, 1, 10))
+        # 2030-01-01 is a Tuesday: weeks of 6 and 4 days
+        self.assertEqual(headcount.stored_series(date(2030, 1, 1), date(2030, 1, 10), frequency='week'), {
+            'dates': ['2030-01-01', '2030-01-07'],
+            'series': {
+                engineering.pk: {'headcount': [1, 1], 'hires': [1, 0], 'terminations': [1, 0]},
+                sales.pk: {'headcount': [0, 1], 'hires': [0, 1], 'terminations': [0, 0]},
+            },
+        })
+        self.assertEqual(
+            headcount.stored_series(date(2030, 1, 1), date(2030, 1, 5))['series'][engineering.pk],
+            {'headcount': [1, 2, 2, 1, 1], 'hires': [0, 1, 0, 0, 0], 'terminations': [0, 0, 0, 1, 0]},
+        )
+
+
+@override_settings(COMPENSATION_BAND=(0.8, 1.2))
+class CompensationTests(TestCase):
+    """
+    Percentiles, compa-ratios, band outliers and pay gap of a small
+    hand-checked dataset
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        cls.position = Position.objects.create(name='Developer', department=department,
+                                               base_salary=Decimal(5000))
+        for number, (gender, salary) in enumerate([('F', 4000), ('F', 5000), ('M', 6000), ('M', 8000)], 1):
+            _employee(number, department, cls.position, gender=gender, current_salary=Decimal(salary))
+        _employee(5, department, cls.position, gender='M', current_salary=Decimal(20000), active=False)
+
+    def setUp(self):
+        _fresh_analytics()
+
+    def test_summary(self):
+        result = compensation.analyze()
+        self.assertEqual(result['summary'], {
+            'key': 0,
+            'count': 4,
+            'salary': {'p10': 4300.0, 'p25': 4750.0, 'p50': 5500.0, 'p75': 6500.0, 'p90': 7400.0},
+            'compa_ratio_mean': 1.15,
+            'compa_ratio_median': 1.1,
+        })
+        self.assertEqual([group['key'] for group in result['groups']], [self.position.pk])
+
+    def test_outliers(self):
+        result = compensation.analyze()
+        # 0.8 is on the band; 1.6 is outside
+        self.assertEqual(result['outlier_count'], 1)
+        self.assertEqual((result['outliers'][0]['salary'], result['outliers'][0]['compa_ratio']),
+                         (8000.0, 1.6))
+        self.assertEqual(compensation.analyze(filters={'active': False})['outlier_count'], 2)
+
+    def test_pay_gap(self):
+        self.assertEqual(compensation.analyze()['pay_gap'], {
+            'key': 0,
+            'median_salary_men': 7000.0,
+            'median_salary_women': 4500.0,
+            # (7000 - 4500) / 7000, and (1.4 - 0.9) / 1.4 for the compa-ratios
+            'salary_gap': 0.3571,
+            'compa_ratio_gap': 0.3571,
+        })
+
+
+class CalibrationCycleTests(TestCase):
+    """
+    Calibration groups evaluations by review cycle, and by year before
+    cycles existed
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        position = Position.objects.create(name='Developer', department=department)
+        employees = [_employee(number, department, position) for number in range(1, 3)]
+        evaluator = _user('evaluator')
+        cls.mid_year = ReviewCycle.objects.create(name='2029 H1', period_start=date(2029, 1, 1),
+                                                  period_end=date(2029, 6, 30))
+        cls.annual = ReviewCycle.objects.create(name='2029', period_start=date(2029, 1, 1),
+                                                period_end=date(2029, 12, 31))
+
+        def evaluation(employee, grade, cycle=None, period_end=None):
+            period_end = cycle.period_end if cycle else period_end
+            return Evaluation(employee=employee, cycle=cycle, evaluation_type='ANNUAL',
+                              period_start=period_end.replace(month=1, day=1),
+                              period_end=period_end, evaluator=evaluator,
+                              overall_grade=Decimal(grade))
+
+        Evaluation.objects.bulk_create([
+            evaluation(employees[0], 6, cls.mid_year),
+            evaluation(employees[1], 8, cls.mid_year),
+            evaluation(employees[0], 9, cls.annual),
+            evaluation(employees[1], 9, cls.annual),
+            evaluation(employees[0], 5, period_end=date(2028, 12, 31)),
+        ])
+
+    def setUp(self):
+        _fresh_analytics()
+
+    def test_cycles_in_the_same_year_stay_apart(self):
+        self.assertEqual([cycle['id'] for cycle in calibration.cycles()],
+                         [self.annual.pk, self.mid_year.pk, -2028])
+        self.assertEqual(calibration.calibrate(self.mid_year.pk)['company'],
+                         {'count': 2, 'mean': 7.0, 'std': 1.0})
+        self.assertEqual(calibration.calibrate()['company'],
+                         {'count': 2, 'mean': 9.0, 'std': 0.0})
+        self.assertEqual(calibration.calibrate(-2028)['company']['count'], 1)
+
+    def test_trend_by_cycle(self):
+        self.assertEqual(calibration.calibrate()['trends']['type']['ANNUAL'], {
+            -2028: {'mean': 5.0, 'count': 1},
+            self.mid_year.pk: {'mean': 7.0, 'count': 2},
+            self.annual.pk: {'mean': 9.0, 'count': 2},
+        })
+
+
+class BenefitCostTests(TestCase):
+    """
+    Monthly benefit cost and projection of a small hand-checked dataset,
+    from March 2030 over two more months
+    """
+    TODAY = date(2030, 3, 15)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.engineering = Department.objects.create(name='Engineering')
+        cls.sales = Department.objects.create(name='Sales')
+        developer = Position.objects.create(name='Developer', department=cls.engineering)
+        seller = Position.objects.create(name='Seller', department=cls.sales)
+        cls.health = Benefit.objects.create(name='Health', benefit_type='HEALTH_PLAN', value=Decimal(300))
+        gym = Benefit.objects.create(name='Gym', benefit_type='OTHER', value=Decimal(80))
+
+        def enroll(employee, value, start, end=None, benefit=cls.health, active=True):
+            EmployeeBenefit.objects.create(employee=employee, benefit=benefit, value=Decimal(value),
+                                           start_date=start, end_date=end, active=active)
+
+        enroll(_employee(1, cls.engineering, developer), 300, date(2030, 1, 1))
+        enroll(_employee(2, cls.engineering, developer), 200, date(2030, 2, 1), date(2030, 4, 20))
+        enroll(_employee(3, cls.sales, seller), 100, date(2030, 4, 1))
+        # Covered until the end of the month the employee leaves in
+        leaver = _employee(4, cls.sales, seller, termination_date=date(2030, 3, 31), active=False)
+        enroll(leaver, 50, date(2030, 1, 1))
+        # Inactive without an end date: not counted
+        enroll(leaver, 80, date(2030, 1, 1), benefit=gym, active=False)
+
+    def setUp(self):
+        _fresh_analytics()
+
+    def test_totals(self):
+        result = benefits.summary(horizon=2, today=self.TODAY)
+        self.assertEqual(result['months'], ['2030-03', '2030-04', '2030-05'])
+        self.assertEqual((result['current'], result['projected'], result['projected_total']),
+                         (550.0, [550.0, 600.0, 400.0], 1000.0))
+        self.assertEqual(result['benefits'], [{
+            'id': self.health.pk, 'current': 550.0, 'enrollments': 3,
+            'projected': [550.0, 600.0, 400.0], 'projected_total': 1000.0,
+        }])
+
+    def test_departments(self):
+        result = benefits.summary(horizon=2, today=self.TODAY)
+        self.assertEqual(result['departments'], [
+            {'id': self.engineering.pk, 'current': 500.0, 'headcount': 2, 'per_employee': 250.0,
+             'projected': [500.0, 500.0, 300.0], 'projected_total': 800.0},
+            {'id': self.sales.pk, 'current': 50.0, 'headcount': 1, 'per_employee': 50.0,
+             'projected': [50.0, 100.0, 100.0], 'projected_total': 200.0},
+        ])
+
+
+@override_settings(CALIBRATION_MIN_EVALUATIONS=2, CALIBRATION_Z_THRESHOLD=1.5)
+class CalibrationScoreTests(TestCase):
+    """
+    Distribution and evaluator z-scores of a small hand-checked cycle
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        position = Position.objects.create(name='Developer', department=department)
+        cls.cycle = ReviewCycle.objects.create(name='2029', period_start=date(2029, 1, 1),
+                                               period_end=date(2029, 12, 31))
+        cls.lenient, cls.severe, cls.fair = _user('lenient'), _user('severe'), _user('fair')
+        grades = [(cls.lenient, 9), (cls.lenient, 9), (cls.severe, 5), (cls.severe, 5),
+                  (cls.fair, 7), (cls.fair, 7)]
+        Evaluation.objects.bulk_create([
+            Evaluation(employee=_employee(number, department, position), cycle=cls.cycle,
+                       evaluation_type='ANNUAL', period_start=cls.cycle.period_start,
+                       period_end=cls.cycle.period_end, evaluator=evaluator,
+                       overall_grade=Decimal(grade))
+            for number, (evaluator, grade) in enumerate(grades, 1)
+        ])
+
+    def setUp(self):
+        _fresh_analytics()
+
+    def test_distribution(self):
+        result = calibration.calibrate(self.cycle.pk)
+        # std of 5, 5, 7, 7, 9, 9: sqrt(16 / 6)
+        self.assertEqual(result['company'], {'count': 6, 'mean': 7.0, 'std': 1.633})
+        self.assertEqual(result['distribution']['percentiles'],
+                         {'p10': 5.0, 'p25': 5.5, 'p50': 7.0, 'p75': 8.5, 'p90': 9.0})
+        self.assertEqual(result['distribution']['histogram'], [0, 0, 0, 0, 0, 2, 0, 2, 0, 2])
+
+    def test_evaluator_z_scores(self):
+        # (9 - 7) / (sqrt(16 / 6) / sqrt(2)) = sqrt(3)
+        self.assertEqual(
+            [(row['evaluator'], row['mean'], row['z'], row['flag'])
+             for row in calibration.calibrate(self.cycle.pk)['evaluators']],
+            [(self.lenient.pk, 9.0, 1.73, 'lenient'),
+             (self.severe.pk, 5.0, -1.73, 'severe'),
+             (self.fair.pk, 7.0, 0.0, None)],
+        )
+        with self.settings(CALIBRATION_MIN_EVALUATIONS=3):
+            _fresh_analytics()
+            self.assertEqual({row['flag'] for row in calibration.calibrate(self.cycle.pk)['evaluators']},
+                             {None})
+
+
+class ReviewCycleTests(TestCase):
+    """
+    Generating a cycle creates each missing evaluation once and counts only
+    what it inserted
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        position = Position.objects.create(name='Developer', department=department)
+        cls.employees = [_employee(number, department, position) for number in range(1, 6)]
+        department.manager = cls.employees[0]
+        department.save()
+        cls.cycle = ReviewCycle.objects.create(
+            name='2029 Annual Review', period_start=date(2029, 1, 1), period_end=date(2029, 12, 31),
+            default_evaluator=_user('director'))
+
+    def test_command_is_idempotent(self):
+        out = StringIO()
+        call_command('generate_review_cycle', cycle=self.cycle.pk, batch_size=2, stdout=out)
+        self.assertIn('5 created, 0 already existed', out.getvalue())
+        self.assertIn('5/5 employees, 5 evaluations created', out.getvalue())
+
+        out = StringIO()
+        call_command('generate_review_cycle', cycle=self.cycle.pk, stdout=out)
+        self.assertIn('0 created, 5 already existed', out.getvalue())
+        self.assertEqual(Evaluation.objects.filter(cycle=self.cycle).count(), 5)
+        self.assertEqual(
+            Evaluation.objects.get(cycle=self.cycle, employee=self.employees[0]).evaluator,
+            self.cycle.default_evaluator)
+
+    def test_concurrent_inserts_are_not_counted(self):
+        pending = review_cycles.pending(self.cycle)
+        # Another run inserts one of them after this one read what is missing
+        employee_id, evaluator_id = pending[0][1]
+        Evaluation.objects.create(cycle=self.cycle, employee_id=employee_id, evaluator_id=evaluator_id,
+                                  evaluation_type='ANNUAL', period_start=self.cycle.period_start,
+                                  period_end=self.cycle.period_end)
+        progress = []
+        with mock.patch.object(review_cycles, 'pending', return_value=pending):
+            result = review_cycles.generate(self.cycle, batch_size=2,
+                                            progress=lambda *counts: progress.append(counts))
+        self.assertEqual((result['created'], result['existing']), (4, 1))
+        self.assertEqual(progress, [(1, 2, 5), (3, 4, 5), (4, 5, 5)])
+        self.assertEqual(Evaluation.objects.filter(cycle=self.cycle).count(), 5)
+
+
+class StaffOnlyTests(TestCase):
+    """
+    Salaries, pay gaps and evaluator leniency are for staff only
+    """
+    ROUTES = ('hr:compensation_analytics', 'hr:compensation_data', 'hr:calibration_analytics')
+
+    def test_non_staff_is_refused(self):
+        self.client.force_login(_user('employee'))
+        for route in self.ROUTES:
+            with self.subTest(route=route):
+                self.assertEqual(self.client.get(reverse(route)).status_code, 403)
+
+    def test_staff_is_served(self):
+        _fresh_analytics()
+        self.client.force_login(_user('manager', is_staff=True))
+        for route in self.ROUTES:
+            with self.subTest(route=route):
+                self.assertEqual(self.client.get(reverse(route)).status_code, 200)
@@ -10,6 +10,8 @@ urlpatterns = [
     # Employees
     path('employees/', views.employees_list, name='employees_list'),
     path('employees/<int:employee_id>/', views.employee_detail, name='employee_detail'),
+    path('employees/<int:employee_id>/documents/', views.upload_document, name='upload_document'),
+    path('documents/<int:document_id>/', views.download_document, name='download_document'),
     
     # Departments
     path('departments/', views.departments_list, name='departments_list'),
@@ -25,6 +27,8 @@ urlpatterns = [
     # Training
     path('training/', views.training_management, name='training_management'),
     path('training/<int:training_id>/', views.training_detail, name='training_detail'),
+    path('training/<int:training_id>/enroll/', views.enroll_training, name='enroll_training'),
+    path('training/<int:training_id>/cancel/', views.cancel_training_enrollment, name='cancel_training_enrollment'),
     
     # Performance
     path('performance/', views.performance_evaluations, name='performance_evaluations'),
@@ -34,4 +38,9 @@ urlpatterns = [
     
     # Reports
     path('reports/', views.reports_analytics, name='reports_analytics'),
+    path('reports/headcount/', views.headcount_series, name='headcount_series'),
+    path('reports/tenure/', views.tenure_analytics, name='tenure_analytics'),
+    path('reports/compensation/', views.compensation_analytics, name='compensation_analytics'),
+    path('reports/compensation/data/', views.compensation_data, name='compensation_data'),
+    path('reports/calibration/', views.calibration_analytics, name='calibration_analytics'),
 ]
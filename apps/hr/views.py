@@ -1,7 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Avg
@@ -9,6 +12,14 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 import json
 
+from asgiref.sync import sync_to_async
+
+from apps.monitoring.budgets import query_budget
+from core.concurrency import gather_queries
+from core.replica import read_replica
+
+from . import documents, enrollment
+from .analytics import benefits, calibration, compensation, headcount, tenure
 from .models import (
     Department, Position, Employee, Dependent, Vacation, Attendance,
     Benefit, EmployeeBenefit, Training, EmployeeTraining,
@@ -17,52 +28,68 @@ from .models import (
 
 
 @login_required
-def hr_dashboard(request):
+@read_replica
+@query_budget(10)
+async def hr_dashboard(request):
     """
     HR Dashboard with key metrics and overview
     """
-    # Get basic statistics
-    total_employees = Employee.objects.filter(active=True).count()
-    total_departments = Department.objects.filter(active=True).count()
-    employees_on_vacation = Employee.objects.filter(on_vacation=True).count()
-    pending_vacation_requests = Vacation.objects.filter(status='REQUESTED').count()
-    
-    # Recent activities
-    recent_employees = Employee.objects.filter(active=True).order_by('-created_at')[:5]
-    recent_vacations = Vacation.objects.filter(status='APPROVED').order_by('-approval_date')[:5]
-    upcoming_trainings = Training.objects.filter(
-        start_date__gte=timezone.now(),
-        status='PLANNED'
-    ).order_by('start_date')[:5]
-    
-    # Department distribution
-    department_stats = Department.objects.filter(active=True).annotate(
-        employee_count=Count('employees')
-    ).order_by('-employee_count')
+    # Independent queries run concurrently, each on its own connection
+    results = await gather_queries(
+        # Basic statistics
+        total_employees=lambda: Employee.objects.filter(active=True).count(),
+        total_departments=lambda: Department.objects.filter(active=True).count(),
+        employees_on_vacation=lambda: Employee.objects.filter(on_vacation=True).count(),
+        pending_vacation_requests=lambda: Vacation.objects.filter(status='REQUESTED').count(),
+        # Recent activities
+        recent_employees=lambda: list(
+            Employee.objects.filter(active=True).select_related(
+                'user', 'position', 'department'
+            ).order_by('-created_at')[:5]
+        ),
+        recent_vacations=lambda: list(
+            Vacation.objects.filter(status='APPROVED').select_related(
+                'employee__user'
+            ).order_by('-approval_date')[:5]
+        ),
+        upcoming_trainings=lambda: list(
+            Training.objects.filter(
+                start_date__gte=timezone.now(),
+                status='PLANNED'
+            ).order_by('start_date')[:5]
+        ),
+        # Department distribution
+        department_stats=lambda: list(
+            Department.objects.filter(active=True).annotate(
+                employee_count=Count('employees')
+            ).order_by('-employee_count')
+        ),
+    )
     
     context = {
-        'user': request.user,
+        'user': await request.auser(),
         'page_title': 'HR Dashboard - ByteNest',
         'stats': {
-            'total_employees': total_employees,
-            'total_departments': total_departments,
-            'employees_on_vacation': employees_on_vacation,
-            'pending_vacation_requests': pending_vacation_requests,
+            'total_employees': results['total_employees'],
+            'total_departments': results['total_departments'],
+            'employees_on_vacation': results['employees_on_vacation'],
+            'pending_vacation_requests': results['pending_vacation_requests'],
         },
-        'recent_employees': recent_employees,
-        'recent_vacations': recent_vacations,
-        'upcoming_trainings': upcoming_trainings,
-        'department_stats': department_stats,
+        'recent_employees': results['recent_employees'],
+        'recent_vacations': results['recent_vacations'],
+        'upcoming_trainings': results['upcoming_trainings'],
+        'department_stats': results['department_stats'],
     }
-    return render(request, 'hr/dashboard.html', context)
+    return await sync_to_async(render)(request, 'hr/dashboard.html', context)
 
 
 @login_required
+@query_budget(5)
 def employees_list(request):
     """
     List all employees with filtering and search
     """
-    employees = Funcionario.objects.filter(ativo=True).select_related('user', 'cargo', 'departamento')
+    employees = Employee.objects.filter(active=True).select_related('user', 'position', 'department')
     
     # Search functionality
     search_query = request.GET.get('search', '')
@@ -71,23 +98,23 @@ def employees_list(request):
             Q(user__first_name__icontains=search_query) |
             Q(user__last_name__icontains=search_query) |
             Q(user__email__icontains=search_query) |
-            Q(matricula__icontains=search_query) |
+            Q(employee_id__icontains=search_query) |
             Q(cpf__icontains=search_query)
         )
     
     # Filter by department
     department_filter = request.GET.get('department', '')
     if department_filter:
-        employees = employees.filter(departamento_id=department_filter)
+        employees = employees.filter(department_id=department_filter)
     
     # Filter by status
     status_filter = request.GET.get('status', '')
     if status_filter == 'vacation':
-        employees = employees.filter(em_ferias=True)
+        employees = employees.filter(on_vacation=True)
     elif status_filter == 'license':
-        employees = employees.filter(em_licenca=True)
+        employees = employees.filter(on_leave=True)
     elif status_filter == 'active':
-        employees = employees.filter(em_ferias=False, em_licenca=False)
+        employees = employees.filter(on_vacation=False, on_leave=False)
     
     # Pagination
     paginator = Paginator(employees, 20)
@@ -95,7 +122,7 @@ def employees_list(request):
     page_obj = paginator.get_page(page_number)
     
     # Get departments for filter dropdown
-    departments = Departamento.objects.filter(ativo=True).order_by('nome')
+    departments = Department.objects.filter(active=True).order_by('name')
     
     context = {
         'user': request.user,
@@ -110,24 +137,27 @@ def employees_list(request):
 
 
 @login_required
+@query_budget(10)
 def employee_detail(request, employee_id):
     """
     Employee detail view with all related information
     """
-    employee = get_object_or_404(Funcionario, id=employee_id)
+    employee = get_object_or_404(
+        Employee.objects.select_related('user', 'position', 'department'), id=employee_id
+    )
     
     # Get related data
-    dependents = employee.dependentes.filter(ativo=True)
-    vacations = employee.ferias.all().order_by('-data_solicitacao')[:10]
-    recent_points = employee.pontos.all().order_by('-data')[:10]
-    benefits = employee.beneficios_funcionario.filter(ativo=True)
-    trainings = employee.treinamentos_funcionario.all().order_by('-treinamento__data_inicio')[:10]
-    evaluations = employee.avaliacoes.all().order_by('-data_avaliacao')[:5]
-    documents = employee.documentos.all().order_by('-data_upload')[:10]
+    dependents = employee.dependents.filter(active=True)
+    vacations = employee.vacations.all().order_by('-request_date')[:10]
+    recent_points = employee.attendance_records.all().order_by('-date')[:10]
+    benefits = employee.employee_benefits.filter(active=True).select_related('benefit')
+    trainings = employee.employee_trainings.all().select_related('training').order_by('-training__start_date')[:10]
+    evaluations = employee.evaluations.all().order_by('-evaluation_date')[:5]
+    employee_documents = employee.documents.all().order_by('-upload_date')[:10]
     
     context = {
         'user': request.user,
-        'page_title': f'{employee.nome} - Employee Details',
+        'page_title': f'{employee.name} - Employee Details',
         'employee': employee,
         'dependents': dependents,
         'vacations': vacations,
@@ -135,20 +165,82 @@ def employee_detail(request, employee_id):
         'benefits': benefits,
         'trainings': trainings,
         'evaluations': evaluations,
-        'documents': documents,
+        'documents': employee_documents,
+        'document_types': Document.TYPE_CHOICES,
     }
     return render(request, 'hr/employee_detail.html', context)
 
 
+@csrf_exempt
 @login_required
+@require_http_methods(["POST"])
+@query_budget(8)
+def upload_document(request, employee_id):
+    """
+    Add a document to an employee (staff only); the file is streamed to
+    disk as it uploads and stored once per content
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    # Before anything reads the body: the CSRF check (below) reads POST
+    request.upload_handlers.insert(0, documents.HashingUploadHandler(request))
+    return _upload_document(request, employee_id)
+
+
+@csrf_protect
+def _upload_document(request, employee_id):
+    employee = get_object_or_404(Employee, id=employee_id)
+    upload = request.FILES.get('file')
+    document_type = request.POST.get('document_type')
+    if upload is None or document_type not in dict(Document.TYPE_CHOICES):
+        return JsonResponse({
+            'success': False,
+            'message': 'Choose a file and a document type.'
+        }, status=400)
+
+    document = Document.objects.create(
+        employee=employee,
+        document_type=document_type,
+        name=(request.POST.get('name') or upload.name)[:200],
+        description=request.POST.get('description') or None,
+        blob=documents.store(upload),
+        filename=upload.name[:255],
+    )
+    return JsonResponse({
+        'success': True,
+        'id': document.pk,
+        'message': 'Document uploaded successfully!'
+    })
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+@query_budget(4)
+def download_document(request, document_id):
+    """
+    Document content, for staff and the employee it belongs to; supports
+    Range requests or hands the file to the proxy (DOCUMENT_SENDFILE)
+    """
+    document = get_object_or_404(
+        Document.objects.select_related('blob', 'employee'), id=document_id)
+    if not request.user.is_staff and document.employee.user_id != request.user.id:
+        raise PermissionDenied
+    return documents.serve(request, document)
+
+
+@login_required
+@query_budget(5)
 def departments_list(request):
     """
     List all departments with employee counts
     """
-    departments = Departamento.objects.filter(ativo=True).annotate(
-        employee_count=Count('funcionarios'),
-        active_employees=Count('funcionarios', filter=Q(funcionarios__ativo=True))
-    ).order_by('nome')
+    departments = Department.objects.filter(active=True).annotate(
+        employee_count=Count('employees'),
+        active_employees=Count('employees', filter=Q(employees__active=True))
+    ).order_by('name')
+    costs = {row['id']: row for row in benefits.summary()['departments']}
+    for department in departments:
+        department.benefits_cost = costs.get(department.id)
     
     context = {
         'user': request.user,
@@ -159,22 +251,23 @@ def departments_list(request):
 
 
 @login_required
+@query_budget(10)
 def department_detail(request, department_id):
     """
     Department detail view with employees and statistics
     """
-    department = get_object_or_404(Departamento, id=department_id)
-    employees = department.funcionarios.filter(ativo=True).select_related('user', 'cargo')
-    positions = department.cargos.filter(ativo=True)
+    department = get_object_or_404(Department, id=department_id)
+    employees = department.employees.filter(active=True).select_related('user', 'position')
+    positions = department.positions.filter(active=True)
     
     # Department statistics
     total_employees = employees.count()
-    employees_on_vacation = employees.filter(em_ferias=True).count()
-    employees_on_license = employees.filter(em_licenca=True).count()
+    employees_on_vacation = employees.filter(on_vacation=True).count()
+    employees_on_license = employees.filter(on_leave=True).count()
     
     context = {
         'user': request.user,
-        'page_title': f'{department.nome} - Department Details',
+        'page_title': f'{department.name} - Department Details',
         'department': department,
         'employees': employees,
         'positions': positions,
@@ -182,17 +275,19 @@ def department_detail(request, department_id):
             'total_employees': total_employees,
             'employees_on_vacation': employees_on_vacation,
             'employees_on_license': employees_on_license,
-        }
+        },
+        'benefits_cost': benefits.department_summary(department.id),
     }
     return render(request, 'hr/department_detail.html', context)
 
 
 @login_required
+@query_budget(4)
 def vacation_requests(request):
     """
     Vacation requests management
     """
-    vacation_requests = Ferias.objects.all().select_related('funcionario__user').order_by('-data_solicitacao')
+    vacation_requests = Vacation.objects.all().select_related('employee__user').order_by('-request_date')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -209,17 +304,19 @@ def vacation_requests(request):
         'page_title': 'Vacation Requests - ByteNest',
         'page_obj': page_obj,
         'status_filter': status_filter,
+        'status_choices': Vacation.STATUS_CHOICES,
     }
     return render(request, 'hr/vacation_requests.html', context)
 
 
 @login_required
 @require_http_methods(["POST"])
+@query_budget(6)
 def approve_vacation(request, vacation_id):
     """
     Approve vacation request
     """
-    vacation = get_object_or_404(Ferias, id=vacation_id)
+    vacation = get_object_or_404(Vacation, id=vacation_id)
     
     if request.method == 'POST':
         try:
@@ -227,11 +324,11 @@ def approve_vacation(request, vacation_id):
             action = data.get('action')
             
             if action == 'approve':
-                vacation.status = 'APROVADO'
-                vacation.aprovado_por = request.user
-                vacation.data_aprovacao = timezone.now()
-                vacation.funcionario.em_ferias = True
-                vacation.funcionario.save()
+                vacation.status = 'APPROVED'
+                vacation.approved_by = request.user
+                vacation.approval_date = timezone.now()
+                vacation.employee.on_vacation = True
+                vacation.employee.save(update_fields=['on_vacation'])
                 vacation.save()
                 
                 return JsonResponse({
@@ -239,9 +336,9 @@ def approve_vacation(request, vacation_id):
                     'message': 'Vacation request approved successfully!'
                 })
             elif action == 'reject':
-                vacation.status = 'REJEITADO'
-                vacation.aprovado_por = request.user
-                vacation.data_aprovacao = timezone.now()
+                vacation.status = 'REJECTED'
+                vacation.approved_by = request.user
+                vacation.approval_date = timezone.now()
                 vacation.save()
                 
                 return JsonResponse({
@@ -262,28 +359,29 @@ def approve_vacation(request, vacation_id):
 
 
 @login_required
+@query_budget(6)
 def attendance_tracking(request):
     """
     Attendance tracking and point management
     """
     # Get current month's attendance
-    current_month = timezone.now().replace(day=1)
+    current_month = timezone.localdate().replace(day=1)
     next_month = (current_month + timedelta(days=32)).replace(day=1)
     
-    attendance_records = Ponto.objects.filter(
-        data__gte=current_month,
-        data__lt=next_month
-    ).select_related('funcionario__user', 'funcionario__departamento').order_by('-data')
+    attendance_records = Attendance.objects.filter(
+        date__gte=current_month,
+        date__lt=next_month
+    ).select_related('employee__user', 'employee__department').order_by('-date')
     
     # Filter by employee
     employee_filter = request.GET.get('employee', '')
     if employee_filter:
-        attendance_records = attendance_records.filter(funcionario_id=employee_filter)
+        attendance_records = attendance_records.filter(employee_id=employee_filter)
     
     # Filter by department
     department_filter = request.GET.get('department', '')
     if department_filter:
-        attendance_records = attendance_records.filter(funcionario__departamento_id=department_filter)
+        attendance_records = attendance_records.filter(employee__department_id=department_filter)
     
     # Pagination
     paginator = Paginator(attendance_records, 50)
@@ -291,8 +389,8 @@ def attendance_tracking(request):
     page_obj = paginator.get_page(page_number)
     
     # Get filter options
-    employees = Funcionario.objects.filter(ativo=True).order_by('user__first_name')
-    departments = Departamento.objects.filter(ativo=True).order_by('nome')
+    employees = Employee.objects.filter(active=True).select_related('user').order_by('user__first_name')
+    departments = Department.objects.filter(active=True).order_by('name')
     
     context = {
         'user': request.user,
@@ -307,11 +405,12 @@ def attendance_tracking(request):
 
 
 @login_required
+@query_budget(4)
 def training_management(request):
     """
     Training management and tracking
     """
-    trainings = Treinamento.objects.all().order_by('-data_inicio')
+    trainings = Training.objects.all().order_by('-start_date')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -328,40 +427,134 @@ def training_management(request):
         'page_title': 'Training Management - ByteNest',
         'page_obj': page_obj,
         'status_filter': status_filter,
+        'status_choices': Training.STATUS_CHOICES,
     }
     return render(request, 'hr/training_management.html', context)
 
 
 @login_required
+@query_budget(4)
 def training_detail(request, training_id):
     """
     Training detail with participants
     """
-    training = get_object_or_404(Treinamento, id=training_id)
-    participants = training.participantes_treinamento.all().select_related('funcionario__user')
+    training = get_object_or_404(Training, id=training_id)
+    participants = list(
+        training.training_participants.exclude(status='CANCELLED')
+        .select_related('employee__user').order_by('requested_at', 'pk')
+    )
+    own = next((row for row in participants if row.employee.user_id == request.user.id), None)
     
     context = {
         'user': request.user,
-        'page_title': f'{training.nome} - Training Details',
+        'page_title': f'{training.name} - Training Details',
         'training': training,
-        'participants': participants,
+        'participants': [row for row in participants if row.status != 'WAITLISTED'],
+        'waitlist': [row for row in participants if row.status == 'WAITLISTED'],
+        'own_participation': own,
+        'enrollment_open': training.status in enrollment.OPEN_STATUSES,
     }
     return render(request, 'hr/training_detail.html', context)
 
 
+def _enrollment_employee(request):
+    """
+    Employee id an enrollment request acts on: ``employee_id`` from the
+    JSON body for staff, otherwise the requesting user's own employee.
+    Raises ``ValueError`` on a malformed body or one that is not an object.
+    """
+    data = json.loads(request.body or '{}')
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    if data.get('employee_id') is not None and request.user.is_staff:
+        return int(data['employee_id'])
+    return Employee.objects.filter(user=request.user).values_list('pk', flat=True).first()
+
+
 @login_required
+@require_http_methods(["POST"])
+@query_budget(15)
+def enroll_training(request, training_id):
+    """
+    Enroll an employee in a training, or add them to its waitlist when it
+    is full
+    """
+    training = get_object_or_404(Training, id=training_id)
+    try:
+        employee_id = _enrollment_employee(request)
+    except (ValueError, TypeError):
+        return JsonResponse({
+            'success': False,
+            'message': 'Error processing request.'
+        }, status=400)
+    if employee_id is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'No employee record for this user.'
+        }, status=400)
+
+    try:
+        participation = enrollment.enroll(training, employee_id)
+    except enrollment.EnrollmentError as error:
+        return JsonResponse({'success': False, 'message': str(error)}, status=409)
+
+    if participation.status == 'WAITLISTED':
+        position = enrollment.waitlist_position(participation)
+        return JsonResponse({
+            'success': True,
+            'status': participation.status,
+            'waitlist_position': position,
+            'message': f'Training is full: added to the waitlist (position {position}).'
+        })
+    return JsonResponse({
+        'success': True,
+        'status': participation.status,
+        'message': 'Enrolled successfully!'
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+@query_budget(16)
+def cancel_training_enrollment(request, training_id):
+    """
+    Cancel an enrollment or waitlist entry; a released seat goes to the
+    waitlist
+    """
+    try:
+        employee_id = _enrollment_employee(request)
+    except (ValueError, TypeError):
+        return JsonResponse({
+            'success': False,
+            'message': 'Error processing request.'
+        }, status=400)
+    participation = get_object_or_404(EmployeeTraining, training_id=training_id, employee_id=employee_id)
+
+    try:
+        enrollment.cancel(participation)
+    except enrollment.EnrollmentError as error:
+        return JsonResponse({'success': False, 'message': str(error)}, status=409)
+    return JsonResponse({
+        'success': True,
+        'status': participation.status,
+        'message': 'Enrollment cancelled.'
+    })
+
+
+@login_required
+@query_budget(4)
 def performance_evaluations(request):
     """
     Performance evaluations management
     """
-    evaluations = Avaliacao.objects.all().select_related(
-        'funcionario__user', 'avaliador'
-    ).order_by('-data_avaliacao')
+    evaluations = Evaluation.objects.all().select_related(
+        'employee__user', 'evaluator'
+    ).order_by('-evaluation_date')
     
     # Filter by type
     type_filter = request.GET.get('type', '')
     if type_filter:
-        evaluations = evaluations.filter(tipo=type_filter)
+        evaluations = evaluations.filter(evaluation_type=type_filter)
     
     # Pagination
     paginator = Paginator(evaluations, 20)
@@ -373,66 +566,296 @@ def performance_evaluations(request):
         'page_title': 'Performance Evaluations - ByteNest',
         'page_obj': page_obj,
         'type_filter': type_filter,
+        'type_choices': Evaluation.TYPE_CHOICES,
     }
     return render(request, 'hr/performance_evaluations.html', context)
 
 
 @login_required
+@query_budget(7)
 def benefits_management(request):
     """
     Benefits management
     """
-    benefits = Beneficio.objects.filter(ativo=True).order_by('nome')
+    costs = benefits.summary()
+    by_benefit = {row['id']: row for row in costs['benefits']}
+    active_benefits = list(Benefit.objects.filter(active=True).order_by('name'))
+    for benefit in active_benefits:
+        benefit.cost = by_benefit.get(benefit.id)
+    department_names = dict(Department.objects.values_list('pk', 'name'))
+    for row in costs['departments']:
+        row['label'] = department_names.get(row['id'], str(row['id']))
     
     context = {
         'user': request.user,
         'page_title': 'Benefits Management - ByteNest',
-        'benefits': benefits,
+        'benefits': active_benefits,
+        'costs': costs,
     }
     return render(request, 'hr/benefits_management.html', context)
 
 
 @login_required
-def reports_analytics(request):
+@read_replica
+@query_budget(7)
+async def reports_analytics(request):
     """
     HR Reports and Analytics
     """
-    # Employee statistics
-    total_employees = Funcionario.objects.filter(ativo=True).count()
-    employees_by_department = Departamento.objects.filter(ativo=True).annotate(
-        employee_count=Count('funcionarios', filter=Q(funcionarios__ativo=True))
-    ).order_by('-employee_count')
-    
-    # Attendance statistics
-    current_month = timezone.now().replace(day=1)
-    monthly_attendance = Ponto.objects.filter(
-        data__gte=current_month
-    ).aggregate(
-        total_hours=Avg('horas_trabalhadas'),
-        total_overtime=Avg('horas_extras')
-    )
-    
-    # Training statistics
-    training_stats = Treinamento.objects.aggregate(
-        total_trainings=Count('id'),
-        completed_trainings=Count('id', filter=Q(status='CONCLUIDO'))
-    )
-    
-    # Performance statistics
-    performance_stats = Avaliacao.objects.aggregate(
-        average_rating=Avg('nota_geral'),
-        total_evaluations=Count('id')
+    current_month = timezone.localdate().replace(day=1)
+    results = await gather_queries(
+        # Employee statistics
+        total_employees=lambda: Employee.objects.filter(active=True).count(),
+        employees_by_department=lambda: list(
+            Department.objects.filter(active=True).annotate(
+                employee_count=Count('employees', filter=Q(employees__active=True))
+            ).order_by('-employee_count')
+        ),
+        # Attendance statistics
+        monthly_attendance=lambda: Attendance.objects.filter(
+            date__gte=current_month
+        ).aggregate(
+            total_hours=Avg('hours_worked'),
+            total_overtime=Avg('overtime_hours')
+        ),
+        # Training statistics
+        training_stats=lambda: Training.objects.aggregate(
+            total_trainings=Count('id'),
+            completed_trainings=Count('id', filter=Q(status='COMPLETED'))
+        ),
+        # Performance statistics
+        performance_stats=lambda: Evaluation.objects.aggregate(
+            average_rating=Avg('overall_grade'),
+            total_evaluations=Count('id')
+        ),
     )
     
     context = {
-        'user': request.user,
+        'user': await request.auser(),
         'page_title': 'HR Reports & Analytics - ByteNest',
         'stats': {
-            'total_employees': total_employees,
-            'monthly_attendance': monthly_attendance,
-            'training_stats': training_stats,
-            'performance_stats': performance_stats,
+            'total_employees': results['total_employees'],
+            'monthly_attendance': results['monthly_attendance'],
+            'training_stats': results['training_stats'],
+            'performance_stats': results['performance_stats'],
         },
-        'employees_by_department': employees_by_department,
+        'employees_by_department': results['employees_by_department'],
     }
-    return render(request, 'hr/reports_analytics.html', context)
+    return await sync_to_async(render)(request, 'hr/reports_analytics.html', context)
+
+
+@login_required
+@read_replica
+@query_budget(4)
+def headcount_series(request):
+    """
+    Headcount, hires and terminations over time (JSON for the report charts)
+    """
+    today = timezone.localdate()
+    group = request.GET.get('group', 'department')
+    frequency = request.GET.get('frequency', 'month')
+    try:
+        end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date() if 'end' in request.GET else today
+        start = (datetime.strptime(request.GET['start'], '%Y-%m-%d').date()
+                 if 'start' in request.GET else end - timedelta(days=365))
+        department = int(request.GET['department']) if request.GET.get('department') else None
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid date or department.'
+        }, status=400)
+    if group not in headcount.GROUPS or frequency not in headcount.FREQUENCIES or start > end:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid group, frequency or date range.'
+        }, status=400)
+
+    data = headcount.stored_series(start, end, group=group, department=department, frequency=frequency)
+    model = Department if group == 'department' else Position
+    labels = dict(model.objects.filter(pk__in=data['series']).values_list('pk', 'name'))
+    return JsonResponse({
+        'success': True,
+        'group': group,
+        'frequency': frequency,
+        'dates': data['dates'],
+        'series': [
+            {'id': key, 'label': labels.get(key, str(key)), **values}
+            for key, values in data['series'].items()
+        ],
+    })
+
+
+@login_required
+@read_replica
+@query_budget(5)
+def tenure_analytics(request):
+    """
+    Cohort retention, turnover by department and tenure percentiles (JSON)
+    """
+    try:
+        months = min(int(request.GET.get('months', 24)), 120)
+        cohorts = min(int(request.GET.get('cohorts', 24)), 120)
+        period_days = min(int(request.GET.get('period_days', 365)), 3660)
+    except ValueError:
+        months = cohorts = period_days = 0
+    if months < 1 or cohorts < 1 or period_days < 1:
+        return JsonResponse({
+            'success': False,
+            'message': 'months, cohorts and period_days must be positive integers.'
+        }, status=400)
+
+    data = tenure.summary(months=months, cohorts=cohorts, period_days=period_days)
+    names = dict(Department.objects.values_list('pk', 'name'))
+    for row in data['turnover'] + data['tenure']['departments']:
+        row['label'] = names.get(row['id'], str(row['id']))
+    return JsonResponse({'success': True, **data})
+
+
+def _compensation_params(request):
+    """
+    Filters and grouping from the query string; ``ValueError`` if invalid
+    """
+    filters = {}
+    for dimension in ('department', 'position', 'level'):
+        values = request.GET.getlist(dimension)
+        if any(values):
+            filters[dimension] = [int(value) for value in values if value]
+    genders = [value for value in request.GET.getlist('gender') if value]
+    if genders:
+        filters['gender'] = genders
+    filters['active'] = request.GET.get('status', 'active') != 'all'
+    group_by = request.GET.get('group_by', 'position')
+    if group_by not in compensation.DIMENSIONS:
+        raise ValueError(group_by)
+    return filters, group_by
+
+
+def _compensation_labels(data, group_by, departments):
+    """
+    Add display names to the groups and employees of ``data`` in place
+    """
+    position_ids = {row['position'] for row in data['outliers'] + data['employees']}
+    if group_by == 'position':
+        position_ids |= {row['key'] for row in data['groups']}
+    positions = dict(Position.objects.filter(pk__in=position_ids).values_list('pk', 'name'))
+    genders = dict(Employee.GENDER_CHOICES)
+    names = {
+        'department': departments,
+        'position': positions,
+        'level': {row['key']: f"Level {row['key']}" for row in data['groups']},
+        'gender': {index: genders[code] for index, code in enumerate(compensation.GENDERS)},
+    }[group_by]
+    for row in data['groups'] + data['pay_gap_by_group']:
+        row['label'] = names.get(row['key'], str(row['key']))
+    for row in data['outliers'] + data['employees']:
+        row['department_name'] = departments.get(row['department'], '')
+        row['position_name'] = positions.get(row['position'], '')
+    return data
+
+
+@login_required
+@read_replica
+@query_budget(5)
+def compensation_data(request):
+    """
+    Compa-ratios, salary percentiles, band outliers and pay gaps (JSON,
+    staff only)
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    try:
+        filters, group_by = _compensation_params(request)
+        employee_limit = min(int(request.GET.get('employees', 0)), 5000)
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid filter or group_by.'
+        }, status=400)
+
+    data = compensation.analyze(filters, group_by=group_by, employee_limit=employee_limit)
+    departments = dict(Department.objects.values_list('pk', 'name'))
+    return JsonResponse({'success': True, 'group_by': group_by,
+                         **_compensation_labels(data, group_by, departments)})
+
+
+@login_required
+@read_replica
+@query_budget(6)
+def compensation_analytics(request):
+    """
+    Compensation analytics page (staff only)
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    try:
+        filters, group_by = _compensation_params(request)
+    except ValueError:
+        filters, group_by = {'active': True}, 'position'
+
+    data = compensation.analyze(filters, group_by=group_by)
+    departments = dict(Department.objects.values_list('pk', 'name'))
+    context = {
+        'user': request.user,
+        'page_title': 'Compensation Analytics - ByteNest',
+        'data': _compensation_labels(data, group_by, departments),
+        'filters': filters,
+        'group_by': group_by,
+        'departments': sorted(departments.items(), key=lambda item: item[1]),
+        'levels': range(1, 11),
+        'genders': Employee.GENDER_CHOICES,
+        'dimensions': compensation.DIMENSIONS,
+    }
+    return render(request, 'hr/compensation_analytics.html', context)
+
+
+@login_required
+@read_replica
+@query_budget(7)
+def calibration_analytics(request):
+    """
+    Evaluation grade distribution, percentiles, evaluator leniency and
+    trends for one review cycle (JSON, staff only); ``cycle`` is a
+    ReviewCycle id, or ``-year`` for evaluations from before review cycles
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    try:
+        cycle = request.GET.get('cycle')
+        cycle = int(cycle) if cycle else None
+        filters = {
+            name: sorted({int(value) for value in request.GET.getlist(name) if value})
+            for name in ('department', 'evaluator')
+        }
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid cycle, department or evaluator.'
+        }, status=400)
+    types = sorted({value for value in request.GET.getlist('type') if value})
+    if any(code not in calibration.TYPES for code in types):
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid evaluation type.'
+        }, status=400)
+    filters['type'] = types
+    filters = {name: values for name, values in filters.items() if values}
+
+    data = calibration.calibrate(cycle, filters)
+    departments = dict(Department.objects.values_list('pk', 'name'))
+    evaluator_ids = [row['evaluator'] for row in data.get('evaluators', [])]
+    evaluators = {
+        pk: f'{first} {last}'.strip() or username
+        for pk, first, last, username in get_user_model().objects.filter(pk__in=evaluator_ids)
+        .values_list('pk', 'first_name', 'last_name', 'username')
+    }
+    for row in data.get('departments', []):
+        row['label'] = departments.get(row['id'], str(row['id']))
+    for row in data.get('evaluators', []):
+        row['label'] = evaluators.get(row['evaluator'], str(row['evaluator']))
+    return JsonResponse({
+        'success': True,
+        'filters': filters,
+        'type_labels': dict(Evaluation.TYPE_CHOICES),
+        'department_labels': departments,
+        **data,
+    })
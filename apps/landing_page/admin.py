@@ -1,3 +1,35 @@
 from django.contrib import admin
+from django.utils import timezone
+from .models import ContactMessage, OutboxMessage
 
-# Register your models here.
+
+class OutboxMessageInline(admin.TabularInline):
+    model = OutboxMessage
+    extra = 0
+    fields = ('channel', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error')
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(ContactMessage)
+class ContactMessageAdmin(admin.ModelAdmin):
+    list_display = ('name', 'email', 'company', 'service', 'created_at')
+    list_filter = ('service', 'created_at')
+    search_fields = ('name', 'email', 'company', 'message')
+    date_hierarchy = 'created_at'
+    inlines = [OutboxMessageInline]
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('channel', 'contact_message', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('channel', 'status')
+    list_select_related = ('contact_message',)
+    readonly_fields = ('dedup_key', 'payload', 'created_at', 'sent_at')
+    actions = ['retry_now']
+
+    @admin.action(description='Reenviar agora')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboxMessage.STATUS_SENT).update(
+            status=OutboxMessage.STATUS_PENDING, next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} mensagem(ns) reenfileirada(s).')
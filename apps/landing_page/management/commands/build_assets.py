@@ -0,0 +1,38 @@
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import assets
+
+
+class Command(BaseCommand):
+    help = 'Gera o CSS (Tailwind), os ícones e as fontes em static/build/ antes do collectstatic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailwind', default=settings.TAILWIND_CLI,
+                            help='Comando do Tailwind CLI (padrão: TAILWIND_CLI)')
+        parser.add_argument('--fontawesome-dir', default=settings.FONTAWESOME_DIR,
+                            help='Pacote @fortawesome/fontawesome-free (padrão: FONTAWESOME_DIR)')
+        parser.add_argument('--inter-dir', default=settings.INTER_FONT_DIR,
+                            help='Pacote @fontsource-variable/inter (padrão: INTER_FONT_DIR)')
+        parser.add_argument('--skip-css', action='store_true',
+                            help='Não recompila o Tailwind (só ícones e fontes)')
+
+    def handle(self, *args, **options):
+        if not options['skip_css']:
+            try:
+                assets.build_css(options['tailwind'])
+            except (OSError, subprocess.CalledProcessError) as exc:
+                raise CommandError(f'Falha ao compilar o CSS: {exc}')
+
+        try:
+            count, unknown = assets.build_icons(options['fontawesome_dir'], assets.template_files())
+            assets.copy_fonts(options['inter_dir'])
+        except OSError as exc:
+            raise CommandError(f'Falha ao gerar ícones e fontes: {exc}')
+
+        for name in unknown:
+            self.stderr.write(self.style.WARNING(f'Ícone desconhecido: {name}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Assets gerados em {assets.BUILD_DIR} ({count} ícones)'))
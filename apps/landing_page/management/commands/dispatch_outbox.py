@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.landing_page.outbox import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = 'Entrega as mensagens pendentes da fila de saída (email e CRM)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Mensagens por lote (padrão: 100)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Continua rodando e consultando a fila')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Segundos entre consultas com --loop (padrão: 5)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            sent, failed = dispatch_pending(batch_size=batch_size)
+            if sent or failed or not options['loop']:
+                self.stdout.write(f'Enviadas: {sent} | Falhas: {failed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
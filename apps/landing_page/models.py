@@ -1,3 +1,70 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ContactMessage(models.Model):
+    """
+    Mensagem enviada pelo formulário de contato da landing page
+    """
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    company = models.CharField(max_length=100, blank=True)
+    service = models.CharField(max_length=100, blank=True)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Mensagem de Contato'
+        verbose_name_plural = 'Mensagens de Contato'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} <{self.email}>"
+
+
+class OutboxMessage(models.Model):
+    """
+    Entrega pendente (email, CRM) gravada na mesma transação da mensagem
+    de contato e processada pelo comando ``dispatch_outbox``
+    """
+    CHANNEL_EMAIL = 'EMAIL'
+    CHANNEL_CRM = 'CRM'
+    CHANNEL_CHOICES = [
+        (CHANNEL_EMAIL, 'Email'),
+        (CHANNEL_CRM, 'CRM Webhook'),
+    ]
+
+    STATUS_PENDING = 'PENDING'
+    STATUS_SENT = 'SENT'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendente'),
+        (STATUS_SENT, 'Enviado'),
+        (STATUS_FAILED, 'Falhou'),
+    ]
+
+    contact_message = models.ForeignKey(ContactMessage, on_delete=models.CASCADE,
+                                        null=True, blank=True,
+                                        related_name='outbox_messages')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    payload = models.JSONField()
+    dedup_key = models.CharField(max_length=80, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Mensagem na Fila de Saída'
+        verbose_name_plural = 'Fila de Saída'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} - {self.dedup_key[:12]} ({self.status})"
@@ -0,0 +1,211 @@
+"""
+Transactional outbox for contact-form deliveries.
+
+The contact view only writes rows (``enqueue_contact_message``) inside the
+same transaction as the ``ContactMessage``; the ``dispatch_outbox`` command
+delivers them in batches, retrying with exponential backoff.
+
+A batch is claimed in a short transaction that leases its rows for
+``OUTBOX_LEASE_SECONDS``; the deliveries happen after the commit, and each
+message is marked sent (or rescheduled) on its own, so a failure only
+retries that message and nothing already delivered is sent again.
+"""
+import json
+import logging
+import urllib.request
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _dedup_key(channel, contact):
+    """
+    One delivery per channel and submission: retries of the dispatcher do
+    not notify twice, a new submission with the same text does
+    """
+    return f'{channel}:{contact.pk}'
+
+
+def _contact_payload(contact):
+    return {
+        'id': contact.pk,
+        'name': contact.name,
+        'email': contact.email,
+        'company': contact.company,
+        'service': contact.service,
+        'message': contact.message,
+        'created_at': contact.created_at.isoformat(),
+    }
+
+
+def enqueue_contact_message(contact):
+    """
+    Queue the email notification and (if configured) the CRM webhook for a
+    contact message. Must be called inside the transaction that saved it.
+    """
+    channels = [OutboxMessage.CHANNEL_EMAIL]
+    if settings.CRM_WEBHOOK_URL:
+        channels.append(OutboxMessage.CHANNEL_CRM)
+
+    payload = _contact_payload(contact)
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(
+                contact_message=contact,
+                channel=channel,
+                payload=payload,
+                dedup_key=_dedup_key(channel, contact),
+            )
+            for channel in channels
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _email(outbox, connection):
+    data = outbox.payload
+    body = (
+        f"Nome: {data['name']}\n"
+        f"Email: {data['email']}\n"
+        f"Empresa: {data.get('company') or '-'}\n"
+        f"Serviço: {data.get('service') or '-'}\n\n"
+        f"{data['message']}"
+    )
+    return EmailMessage(
+        subject=f"[ByteNest] Novo contato: {data['name']}",
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=settings.CONTACT_NOTIFICATION_EMAILS,
+        reply_to=[data['email']],
+        connection=connection,
+    )
+
+
+@contextmanager
+def email_sender():
+    """
+    Sends contact notifications one by one over a single SMTP connection
+    """
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        yield lambda outbox: connection.send_messages([_email(outbox, connection)])
+    finally:
+        connection.close()
+
+
+def send_crm_webhook(outbox):
+    """
+    Post one contact to the CRM webhook
+    """
+    body = json.dumps({
+        'contacts': [dict(outbox.payload, dedup_key=outbox.dedup_key)],
+    }).encode('utf-8')
+    request = urllib.request.Request(
+        settings.CRM_WEBHOOK_URL,
+        data=body,
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=settings.CRM_WEBHOOK_TIMEOUT) as response:
+        response.read()
+
+
+@contextmanager
+def crm_sender():
+    yield send_crm_webhook
+
+
+# Context managers yielding a function that delivers one message
+SENDERS = {
+    OutboxMessage.CHANNEL_EMAIL: email_sender,
+    OutboxMessage.CHANNEL_CRM: crm_sender,
+}
+
+
+def _backoff(attempts):
+    base = settings.OUTBOX_RETRY_BASE_SECONDS
+    return timedelta(seconds=min(base * (2 ** (attempts - 1)), 3600))
+
+
+def _record_failure(outbox, exc):
+    outbox.attempts += 1
+    outbox.last_error = str(exc)[:1000]
+    if outbox.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        outbox.status = OutboxMessage.STATUS_FAILED
+    outbox.next_attempt_at = timezone.now() + _backoff(outbox.attempts)
+    OutboxMessage.objects.filter(pk=outbox.pk).update(
+        attempts=outbox.attempts, last_error=outbox.last_error,
+        status=outbox.status, next_attempt_at=outbox.next_attempt_at)
+
+
+def dispatch_batch(channel, batch_size=100):
+    """
+    Claim up to ``batch_size`` due messages of ``channel`` and deliver them.
+
+    Rows are claimed with ``SKIP LOCKED`` and leased by moving their
+    ``next_attempt_at`` forward, so several dispatchers can run side by
+    side without delivering the same message twice, and the messages of a
+    dispatcher that dies are retried once the lease ends. Returns the
+    ``(sent, failed)`` counts of this batch.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(channel=channel, status=OutboxMessage.STATUS_PENDING,
+                    next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+        OutboxMessage.objects.filter(pk__in=[outbox.pk for outbox in batch]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+
+    sent = failed = 0
+    try:
+        with SENDERS[channel]() as send:
+            for outbox in batch:
+                try:
+                    send(outbox)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning('Outbox %s message %d failed: %s', channel, outbox.pk, exc)
+                    _record_failure(outbox, exc)
+                    failed += 1
+                    continue
+                OutboxMessage.objects.filter(pk=outbox.pk).update(
+                    status=OutboxMessage.STATUS_SENT,
+                    sent_at=timezone.now(),
+                    last_error='',
+                )
+                sent += 1
+    except Exception as exc:  # noqa: BLE001
+        # The channel itself is down (e.g. no SMTP connection)
+        logger.warning('Outbox %s unavailable: %s', channel, exc)
+        for outbox in batch[sent + failed:]:
+            _record_failure(outbox, exc)
+            failed += 1
+    return sent, failed
+
+
+def dispatch_pending(batch_size=100):
+    """
+    Drain every channel once. Returns the total ``(sent, failed)`` counts.
+    """
+    sent = failed = 0
+    for channel in SENDERS:
+        while True:
+            batch_sent, batch_failed = dispatch_batch(channel, batch_size)
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent + batch_failed < batch_size:
+                break
+    return sent, failed
@@ -0,0 +1,83 @@
+"""
+Pre-rendered landing page.
+
+The landing page has no per-request content, so it is rendered once per
+process (by the gunicorn warm-up, before workers fork, or on the first
+hit) and served from memory with a strong ETag and ``Cache-Control`` that
+lets Traefik or a CDN cache it. Conditional requests get a 304 and the
+template engine is never involved after the first render.
+
+The HTML links the hashed static files, so a deploy that changes the page
+or its assets also changes the ETag.
+"""
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from core.context_processors import assets
+
+TEMPLATE_NAME = 'landing_page/landing_page.html'
+
+_page = None
+
+
+def landing_context():
+    return {
+        'page_title': 'ByteNest - Transforme Seu Negócio com Tecnologia',
+        'meta_description': (
+            'Descubra como a ByteNest pode revolucionar seu negócio com '
+            'soluções tecnológicas inovadoras. Desenvolvimento web, apps '
+            'mobile, automação e muito mais.'
+        ),
+    }
+
+
+class PrerenderedPage:
+    """
+    Rendered HTML plus its gzip variant, each with its own strong ETag
+    """
+
+    def __init__(self, html):
+        self.body = html.encode('utf-8')
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+def prerender():
+    """
+    Render the landing page and keep it for this process
+    """
+    global _page
+    # No request: context processors do not run, so add what base.html uses
+    html = render_to_string(TEMPLATE_NAME, {**landing_context(), **assets(None)})
+    _page = PrerenderedPage(html)
+    return _page
+
+
+def serve(request):
+    page = _page or prerender()
+    compressed = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    etag = page.gzip_etag if compressed else page.etag
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            page.gzip_body if compressed else page.body,
+            content_type='text/html; charset=utf-8',
+        )
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Cache-Control'] = (
+        f'public, max-age={settings.LANDING_PAGE_MAX_AGE}, '
+        f's-maxage={settings.LANDING_PAGE_SHARED_MAX_AGE}, '
+        f'stale-while-revalidate={settings.LANDING_PAGE_SHARED_MAX_AGE}'
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
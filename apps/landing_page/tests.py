@@ -1,3 +1,192 @@
-from django.test import TestCase
+import json
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+
+from . import outbox
+from .models import ContactMessage, OutboxMessage
+
+CONTACT = {'name': 'Maria', 'email': 'maria@example.com', 'message': 'Olá'}
+
+
+class FakeSender:
+    """
+    Canal de entrega que registra os envios e falha para ``fail``
+    """
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.sent = []
+
+    @contextmanager
+    def __call__(self):
+        def send(message):
+            if message.pk in self.fail:
+                raise ConnectionError('CRM fora do ar')
+            self.sent.append(message.pk)
+        yield send
+
+
+def _later(seconds):
+    return mock.patch.object(timezone, 'now', return_value=timezone.now() + timedelta(seconds=seconds))
+
+
+@override_settings(CRM_WEBHOOK_URL='https://crm.example.com/hook',
+                   CONTACT_NOTIFICATION_EMAILS=['comercial@bytenest.com.br'],
+                   OUTBOX_RETRY_BASE_SECONDS=30, OUTBOX_MAX_ATTEMPTS=3, OUTBOX_LEASE_SECONDS=900)
+class OutboxTests(TestCase):
+    """
+    Fila de saída do formulário de contato
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def post(self):
+        return self.client.post(reverse('landing_page:contact_form'), json.dumps(CONTACT),
+                                content_type='application/json')
+
+    def contact(self):
+        contact = ContactMessage.objects.create(**CONTACT)
+        outbox.enqueue_contact_message(contact)
+        return contact
+
+    def test_written_with_the_contact(self):
+        self.assertEqual(self.post().status_code, 200)
+        contact = ContactMessage.objects.get()
+        self.assertEqual(
+            sorted(contact.outbox_messages.values_list('channel', 'dedup_key')),
+            [('CRM', f'CRM:{contact.pk}'), ('EMAIL', f'EMAIL:{contact.pk}')],
+        )
+
+    def test_rolled_back_with_the_contact(self):
+        with mock.patch('apps.landing_page.views.enqueue_contact_message',
+                        side_effect=RuntimeError('fila indisponível')):
+            self.assertEqual(self.post().status_code, 500)
+        self.assertFalse(ContactMessage.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_dedup_key(self):
+        contact = self.contact()
+        outbox.enqueue_contact_message(contact)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+        # A new submission with the same text is delivered again
+        self.contact()
+        self.assertEqual(OutboxMessage.objects.count(), 4)
+
+    def test_delivered_once(self):
+        self.contact()
+        self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_EMAIL), (1, 0))
+        self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_EMAIL), (0, 0))
+        with _later(3600):
+            self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_EMAIL), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboxMessage.objects.get(channel='EMAIL').status, OutboxMessage.STATUS_SENT)
+
+    def test_lease(self):
+        self.contact()
+        sender = FakeSender()
+        claimed = []
+
+        @contextmanager
+        def concurrent():
+            # Another dispatcher running while this batch is delivered
+            claimed.append(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM))
+            with sender() as send:
+                yield send
+
+        with mock.patch.dict(outbox.SENDERS, {OutboxMessage.CHANNEL_CRM: concurrent}):
+            self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (1, 0))
+        self.assertEqual(claimed, [(0, 0)])
+        self.assertEqual(len(sender.sent), 1)
+
+    def test_lease_expires(self):
+        self.contact()
+
+        class Killed(BaseException):
+            pass
+
+        @contextmanager
+        def dying():
+            # The dispatcher dies after claiming the batch
+            raise Killed
+            yield  # noqa: B901
+
+        with mock.patch.dict(outbox.SENDERS, {OutboxMessage.CHANNEL_CRM: dying}):
+            with self.assertRaises(Killed):
+                outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM)
+        sender = FakeSender()
+        with mock.patch.dict(outbox.SENDERS, {OutboxMessage.CHANNEL_CRM: sender}):
+            self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (0, 0))
+            with _later(901):
+                self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (1, 0))
+        self.assertEqual(len(sender.sent), 1)
+
+    def test_failures_back_off_and_retry(self):
+        failing, working = self.contact(), self.contact()
+        failing_pk = failing.outbox_messages.get(channel='CRM').pk
+        sender = FakeSender(fail={failing_pk})
+        with mock.patch.dict(outbox.SENDERS, {OutboxMessage.CHANNEL_CRM: sender}), \
+                self.assertLogs('apps.landing_page.outbox', 'WARNING'):
+            # One failure does not hold back the rest of the batch
+            self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (1, 1))
+            self.assertEqual(sender.sent, [working.outbox_messages.get(channel='CRM').pk])
+
+            message = OutboxMessage.objects.get(pk=failing_pk)
+            self.assertEqual((message.attempts, message.status), (1, OutboxMessage.STATUS_PENDING))
+            self.assertIn('CRM fora do ar', message.last_error)
+            with _later(29):
+                self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (0, 0))
+            with _later(31):
+                self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (0, 1))
+            # 30 s, then 60 s: the third failure gives up
+            with _later(31 + 61):
+                self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual((message.attempts, message.status), (3, OutboxMessage.STATUS_FAILED))
+
+            sender.fail.clear()
+            with _later(86400):
+                self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (0, 0))
+
+
+@override_settings(CRM_WEBHOOK_URL='https://crm.example.com/hook')
+class OutboxLockTests(TransactionTestCase):
+    """
+    Linhas travadas por outro despachante são puladas, não esperadas
+    """
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_skip_locked(self):
+        contact = ContactMessage.objects.create(**CONTACT)
+        outbox.enqueue_contact_message(contact)
+        locked, release = threading.Event(), threading.Event()
+
+        def other_dispatcher():
+            try:
+                with transaction.atomic():
+                    list(OutboxMessage.objects.select_for_update().filter(channel='CRM'))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_dispatcher)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            sender = FakeSender()
+            with mock.patch.dict(outbox.SENDERS, {OutboxMessage.CHANNEL_CRM: sender}):
+                self.assertEqual(outbox.dispatch_batch(OutboxMessage.CHANNEL_CRM), (0, 0))
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(sender.sent, [])
@@ -1,27 +1,32 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, require_safe
 import json
 
+from core.ratelimit import ratelimit
+from . import prerender
+from .models import ContactMessage
+from .outbox import enqueue_contact_message
 
+
+@require_safe
 def landing_page(request):
     """
     View principal da landing page da ByteNest
     """
-    context = {
-        'page_title': 'ByteNest - Transforme Seu Negócio com Tecnologia',
-        'meta_description': (
-            'Descubra como a ByteNest pode revolucionar seu negócio com '
-            'soluções tecnológicas inovadoras. Desenvolvimento web, apps '
-            'mobile, automação e muito mais.'
-        ),
-    }
-    return render(request, 'landing_page/landing_page.html', context)
+    if settings.LANDING_PAGE_PRERENDER:
+        return prerender.serve(request)
+    return render(request, prerender.TEMPLATE_NAME, prerender.landing_context())
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@ratelimit('contact', ip='5/10m', email='3/h')
 def contact_form(request):
     """
     View para processar o formulário de contato
@@ -29,15 +34,9 @@ def contact_form(request):
     try:
         data = json.loads(request.body)
 
-        # Aqui você pode adicionar lógica para:
-        # - Salvar no banco de dados
-        # - Enviar email
-        # - Integrar com CRM
-        # - Etc.
-
-        name = data.get('name', '')
-        email = data.get('email', '')
-        message = data.get('message', '')
+        name = (data.get('name') or '').strip()
+        email = (data.get('email') or '').strip()
+        message = (data.get('message') or '').strip()
 
         # Validação básica
         if not name or not email or not message:
@@ -48,8 +47,25 @@ def contact_form(request):
                 )
             }, status=400)
 
-        # Aqui você pode implementar a lógica de envio
-        # Por exemplo, salvar no banco ou enviar email
+        try:
+            validate_email(email)
+        except ValidationError:
+            return JsonResponse({
+                'success': False,
+                'message': 'Por favor, informe um email válido.'
+            }, status=400)
+
+        # Email e CRM são entregues pelo comando dispatch_outbox; aqui só
+        # gravamos a mensagem e a fila de saída na mesma transação
+        with transaction.atomic():
+            contact = ContactMessage.objects.create(
+                name=name[:100],
+                email=email,
+                company=(data.get('company') or '').strip()[:100],
+                service=(data.get('service') or '').strip()[:100],
+                message=message,
+            )
+            enqueue_contact_message(contact)
 
         return JsonResponse({
             'success': True,
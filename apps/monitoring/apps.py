@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.monitoring'
+    verbose_name = 'Monitoramento'
+
+    def ready(self):
+        from django.core import checks
+
+        from core.concurrency import register_query_wrapper
+        from core.ratelimit import check_shared_cache
+
+        from . import metrics
+        from .timing import install_template_hook, query_wrapper
+        install_template_hook()
+        metrics.install()
+        register_query_wrapper(query_wrapper)
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
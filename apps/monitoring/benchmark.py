@@ -0,0 +1,228 @@
+"""
+Route benchmark harness: drives the HR, dashboard and accounts pages
+through the Django test client and records latency percentiles and query
+counts, so runs can be compared against a saved JSON baseline.
+"""
+import math
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import get_resolver, reverse
+
+from .timing import capture_queries
+
+BENCHMARK_EMAIL = 'benchmark@bytenest.local'
+
+# Routes that change state or end the session are not benchmarked
+SKIPPED_ROUTES = {
+    'accounts:logout',
+    'hr:approve_vacation',
+    'hr:enroll_training',
+    'hr:cancel_training_enrollment',
+    'hr:upload_document',
+}
+NAMESPACES = ('accounts', 'dashboard', 'hr')
+
+
+def _first_id(model_path, **filters):
+    def resolve():
+        from django.apps import apps
+        model = apps.get_model(model_path)
+        return model.objects.filter(**filters).order_by('pk').values_list('pk', flat=True).first()
+    return resolve
+
+
+class BenchmarkRoute:
+    """
+    A named URL plus how to fill its arguments from the current dataset
+    """
+
+    def __init__(self, name, kwargs=None, params=None, anonymous=False):
+        self.name = name
+        self.kwargs = kwargs or {}
+        self.params = params or {}
+        self.anonymous = anonymous
+
+    @property
+    def label(self):
+        if not self.params:
+            return self.name
+        query = '&'.join(f'{key}={value}' for key, value in sorted(self.params.items()))
+        return f'{self.name}?{query}'
+
+    def url(self):
+        kwargs = {}
+        for key, resolve in self.kwargs.items():
+            value = resolve()
+            if value is None:
+                return None
+            kwargs[key] = value
+        return reverse(self.name, kwargs=kwargs)
+
+
+ROUTES = [
+    BenchmarkRoute('accounts:login', anonymous=True),
+    BenchmarkRoute('accounts:dashboard'),
+    BenchmarkRoute('dashboard:home'),
+    BenchmarkRoute('dashboard:profile'),
+    BenchmarkRoute('dashboard:settings'),
+    BenchmarkRoute('dashboard:projects'),
+    BenchmarkRoute('dashboard:analytics'),
+    BenchmarkRoute('hr:dashboard'),
+    BenchmarkRoute('hr:employees_list'),
+    BenchmarkRoute('hr:employees_list', params={'page': 5}),
+    BenchmarkRoute('hr:employees_list', params={'search': 'Silva'}),
+    BenchmarkRoute('hr:employee_detail',
+                   kwargs={'employee_id': _first_id('hr.Employee', active=True)}),
+    BenchmarkRoute('hr:download_document',
+                   kwargs={'document_id': _first_id('hr.Document', blob__isnull=False)}),
+    BenchmarkRoute('hr:departments_list'),
+    BenchmarkRoute('hr:department_detail',
+                   kwargs={'department_id': _first_id('hr.Department', active=True)}),
+    BenchmarkRoute('hr:vacation_requests'),
+    BenchmarkRoute('hr:vacation_requests', params={'status': 'REQUESTED'}),
+    BenchmarkRoute('hr:attendance_tracking'),
+    BenchmarkRoute('hr:training_management'),
+    BenchmarkRoute('hr:training_detail',
+                   kwargs={'training_id': _first_id('hr.Training')}),
+    BenchmarkRoute('hr:performance_evaluations'),
+    BenchmarkRoute('hr:benefits_management'),
+    BenchmarkRoute('hr:reports_analytics'),
+    BenchmarkRoute('hr:headcount_series'),
+    BenchmarkRoute('hr:headcount_series', params={'frequency': 'day', 'group': 'position'}),
+    BenchmarkRoute('hr:tenure_analytics'),
+    BenchmarkRoute('hr:compensation_analytics'),
+    BenchmarkRoute('hr:compensation_data', params={'group_by': 'department', 'level': 3}),
+    BenchmarkRoute('hr:calibration_analytics'),
+    BenchmarkRoute('hr:calibration_analytics', params={'type': 'ANNUAL', 'department': 1}),
+]
+
+
+def uncovered_routes():
+    """
+    URL names in the benchmarked namespaces with no entry in ``ROUTES``
+    """
+    covered = {route.name for route in ROUTES} | SKIPPED_ROUTES
+    names = set()
+    resolver = get_resolver()
+    for namespace in NAMESPACES:
+        sub = resolver.namespace_dict.get(namespace)
+        if sub is None:
+            continue
+        for key in sub[1].reverse_dict:
+            if isinstance(key, str):
+                names.add(f'{namespace}:{key}')
+    return sorted(names - covered)
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of ``values``
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def benchmark_user():
+    User = get_user_model()
+    user, created = User.objects.get_or_create(
+        email=BENCHMARK_EMAIL,
+        defaults={'username': 'benchmark', 'is_staff': True, 'is_superuser': True},
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    return user
+
+
+def dataset_summary():
+    from apps.hr.models import Attendance, Department, Employee, Evaluation, Vacation
+    return {
+        'departments': Department.objects.count(),
+        'employees': Employee.objects.count(),
+        'attendance': Attendance.objects.count(),
+        'vacations': Vacation.objects.count(),
+        'evaluations': Evaluation.objects.count(),
+    }
+
+
+def make_clients(host='localhost'):
+    """
+    ``(authenticated, anonymous)`` test clients for the benchmark user
+    """
+    authenticated = Client(HTTP_HOST=host)
+    authenticated.force_login(benchmark_user())
+    return authenticated, Client(HTTP_HOST=host)
+
+
+def selected(routes, only):
+    return [
+        route for route in routes
+        if not only or route.name in only or route.label in only
+    ]
+
+
+def run(routes=ROUTES, iterations=20, warmup=2, host='localhost', only=None):
+    """
+    Benchmark ``routes`` and return ``{label: stats}``
+    """
+    authenticated, anonymous = make_clients(host)
+
+    results = {}
+    for route in selected(routes, only):
+        url = route.url()
+        if url is None:
+            results[route.label] = {'skipped': 'no data for URL arguments'}
+            continue
+        client = anonymous if route.anonymous else authenticated
+
+        for _ in range(warmup):
+            client.get(url, route.params)
+
+        timings = []
+        queries = []
+        status = None
+        for _ in range(iterations):
+            with capture_queries() as captured:
+                start = time.perf_counter()
+                response = client.get(url, route.params)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            status = response.status_code
+
+        results[route.label] = {
+            'status': status,
+            'queries': max(queries),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+        }
+    return results
+
+
+def compare(current, baseline, threshold=0.25, min_delta_ms=5.0):
+    """
+    Regressions of ``current`` against ``baseline`` route stats.
+
+    A route regresses when its p95 grows by more than ``threshold`` (and by
+    at least ``min_delta_ms``, to ignore noise on fast pages), when it runs
+    more queries than before, or when its status code changes.
+    """
+    regressions = []
+    for label, stats in current.items():
+        before = baseline.get(label)
+        if not before or 'skipped' in stats or 'skipped' in before:
+            continue
+        if stats['status'] != before['status']:
+            regressions.append((label, f"status {before['status']} -> {stats['status']}"))
+        if stats['queries'] > before['queries']:
+            regressions.append((label, f"queries {before['queries']} -> {stats['queries']}"))
+        limit = before['p95_ms'] * (1 + threshold)
+        if stats['p95_ms'] > limit and stats['p95_ms'] - before['p95_ms'] >= min_delta_ms:
+            regressions.append((label, f"p95 {before['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms"))
+    return regressions
@@ -0,0 +1,35 @@
+"""
+Declared SQL query budgets per view.
+
+A budget is the most queries one request to the view may run, counting
+everything the request triggers (session and user lookups included)::
+
+    @login_required
+    @query_budget(10)
+    def employee_detail(request, employee_id):
+        ...
+
+The app tests (``assertQueryBudget`` from ``apps.monitoring.testing``) and
+``check_query_budgets`` enforce them, on test fixtures and on the
+synthetic dataset; in production ``PerformanceMiddleware`` logs a warning
+for a ``QUERY_BUDGET_SAMPLE_RATE`` fraction of the requests that go over.
+"""
+
+
+def query_budget(max_queries):
+    """
+    Declare the query budget of a view. The value is stored on the function
+    so it survives ``functools.wraps``-based decorators applied on top.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def budget_for(view_func):
+    """
+    Budget declared for ``view_func``, or ``None``
+    """
+    return getattr(view_func, 'query_budget', None)
+
@@ -0,0 +1,41 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlLog:
+    """
+    Append-only JSON-lines file shared by every worker process.
+
+    Each record is written with a single ``os.write`` on an ``O_APPEND``
+    descriptor, so lines from concurrent gunicorn workers never interleave.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + '\n'
+        try:
+            if self._fd is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._fd = os.open(
+                    self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line.encode('utf-8'))
+        except OSError as exc:
+            logger.warning('Could not write to %s: %s', self.path, exc)
+
+
+def read_jsonl(path):
+    """
+    Yield the records of a JSON-lines file, skipping truncated lines
+    """
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
@@ -0,0 +1,76 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.monitoring import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark HR, dashboard and accounts routes and compare with a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Only benchmark this route (repeatable)')
+        parser.add_argument('--host', default='localhost',
+                            help='Host header sent by the test client')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with a previous --output file')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed relative p95 growth (default: 0.25)')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help='Ignore p95 growth smaller than this (default: 5)')
+
+    def handle(self, *args, **options):
+        for name in benchmark.uncovered_routes():
+            self.stderr.write(self.style.WARNING(f'Route not benchmarked: {name}'))
+
+        results = benchmark.run(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            host=options['host'],
+            only=options['routes'],
+        )
+
+        self.stdout.write(
+            f"{'route':<44} {'status':>6} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for label, stats in results.items():
+            if 'skipped' in stats:
+                self.stdout.write(f"{label:<44} skipped: {stats['skipped']}")
+                continue
+            self.stdout.write(
+                f"{label:<44} {stats['status']:>6} {stats['queries']:>7} "
+                f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'dataset': benchmark.dataset_summary(),
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"Baseline not found: {options['baseline']}")
+            with open(options['baseline'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+            if baseline.get('dataset') != report['dataset']:
+                self.stderr.write(self.style.WARNING(
+                    'Dataset differs from the baseline; timings may not be comparable.'))
+            regressions = benchmark.compare(
+                results, baseline.get('routes', {}),
+                threshold=options['threshold'],
+                min_delta_ms=options['min_delta_ms'],
+            )
+            if regressions:
+                for label, reason in regressions:
+                    self.stderr.write(self.style.ERROR(f'REGRESSION {label}: {reason}'))
+                raise CommandError(f'{len(regressions)} regression(s) against the baseline.')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import resolve
+
+from apps.monitoring import benchmark
+from apps.monitoring.budgets import budget_for
+from apps.monitoring.queries import QueryStats, summarize
+from apps.monitoring.timing import capture_queries
+
+
+class Command(BaseCommand):
+    help = 'Fail when a benchmarked route runs more SQL queries than its view budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Only check this route (repeatable)')
+        parser.add_argument('--host', default='localhost',
+                            help='Host header sent by the test client')
+        parser.add_argument('--strict', action='store_true',
+                            help='Also fail for HR routes without a declared budget')
+
+    def handle(self, *args, **options):
+        authenticated, anonymous = benchmark.make_clients(options['host'])
+        over = []
+        missing = []
+
+        for route in benchmark.selected(benchmark.ROUTES, options['routes']):
+            url = route.url()
+            if url is None:
+                self.stdout.write(f'{route.label:<44} skipped: no data for URL arguments')
+                continue
+            budget = budget_for(resolve(url).func)
+            client = anonymous if route.anonymous else authenticated
+
+            # First hit warms per-process caches that would skew the count
+            client.get(url, route.params)
+            # Counts every alias and thread: views may read from the
+            # replica or run queries concurrently
+            with capture_queries() as queries:
+                client.get(url, route.params)
+            count = len(queries)
+
+            if budget is None:
+                if route.name.startswith('hr:'):
+                    missing.append(route.label)
+                self.stdout.write(f'{route.label:<44} {count:>4} queries  (no budget)')
+                continue
+            status = 'OK' if count <= budget else 'OVER'
+            self.stdout.write(f'{route.label:<44} {count:>4} / {budget:<4} {status}')
+            if count > budget:
+                stats = QueryStats()
+                for sql, _, duration_ms in queries:
+                    stats.add(sql, duration_ms)
+                over.append((route.label, count, budget, stats))
+
+        for label, count, budget, stats in over:
+            self.stderr.write(self.style.ERROR(f'{label}: {count} queries, budget {budget}'))
+            top = sorted(stats.by_fingerprint.values(), key=lambda entry: entry[0], reverse=True)
+            for calls, _, _, sql in top[:5]:
+                self.stderr.write(f'    {calls:>4} x {summarize(sql, 160)}')
+        for label in missing:
+            self.stderr.write(self.style.WARNING(f'{label}: no query budget declared'))
+
+        if over or (options['strict'] and missing):
+            raise CommandError(
+                f'{len(over)} route(s) over budget, {len(missing)} without a budget.')
+        self.stdout.write(self.style.SUCCESS('All routes within their query budgets.'))
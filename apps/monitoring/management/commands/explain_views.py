@@ -0,0 +1,82 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.monitoring import benchmark, plans
+
+
+class Command(BaseCommand):
+    help = 'Capture EXPLAIN plans for the benchmarked routes and flag plan regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Only explain this route (repeatable)')
+        parser.add_argument('--host', default='localhost',
+                            help='Host header sent by the test client')
+        parser.add_argument('--output', help='Write normalized plans as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with a previous --output file')
+        parser.add_argument('--cost-budget', type=float, default=settings.PLAN_COST_BUDGET,
+                            help='Flag plans whose estimated total cost exceeds this')
+        parser.add_argument('--min-rows', type=int, default=settings.PLAN_SEQ_SCAN_MIN_ROWS,
+                            help='Only suggest indexes for tables with at least this many rows')
+        parser.add_argument('--show-plans', action='store_true',
+                            help='Print every captured plan')
+
+    def handle(self, *args, **options):
+        if not plans.supported():
+            raise CommandError(f'EXPLAIN plans are not supported on {plans.connection.vendor}; '
+                               f'run this against PostgreSQL or SQLite.')
+        captured = plans.capture(host=options['host'], only=options['routes'])
+
+        for label, route_plans in captured.items():
+            seq = sorted({
+                table for plan in route_plans.values()
+                for table, scan in plan['scans'].items() if scan == plans.SEQ_SCAN
+            })
+            self.stdout.write(
+                f"{label:<44} {len(route_plans):>3} plans"
+                + (f"  seq scans: {', '.join(seq)}" if seq else ''))
+            if options['show_plans']:
+                for plan in route_plans.values():
+                    cost = f" (cost {plan['cost']:.0f})" if plan['cost'] is not None else ''
+                    self.stdout.write(f"    {plan['sql']}{cost}")
+                    for line in plan['shape']:
+                        self.stdout.write(f'      {line}')
+
+        suggestions = plans.suggest_indexes(captured, min_rows=options['min_rows'])
+        if suggestions:
+            self.stdout.write('\nSuggested indexes:')
+            for sql, entry in suggestions.items():
+                self.stdout.write(f"  {sql}  -- {', '.join(entry['routes'])}")
+                if entry['partial']:
+                    self.stdout.write(f"    or partial: {entry['partial']}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'vendor': plans.connection.vendor,
+                    'dataset': benchmark.dataset_summary(),
+                    'routes': captured,
+                }, handle, indent=2, sort_keys=True)
+            self.stdout.write(f"Plans written to {options['output']}")
+
+        baseline_routes = {}
+        if options['baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"Baseline not found: {options['baseline']}")
+            with open(options['baseline'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+            if baseline.get('vendor') != plans.connection.vendor:
+                raise CommandError('Baseline was captured on a different database backend.')
+            baseline_routes = baseline.get('routes', {})
+
+        problems = plans.compare(captured, baseline_routes, cost_budget=options['cost_budget'])
+        if problems:
+            for label, message in problems:
+                self.stderr.write(self.style.ERROR(f'PLAN {label}: {message}'))
+            raise CommandError(f'{len(problems)} plan problem(s) found.')
+        self.stdout.write(self.style.SUCCESS('No plan regressions.'))
@@ -0,0 +1,87 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitoring.logfile import read_jsonl
+from apps.monitoring.queries import summarize
+
+SORT_KEYS = {
+    'total': lambda row: row['total_ms'],
+    'mean': lambda row: row['total_ms'] / row['calls'],
+    'max': lambda row: row['max_ms'],
+    'calls': lambda row: row['calls'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Top-N query fingerprints per route from the query tracker log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=getattr(settings, 'QUERY_LOG_PATH', ''),
+                            help='Query log file (default: QUERY_LOG_PATH)')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total')
+        parser.add_argument('--route', help='Only this route, e.g. hr:dashboard')
+        parser.add_argument('--since', type=float,
+                            help='Only requests from the last N hours')
+        parser.add_argument('--n-plus-one', action='store_true',
+                            help='Only fingerprints flagged as N+1')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not path or not os.path.exists(path):
+            raise CommandError(f'Query log not found: {path!r}')
+
+        since = time.time() - options['since'] * 3600 if options['since'] else None
+        rows = {}
+        requests_per_route = {}
+        for record in read_jsonl(path):
+            if since and record.get('ts', 0) < since:
+                continue
+            route = record.get('route') or '-'
+            if options['route'] and route != options['route']:
+                continue
+            requests_per_route[route] = requests_per_route.get(route, 0) + 1
+            flagged = set(record.get('n_plus_one', []))
+            for query in record.get('queries', []):
+                key = (route, query['fingerprint'])
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = {
+                        'route': route, 'fingerprint': query['fingerprint'],
+                        'sql': query['sql'], 'calls': 0, 'total_ms': 0.0,
+                        'max_ms': 0.0, 'requests': 0, 'n_plus_one': 0,
+                    }
+                row['calls'] += query['calls']
+                row['total_ms'] += query['total_ms']
+                row['max_ms'] = max(row['max_ms'], query['max_ms'])
+                row['requests'] += 1
+                if query['fingerprint'] in flagged:
+                    row['n_plus_one'] += 1
+
+        selected = [
+            row for row in rows.values()
+            if not options['n_plus_one'] or row['n_plus_one']
+        ]
+        selected.sort(key=SORT_KEYS[options['sort']], reverse=True)
+
+        if not selected:
+            self.stdout.write('No queries recorded.')
+            return
+
+        self.stdout.write(
+            f"{'route':<32} {'calls':>7} {'calls/req':>9} {'total ms':>10} "
+            f"{'mean ms':>8} {'max ms':>8} {'N+1':>4}  fingerprint")
+        for row in selected[:options['top']]:
+            self.stdout.write(
+                f"{row['route'][:32]:<32} {row['calls']:>7} "
+                f"{row['calls'] / row['requests']:>9.1f} {row['total_ms']:>10.1f} "
+                f"{row['total_ms'] / row['calls']:>8.2f} {row['max_ms']:>8.1f} "
+                f"{row['n_plus_one']:>4}  {row['fingerprint']}")
+            self.stdout.write(f"    {summarize(row['sql'], 160)}")
+
+        self.stdout.write('')
+        self.stdout.write('Requests analysed: ' + ', '.join(
+            f'{route}={count}' for route, count in sorted(requests_per_route.items())))
@@ -0,0 +1,280 @@
+"""
+Prometheus metrics for requests, database, cache and background queues.
+
+Under gunicorn ``PROMETHEUS_MULTIPROC_DIR`` is set (``gunicorn.conf.py``,
+``/tmp/prometheus`` by default): every worker then writes its samples to memory-mapped files in that
+directory and ``/metrics`` merges them, so counters and histograms
+aggregate across processes instead of reflecting whichever worker served
+the scrape.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.35, 0.5, 0.75,
+    1.0, 1.5, 2.5, 5.0, 10.0,
+)
+
+REQUEST_LATENCY = Histogram(
+    'django_http_request_duration_seconds',
+    'Request latency by route',
+    ['route', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'django_http_requests_total',
+    'Requests by route and status code',
+    ['route', 'method', 'status'],
+)
+IN_FLIGHT = Gauge(
+    'django_http_requests_in_flight',
+    'Requests currently being handled',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Counter(
+    'django_db_queries_total',
+    'SQL queries executed, by route',
+    ['route'],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'django_db_queries_per_request',
+    'SQL queries per request',
+    ['route'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_TIME = Histogram(
+    'django_db_duration_seconds',
+    'Time spent in SQL per request',
+    ['route'],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    'django_db_query_budget_exceeded_total',
+    'Requests that ran more queries than their view budget',
+    ['route'],
+)
+DB_CONNECTIONS = Counter(
+    'django_db_connections_opened_total',
+    'New database connections (compare with requests for reuse)',
+    ['alias'],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'django_db_pool_connections',
+    'Pooled connections by state (size, available, waiting requests)',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_EVENTS = Counter(
+    'django_db_pool_events_total',
+    'Connection pool events: requests served, queued, failed; connections opened or lost',
+    ['alias', 'event'],
+)
+DB_POOL_WAIT = Counter(
+    'django_db_pool_wait_seconds_total',
+    'Time requests spent waiting for a pooled connection',
+    ['alias'],
+)
+DB_POOL_CONNECT_TIME = Counter(
+    'django_db_pool_connect_seconds_total',
+    'Time spent opening new pooled connections',
+    ['alias'],
+)
+CACHE_REQUESTS = Counter(
+    'django_cache_requests_total',
+    'Cache lookups by backend and result',
+    ['backend', 'result'],
+)
+
+
+def observe_request(route, method, status, seconds, timings):
+    route = route or 'unmatched'
+    REQUEST_LATENCY.labels(route, method).observe(seconds)
+    REQUESTS.labels(route, method, str(status)).inc()
+    DB_QUERIES_PER_REQUEST.labels(route).observe(timings.db_queries)
+    if timings.db_queries:
+        DB_QUERIES.labels(route).inc(timings.db_queries)
+        DB_TIME.labels(route).observe(timings.db_ms / 1000)
+
+
+POOL_STATS_INTERVAL = 1.0
+
+# psycopg_pool.ConnectionPool.get_stats() keys exported as events
+_POOL_EVENTS = {
+    'requests_num': 'requests',
+    'requests_queued': 'queued',
+    'requests_errors': 'request_errors',
+    'connections_num': 'connections',
+    'connections_errors': 'connection_errors',
+    'connections_lost': 'connections_lost',
+    'returns_bad': 'returns_bad',
+}
+_pool_seen = {}
+_last_pool_check = 0.0
+
+
+def observe_pools():
+    """
+    Copy psycopg pool statistics into the metrics, at most once per
+    ``POOL_STATS_INTERVAL`` seconds per process. The pool counters are
+    cumulative, so only the growth since the previous call is added.
+    """
+    global _last_pool_check
+    now = time.monotonic()
+    if now - _last_pool_check < POOL_STATS_INTERVAL:
+        return
+    _last_pool_check = now
+
+    for connection in connections.all(initialized_only=True):
+        pools = getattr(connection, '_connection_pools', None)
+        pool = pools.get(connection.alias) if pools else None
+        if pool is None:
+            continue
+        alias = connection.alias
+        stats = pool.get_stats()
+        DB_POOL_CONNECTIONS.labels(alias, 'size').set(stats.get('pool_size', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'available').set(stats.get('pool_available', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'waiting').set(stats.get('requests_waiting', 0))
+
+        seen = _pool_seen.setdefault(alias, {})
+        for key, event in _POOL_EVENTS.items():
+            delta = stats.get(key, 0) - seen.get(key, 0)
+            if delta > 0:
+                DB_POOL_EVENTS.labels(alias, event).inc(delta)
+        for key, counter in (('requests_wait_ms', DB_POOL_WAIT),
+                             ('connections_ms', DB_POOL_CONNECT_TIME)):
+            delta = stats.get(key, 0) - seen.get(key, 0)
+            if delta > 0:
+                counter.labels(alias).inc(delta / 1000)
+        _pool_seen[alias] = stats
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    DB_CONNECTIONS.labels(connection.alias).inc()
+
+
+_MISSING = object()
+
+
+def _instrument_cache_class(backend_class):
+    if getattr(backend_class, '_metrics_instrumented', False):
+        return
+    name = backend_class.__name__
+    hits = CACHE_REQUESTS.labels(name, 'hit')
+    misses = CACHE_REQUESTS.labels(name, 'miss')
+    original_get = backend_class.get
+    original_get_many = backend_class.get_many
+    # BaseCache.get_many() calls get(), which already counts each key
+    own_get_many = original_get_many is not BaseCache.get_many
+
+    def get(self, key, default=None, version=None):
+        value = original_get(self, key, _MISSING, version=version)
+        if value is _MISSING:
+            misses.inc()
+            return default
+        hits.inc()
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = original_get_many(self, keys, version=version)
+        hits.inc(len(found))
+        misses.inc(len(keys) - len(found))
+        return found
+
+    backend_class.get = get
+    if own_get_many:
+        backend_class.get_many = get_many
+    backend_class._metrics_instrumented = True
+
+
+def install():
+    """
+    Connect the signal and cache hooks; called from ``MonitoringConfig.ready``
+    """
+    from django.utils.module_loading import import_string
+
+    connection_created.connect(_on_connection_created,
+                               dispatch_uid='monitoring_connection_created')
+    for options in settings.CACHES.values():
+        _instrument_cache_class(import_string(options['BACKEND']))
+
+
+class ScrapeTimeCollector:
+    """
+    Values read at scrape time instead of being pushed by workers: outbox
+    queue depth, rate-limit counters and replica lag. The rate-limit
+    counters live in ``RATELIMIT_CACHE``, which deployments must share
+    between workers (check ``ratelimit.E001``), so they cover all of them.
+    """
+
+    def collect(self):
+        from apps.landing_page.models import OutboxMessage
+        from core.ratelimit import get_stats
+
+        depth = GaugeMetricFamily(
+            'bytenest_outbox_queue_depth',
+            'Outbox messages by channel and status',
+            labels=['channel', 'status'],
+        )
+        rows = (
+            OutboxMessage.objects.exclude(status=OutboxMessage.STATUS_SENT)
+            .values_list('channel', 'status')
+            .order_by()
+            .annotate(total=Count('id'))
+        )
+        for channel, status, total in rows:
+            depth.add_metric([channel, status], total)
+        yield depth
+
+        ratelimit = GaugeMetricFamily(
+            'bytenest_ratelimit_requests',
+            'Rate-limited endpoint requests by scope and outcome',
+            labels=['scope', 'outcome'],
+        )
+        for scope, counts in get_stats(settings.METRICS_RATELIMIT_SCOPES).items():
+            for outcome, value in counts.items():
+                ratelimit.add_metric([scope, outcome], value)
+        yield ratelimit
+
+        from core.replica import replica_configured, replica_lag
+        if replica_configured():
+            lag = replica_lag()
+            yield GaugeMetricFamily(
+                'bytenest_db_replica_lag_seconds',
+                'Read replica replication lag (-1 when unreachable)',
+                value=-1 if lag is None else lag,
+            )
+
+
+def render_latest():
+    """
+    Exposition-format payload, merged across workers in multiprocess mode
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = CollectorRegistry()
+        registry.register(_DefaultRegistryProxy())
+    registry.register(ScrapeTimeCollector())
+    return generate_latest(registry)
+
+
+class _DefaultRegistryProxy:
+    """
+    Expose the process-global registry inside a per-scrape registry
+    """
+
+    def collect(self):
+        return REGISTRY.collect()
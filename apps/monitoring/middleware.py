@@ -0,0 +1,206 @@
+import logging
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, timing
+from .budgets import budget_for
+from .logfile import JsonlLog
+from .queries import fingerprint, summarize
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    """
+    Records SQL count/time, template time and view time for every request.
+
+    With ``PERF_SERVER_TIMING`` the numbers are sent back to staff users in
+    a ``Server-Timing`` header and, for a
+    ``PERF_SAMPLE_RATE`` fraction of requests, appended as one JSON line to
+    ``PERF_LOG_PATH``. Queries of a ``QUERY_SAMPLE_RATE`` fraction of
+    requests (all of them with ``QUERY_TRACKING``) are grouped by
+    fingerprint: those repeating one statement more than
+    ``QUERY_N_PLUS_ONE_THRESHOLD`` times are logged and written to
+    ``QUERY_LOG_PATH`` for the ``query_report`` command. Queries slower
+    than ``QUERY_SLOW_MS`` are reported from every request; the others
+    only cost a counter. Views declaring a
+    ``query_budget`` are checked against it. Every request also
+    feeds the Prometheus metrics served at ``/metrics``. Keep it first in
+    ``MIDDLEWARE`` so ``total`` covers the whole stack.
+
+    Runs in the mode of the stack below it. In async mode the query
+    wrappers are installed, and the results recorded, from the request's
+    thread-sensitive thread: connections are per thread, and that is
+    where the synchronous code below runs its queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', False)
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.0)
+        self.n_plus_one_threshold = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 10)
+        self.slow_ms = getattr(settings, 'QUERY_SLOW_MS', 200)
+        self.query_sample_rate = getattr(settings, 'QUERY_SAMPLE_RATE', 0.0)
+        self.query_tracking = getattr(settings, 'QUERY_TRACKING', False)
+        self.budget_sample_rate = getattr(settings, 'QUERY_BUDGET_SAMPLE_RATE', 1.0)
+        self.request_log = JsonlLog(getattr(settings, 'PERF_LOG_PATH', 'logs/requests.jsonl'))
+        self.query_log = JsonlLog(getattr(settings, 'QUERY_LOG_PATH', 'logs/queries.jsonl'))
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, sampled = self.start()
+        token = timing.activate(timings)
+        metrics.IN_FLIGHT.inc()
+        try:
+            with ExitStack() as stack:
+                self.instrument(stack)
+                response = self.get_response(request)
+        finally:
+            metrics.IN_FLIGHT.dec()
+            timing.deactivate(token)
+        self.record(request, response, timings, sampled)
+        return response
+
+    async def __acall__(self, request):
+        timings, sampled = self.start()
+        token = timing.activate(timings)
+        metrics.IN_FLIGHT.inc()
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.instrument)(stack)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            metrics.IN_FLIGHT.dec()
+            timing.deactivate(token)
+        await sync_to_async(self.record)(request, response, timings, sampled)
+        return response
+
+    def start(self):
+        sampled = bool(self.query_sample_rate) and random.random() < self.query_sample_rate
+        timings = timing.RequestTimings(track_queries=sampled or self.query_tracking,
+                                        slow_ms=self.slow_ms)
+        return timings, sampled
+
+    @staticmethod
+    def instrument(stack):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timing.query_wrapper))
+
+    def record(self, request, response, timings, sampled):
+        if timings.view_start is not None:
+            timings.view_ms = (time.perf_counter() - timings.view_start) * 1000
+        total_ms = timings.total_ms
+        metrics.observe_request(self.route(request), request.method,
+                                response.status_code, total_ms / 1000, timings)
+        metrics.observe_pools()
+
+        if self.server_timing and self.is_staff(request):
+            response['Server-Timing'] = self.header(timings, total_ms)
+        if self.sample_rate and random.random() < self.sample_rate:
+            self.write_sample(request, response, timings, total_ms)
+        if timings.queries is not None and timings.db_queries:
+            self.check_queries(request, timings, sampled)
+        elif timings.slow_queries:
+            self.log_slow_queries(request, timings)
+        if timings.query_budget is not None and timings.db_queries > timings.query_budget:
+            self.budget_exceeded(request, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = timing.current()
+        if timings is not None:
+            timings.query_budget = budget_for(view_func)
+            timings.view_start = time.perf_counter()
+
+    @staticmethod
+    def is_staff(request):
+        # Only loads the user when the session has one
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    @staticmethod
+    def route(request):
+        match = request.resolver_match
+        return match.view_name if match else None
+
+    @staticmethod
+    def header(timings, total_ms):
+        return ', '.join([
+            f'db;dur={timings.db_ms:.1f};desc="{timings.db_queries} queries"',
+            f'tpl;dur={timings.template_ms:.1f}',
+            f'view;dur={timings.view_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+    def write_sample(self, request, response, timings, total_ms):
+        self.request_log.write({
+            'ts': round(time.time(), 3),
+            'route': self.route(request),
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'view_ms': round(timings.view_ms, 2),
+            'db_ms': round(timings.db_ms, 2),
+            'db_queries': timings.db_queries,
+            'template_ms': round(timings.template_ms, 2),
+            'pid': os.getpid(),
+        })
+
+    def log_slow_queries(self, request, timings):
+        route = self.route(request)
+        for sql, duration_ms in timings.slow_queries:
+            logger.warning('Slow query on %s: %.1f ms %s %s',
+                           route, duration_ms, fingerprint(sql), summarize(sql))
+
+    def check_queries(self, request, timings, sampled):
+        repeated = timings.queries.repeated(self.n_plus_one_threshold)
+        slow = timings.queries.slowest(self.slow_ms)
+        if not (repeated or slow or sampled):
+            return
+
+        route = self.route(request)
+        for key, (calls, total_ms, _, sql) in repeated.items():
+            logger.warning('Possible N+1 on %s: %d x %s (%.1f ms) %s',
+                           route, calls, key, total_ms, summarize(sql))
+        for key, (_, _, max_ms, sql) in slow.items():
+            logger.warning('Slow query on %s: %.1f ms %s %s',
+                           route, max_ms, key, summarize(sql))
+
+        self.query_log.write({
+            'ts': round(time.time(), 3),
+            'route': route,
+            'db_queries': timings.db_queries,
+            'db_ms': round(timings.db_ms, 2),
+            'n_plus_one': sorted(repeated),
+            'slow': sorted(slow),
+            'queries': timings.queries.as_records(),
+        })
+
+    def budget_exceeded(self, request, timings):
+        route = self.route(request)
+        metrics.QUERY_BUDGET_EXCEEDED.labels(route).inc()
+        if self.budget_sample_rate < 1 and random.random() >= self.budget_sample_rate:
+            return
+        if timings.queries is None:
+            logger.warning('Query budget exceeded on %s: %d queries (budget %d)',
+                           route, timings.db_queries, timings.query_budget)
+            return
+        top = sorted(timings.queries.by_fingerprint.items(),
+                     key=lambda item: item[1][0], reverse=True)[:3]
+        logger.warning(
+            'Query budget exceeded on %s: %d queries (budget %d); most repeated: %s',
+            route, timings.db_queries, timings.query_budget,
+            '; '.join(f'{entry[0]} x {summarize(entry[3], 120)}' for _, entry in top),
+        )
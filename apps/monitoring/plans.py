@@ -0,0 +1,279 @@
+"""
+Query-plan capture for the benchmarked routes.
+
+Every SELECT a route runs is explained once per fingerprint and reduced to
+its shape: node types plus how each table is reached (sequential scan or
+which index). Costs and row estimates are kept apart from the shape, so a
+stored baseline only changes when the planner picks a different strategy,
+for instance an index scan turning into a sequential scan once the data
+grows.
+
+PostgreSQL plans come from ``EXPLAIN (FORMAT JSON)``; SQLite's
+``EXPLAIN QUERY PLAN`` is supported for local runs, without costs.
+"""
+import json
+import re
+
+from django.db import connection
+
+from . import benchmark
+from .queries import fingerprint, summarize
+from .timing import capture_queries
+
+SEQ_SCAN = 'seq'
+
+_WHERE = re.compile(r'\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bHAVING\b|$)',
+                    re.IGNORECASE | re.DOTALL)
+_PREDICATE = re.compile(
+    r'"(?P<table>\w+)"\."(?P<column>\w+)"\s*'
+    r'(?P<op>=|>=|<=|<>|>|<|\bIN\b|\bBETWEEN\b|\bIS\b|(?=\)|\s+AND\b|\s+OR\b|$))',
+    re.IGNORECASE,
+)
+_ORDER_BY = re.compile(r'\bORDER BY\b(.*?)(?:\bLIMIT\b|\bOFFSET\b|$)', re.IGNORECASE | re.DOTALL)
+_COLUMN = re.compile(r'"(\w+)"\."(\w+)"')
+_RANGE_OPS = {'>', '<', '>=', '<=', 'BETWEEN'}
+_SQLITE_SCAN = re.compile(
+    r'^(SCAN|SEARCH) (\w+)(?: AS \w+)?'
+    r'(?: USING (?:COVERING |INTEGER PRIMARY KEY)?(?:INDEX (\w+))?)?'
+)
+
+
+def _explain_postgresql(cursor, sql, params):
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]['Plan']
+
+    shape = []
+    scans = {}
+
+    def walk(node, depth):
+        relation = node.get('Relation Name')
+        label = node['Node Type']
+        if relation:
+            label = f'{label} on {relation}'
+            if node['Node Type'] == 'Seq Scan':
+                scans[relation] = SEQ_SCAN
+            elif node.get('Index Name'):
+                scans[relation] = f"index:{node['Index Name']}"
+            elif node['Node Type'] == 'Bitmap Heap Scan':
+                indexes = [child.get('Index Name') for child in node.get('Plans', ())
+                           if child.get('Index Name')]
+                scans[relation] = f"bitmap:{'+'.join(indexes)}"
+        if node.get('Index Name'):
+            label = f"{label} using {node['Index Name']}"
+        shape.append(f"{'  ' * depth}{label}")
+        for child in node.get('Plans', ()):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return {
+        'shape': shape,
+        'scans': scans,
+        'cost': root.get('Total Cost'),
+        'rows': root.get('Plan Rows'),
+    }
+
+
+def _explain_sqlite(cursor, sql, params):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    depth = {0: -1}
+    shape = []
+    scans = {}
+    for node_id, parent, _, detail in cursor.fetchall():
+        depth[node_id] = depth.get(parent, -1) + 1
+        shape.append(f"{'  ' * depth[node_id]}{detail}")
+        match = _SQLITE_SCAN.match(detail)
+        if match:
+            kind, relation, index = match.groups()
+            if kind == 'SCAN' and not index:
+                scans[relation] = SEQ_SCAN
+            else:
+                scans[relation] = f'index:{index or "pk"}'
+    return {'shape': shape, 'scans': scans, 'cost': None, 'rows': None}
+
+
+_EXPLAINERS = {
+    'postgresql': _explain_postgresql,
+    'sqlite': _explain_sqlite,
+}
+
+
+def supported():
+    """
+    Whether plans can be captured on the current database backend
+    """
+    return connection.vendor in _EXPLAINERS
+
+
+def explain(sql, params=None):
+    """
+    Normalized plan of ``sql``: ``{'shape', 'scans', 'cost', 'rows'}``
+    """
+    explainer = _EXPLAINERS.get(connection.vendor)
+    if explainer is None:
+        raise NotImplementedError(f'EXPLAIN is not supported for {connection.vendor}')
+    with connection.cursor() as cursor:
+        return explainer(cursor, sql, params)
+
+
+def predicates(sql):
+    """
+    ``{table: {'eq': [...], 'range': [...], 'flag': [...], 'order': [...]}}``
+    for the columns filtered in the WHERE clause, in order of appearance.
+    ``flag`` holds boolean columns tested on their own
+    (``WHERE "t"."active"``) and ``order`` the table's ORDER BY columns.
+    """
+    match = _WHERE.search(sql)
+    found = {}
+    if not match:
+        return found
+    for predicate in _PREDICATE.finditer(match.group(1)):
+        table, column = predicate.group('table'), predicate.group('column')
+        op = predicate.group('op').upper()
+        if not op:
+            kind = 'flag'
+        elif op in _RANGE_OPS:
+            kind = 'range'
+        else:
+            kind = 'eq'
+        columns = found.setdefault(table, {'eq': [], 'range': [], 'flag': [], 'order': []})
+        if not any(column in listed for listed in columns.values()):
+            columns[kind].append(column)
+
+    order = _ORDER_BY.search(sql, match.end(1))
+    if order:
+        for table, column in _COLUMN.findall(order.group(1)):
+            if table in found:
+                found[table]['order'].append(column)
+    return found
+
+
+def capture(routes=benchmark.ROUTES, host='localhost', only=None):
+    """
+    Explain every distinct SELECT issued by ``routes``.
+
+    Returns ``{label: {fingerprint: plan}}`` where each plan also carries the
+    summarized SQL and the WHERE predicates.
+    """
+    authenticated, anonymous = benchmark.make_clients(host)
+    results = {}
+    for route in benchmark.selected(routes, only):
+        url = route.url()
+        if url is None:
+            continue
+        client = anonymous if route.anonymous else authenticated
+        with capture_queries() as captured:
+            client.get(url, route.params)
+
+        plans = {}
+        for sql, params, _ in captured:
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            key = fingerprint(sql)
+            if key in plans:
+                continue
+            plan = explain(sql, params)
+            plan['sql'] = summarize(sql, width=300)
+            plan['predicates'] = predicates(sql)
+            plans[key] = plan
+        results[route.label] = plans
+    return results
+
+
+def compare(current, baseline, cost_budget=None):
+    """
+    Plan problems of ``current`` against ``baseline`` as ``(label, message)``.
+
+    Flags tables that lost their index (index or bitmap scan in the baseline,
+    sequential scan now), any other change of plan shape, and plans whose
+    estimated cost exceeds ``cost_budget``. Changes that only replace
+    sequential scans with index scans are not reported.
+    """
+    problems = []
+    for label, plans in current.items():
+        before = baseline.get(label, {})
+        for key, plan in plans.items():
+            if cost_budget is not None and plan['cost'] is not None and plan['cost'] > cost_budget:
+                problems.append(
+                    (label, f"cost {plan['cost']:.0f} > {cost_budget:.0f}: {plan['sql']}"))
+            previous = before.get(key)
+            if previous is None:
+                continue
+            lost = [
+                table for table, scan in plan['scans'].items()
+                if scan == SEQ_SCAN and previous['scans'].get(table, SEQ_SCAN) != SEQ_SCAN
+            ]
+            gained = [
+                table for table, scan in plan['scans'].items()
+                if scan != SEQ_SCAN and previous['scans'].get(table) == SEQ_SCAN
+            ]
+            for table in lost:
+                problems.append(
+                    (label, f"{table}: {previous['scans'][table]} -> seq scan: {plan['sql']}"))
+            if not lost and not gained and plan['shape'] != previous['shape']:
+                problems.append((label, f"plan shape changed: {plan['sql']}"))
+    return problems
+
+
+def _indexed_prefixes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        tuple(info['columns']) for info in constraints.values()
+        if (info['index'] or info['unique'] or info['primary_key']) and info['columns']
+    ]
+
+
+def _row_count(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0]
+
+
+def suggest_indexes(captured, min_rows=1000):
+    """
+    Index suggestions for sequentially scanned tables of at least
+    ``min_rows`` rows, from the columns the scanning queries filter on.
+
+    Flag and equality columns come first and the range column last, the
+    order a composite B-tree can use; without a range filter the first
+    ORDER BY column takes that place so the index also serves the sort.
+    When a boolean flag is part of the filter, a partial index on the
+    remaining columns is offered as the smaller alternative. Returns
+    ``{sql: {'routes': [...], 'partial': sql}}``.
+    """
+    suggestions = {}
+    sizes = {}
+    for label, plans in captured.items():
+        for plan in plans.values():
+            for table, scan in plan['scans'].items():
+                columns = plan['predicates'].get(table)
+                if scan != SEQ_SCAN or not columns:
+                    continue
+                if table not in sizes:
+                    sizes[table] = _row_count(table)
+                if sizes[table] < min_rows:
+                    continue
+                rest = tuple(columns['eq'] + (columns['range'] or columns['order'])[:1])
+                wanted = tuple(columns['flag']) + rest
+                if any(index[:len(wanted)] == wanted for index in _indexed_prefixes(table)):
+                    continue
+                sql = _create_index(table, wanted)
+                entry = suggestions.setdefault(sql, {'routes': [], 'partial': None})
+                if label not in entry['routes']:
+                    entry['routes'].append(label)
+                if columns['flag'] and rest:
+                    entry['partial'] = _create_index(
+                        table, rest, where=' AND '.join(columns['flag']))
+    return suggestions
+
+
+def _create_index(table, columns, where=None):
+    suffix = '_'.join(columns) + (f"_{where.replace(' AND ', '_')}" if where else '')
+    name = f'{table}_{suffix}_idx'[:63]
+    sql = f"CREATE INDEX CONCURRENTLY {name} ON {table} ({', '.join(columns)})"
+    if where:
+        sql = f'{sql} WHERE {where}'
+    return f'{sql};'
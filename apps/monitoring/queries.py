@@ -0,0 +1,93 @@
+"""
+SQL fingerprinting and per-request query aggregation.
+
+A fingerprint is the statement with literals and placeholder lists
+collapsed, so ``WHERE id = 1`` and ``WHERE id = 2`` (or ``IN (%s, %s)`` and
+``IN (%s)``) group together the way ``pg_stat_statements`` does.
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+_SELECT_LIST = re.compile(r'^SELECT (DISTINCT )?.+? FROM ', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def normalize(sql):
+    """
+    Canonical form of ``sql`` with every literal replaced by ``?``
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub(r'VALUES \1, ...', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def summarize(sql, width=200):
+    """
+    Normalized statement with the column list elided, for logs and reports
+    """
+    return _SELECT_LIST.sub(r'SELECT \1... FROM ', normalize(sql), count=1)[:width]
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """
+    Short stable id of the normalized statement
+    """
+    return hashlib.sha1(normalize(sql).encode('utf-8')).hexdigest()[:16]
+
+
+class QueryStats:
+    """
+    Count and time per fingerprint for one request
+    """
+    __slots__ = ('by_fingerprint',)
+
+    def __init__(self):
+        self.by_fingerprint = {}
+
+    def add(self, sql, duration_ms):
+        key = fingerprint(sql)
+        entry = self.by_fingerprint.get(key)
+        if entry is None:
+            self.by_fingerprint[key] = [1, duration_ms, duration_ms, sql]
+        else:
+            entry[0] += 1
+            entry[1] += duration_ms
+            if duration_ms > entry[2]:
+                entry[2] = duration_ms
+
+    def repeated(self, threshold):
+        """
+        Fingerprints executed more than ``threshold`` times (N+1 suspects)
+        """
+        return {
+            key: entry for key, entry in self.by_fingerprint.items()
+            if entry[0] > threshold
+        }
+
+    def slowest(self, threshold_ms):
+        return {
+            key: entry for key, entry in self.by_fingerprint.items()
+            if entry[2] >= threshold_ms
+        }
+
+    def as_records(self):
+        return [
+            {
+                'fingerprint': key,
+                'calls': calls,
+                'total_ms': round(total_ms, 3),
+                'max_ms': round(max_ms, 3),
+                'sql': normalize(sql),
+            }
+            for key, (calls, total_ms, max_ms, sql) in self.by_fingerprint.items()
+        ]
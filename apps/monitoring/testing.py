@@ -0,0 +1,50 @@
+"""
+Test helpers for the declared query budgets (``apps.monitoring.budgets``).
+"""
+from django.urls import resolve
+
+from . import benchmark
+from .budgets import budget_for
+from .queries import QueryStats, summarize
+from .timing import capture_queries
+
+
+class QueryBudgetMixin:
+    """
+    ``TestCase`` mixin checking routes against their view's query budget,
+    like ``assertNumQueries`` with the budget as the upper bound
+    """
+
+    def assertQueryBudget(self, client, url, params=None, warm=True):
+        """
+        GET ``url`` and fail when it runs more queries than its view's
+        budget. Queries on every alias and in ``gather_queries`` worker
+        threads count; unless ``warm`` is false, a first request warms the
+        per-process caches.
+        """
+        budget = budget_for(resolve(url).func)
+        self.assertIsNotNone(budget, f'{url}: no query budget declared')
+        if warm:
+            client.get(url, params)
+        with capture_queries() as queries:
+            response = client.get(url, params)
+        self.assertLess(response.status_code, 400, f'{url}: HTTP {response.status_code}')
+        if len(queries) > budget:
+            stats = QueryStats()
+            for sql, _, duration_ms in queries:
+                stats.add(sql, duration_ms)
+            top = sorted(stats.by_fingerprint.values(), key=lambda entry: entry[0], reverse=True)
+            self.fail(f'{url}: {len(queries)} queries, budget {budget}\n' + '\n'.join(
+                f'{calls:>4} x {summarize(sql, 160)}' for calls, _, _, sql in top[:5]))
+
+    def assertRoutesWithinBudget(self, client, prefix):
+        """
+        ``assertQueryBudget`` for every benchmarked route named ``prefix*``
+        """
+        routes = [route for route in benchmark.ROUTES if route.name.startswith(prefix)]
+        self.assertTrue(routes, f'No benchmarked routes start with {prefix!r}')
+        for route in routes:
+            with self.subTest(route=route.label):
+                url = route.url()
+                self.assertIsNotNone(url, f'{route.label}: no data for the URL arguments')
+                self.assertQueryBudget(client, url, route.params)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from .middleware import PerformanceMiddleware
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class GunicornSmokeTests(SimpleTestCase):
+    """
+    The shipped gunicorn.conf.py boots the app with ``preload_app``: the
+    master warms up before forking and the workers answer with metrics
+    aggregated across processes
+    """
+    BOOT_SECONDS = 30
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='gunicorn-smoke-')
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_boots_with_preload(self):
+        port = _free_port()
+        token = 'smoke-test'
+        env = dict(
+            os.environ,
+            GUNICORN_BIND=f'127.0.0.1:{port}',
+            GUNICORN_WORKERS='2',
+            GUNICORN_PRELOAD='true',
+            # Missing on purpose: gunicorn.conf.py must create it
+            PROMETHEUS_MULTIPROC_DIR=os.path.join(self.tmp, 'prometheus'),
+            # The warm-up refuses a per-process rate-limit cache
+            CACHE_BACKEND='django.core.cache.backends.filebased.FileBasedCache',
+            CACHE_LOCATION=os.path.join(self.tmp, 'cache'),
+            METRICS_TOKEN=token,
+        )
+        log_path = os.path.join(self.tmp, 'gunicorn.log')
+        with open(log_path, 'w') as log:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'core.asgi:application'],
+                cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        try:
+            body = self._get_metrics(port, token, process)
+        finally:
+            process.terminate()
+            process.wait(timeout=self.BOOT_SECONDS)
+        with open(log_path) as log:
+            output = log.read()
+
+        self.assertIsNotNone(body, f'gunicorn did not answer:\n{output}')
+        self.assertIn('django_http_requests_in_flight', body)
+        self.assertIn('Warm-up:', output)
+        self.assertNotIn('Traceback', output)
+
+    def _get_metrics(self, port, token, process):
+        request = urllib.request.Request(f'http://127.0.0.1:{port}/metrics',
+                                         headers={'Authorization': f'Bearer {token}'})
+        deadline = time.monotonic() + self.BOOT_SECONDS
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return response.read().decode()
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.25)
+        return None
+
+
+@override_settings(PERF_SERVER_TIMING=True, PERF_SAMPLE_RATE=0.0, QUERY_SAMPLE_RATE=0.0)
+class PerformanceMiddlewareModeTests(TestCase):
+    """
+    The middleware follows the mode of the stack below it and counts the
+    queries of either
+    """
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = SimpleNamespace(is_staff=True)
+        return request
+
+    @staticmethod
+    def query():
+        return get_user_model().objects.count()
+
+    def test_sync(self):
+        def view(request):
+            self.query()
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(view)
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertIn('desc="1 queries"', middleware(self.request())['Server-Timing'])
+
+    async def test_async(self):
+        async def view(request):
+            # Synchronous code below an async stack runs in the request's thread
+            await sync_to_async(self.query)()
+            await sync_to_async(self.query)()
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(self.request())
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
@@ -0,0 +1,126 @@
+"""
+Per-request timing state shared by the performance middleware, the
+database execute wrapper and the template render hook.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from .queries import QueryStats
+
+_current = contextvars.ContextVar('request_timings', default=None)
+_captures = []
+
+
+class RequestTimings:
+    """
+    Counters collected while a single request is being handled.
+
+    Queries are only fingerprinted (``queries``) when ``track_queries`` is
+    set; otherwise just the statements slower than ``slow_ms`` are kept.
+    ``gather_queries`` worker threads update the query counters at the
+    same time, under ``lock``.
+    """
+    __slots__ = ('start', 'view_start', 'view_ms', 'db_ms', 'db_queries',
+                 'template_ms', 'queries', 'slow_ms', 'slow_queries', 'query_budget',
+                 'lock')
+
+    def __init__(self, track_queries=True, slow_ms=float('inf')):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.view_ms = 0.0
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.template_ms = 0.0
+        self.queries = QueryStats() if track_queries else None
+        self.slow_ms = slow_ms
+        self.slow_queries = []
+        self.query_budget = None
+        self.lock = threading.Lock()
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+
+def current():
+    """
+    Timings of the request being handled, or ``None`` outside a request
+    """
+    return _current.get()
+
+
+def activate(timings):
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def capture_queries():
+    """
+    Collect ``(sql, params, duration_ms)`` for every query instrumented by
+    ``query_wrapper`` while the block runs, from any thread. Used by the
+    benchmark and budget commands, which must also see queries run by
+    ``core.concurrency.gather_queries`` worker threads.
+    """
+    captured = []
+    _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        _captures.remove(captured)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """
+    ``connection.execute_wrapper`` hook adding query count, time and, for
+    tracked requests, the per-fingerprint breakdown
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        with timings.lock:
+            timings.db_ms += duration_ms
+            timings.db_queries += 1
+            if timings.queries is not None:
+                timings.queries.add(sql, duration_ms)
+            elif duration_ms >= timings.slow_ms:
+                timings.slow_queries.append((sql, duration_ms))
+        for captured in _captures:
+            captured.append((sql, None if many else params, duration_ms))
+
+
+def install_template_hook():
+    """
+    Time top-level template renders (``render()``/``TemplateResponse``).
+
+    Only the backend wrapper is patched, so ``{% include %}`` and
+    ``{% extends %}`` inside a render are not counted twice.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_timed', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            timings.template_ms += (time.perf_counter() - start) * 1000
+
+    render._timed = True
+    Template.render = render
@@ -0,0 +1,25 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from .metrics import render_latest
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, protected by ``METRICS_TOKEN``. Without a
+    token it only answers with ``DEBUG``.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    else:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponseForbidden()
+    return HttpResponse(render_latest(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,99 @@
+"""
+Admin building blocks for tables too big for the ModelAdmin defaults.
+
+* ``EstimatedCountPaginator``: no full ``COUNT(*)``. Unfiltered changelists
+  of large tables use the planner's row estimate (PostgreSQL
+  ``pg_class.reltuples``); filtered ones count at most
+  ``ADMIN_COUNT_CAP`` rows.
+* ``CappedRelatedFieldListFilter``: the sidebar filter for a foreign key
+  loads at most ``ADMIN_FILTER_CHOICES_LIMIT`` options, joined with the
+  related admin's ``list_select_related`` so their ``__str__`` does not
+  query per option.
+* ``ScalableModelAdmin``: uses both, skips the second "N total" count, and
+  applies ``list_select_related`` to every queryset the admin builds
+  (autocomplete results and change forms included, not only the
+  changelist).
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.exceptions import NotRegistered
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using):
+    """
+    Planner estimate of the table's rows, or ``None`` when the backend has
+    none (not PostgreSQL, or the table was never analyzed)
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose ``count`` never scans a whole large table
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_MIN:
+                return estimate
+
+        # Filtered (or small): exact up to the cap, the rest is not paged
+        return queryset.order_by()[:settings.ADMIN_COUNT_CAP].count()
+
+
+class CappedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """
+    Foreign-key filter with a bounded, N+1-free option query
+    """
+
+    def field_choices(self, field, request, model_admin):
+        model = field.remote_field.model
+        queryset = model._default_manager.complex_filter(field.get_limit_choices_to())
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        try:
+            related_admin = model_admin.admin_site.get_model_admin(model)
+        except NotRegistered:
+            related_admin = None
+        if related_admin is not None and isinstance(related_admin.list_select_related, (list, tuple)):
+            queryset = queryset.select_related(*related_admin.list_select_related)
+        limit = settings.ADMIN_FILTER_CHOICES_LIMIT
+        return [(obj.pk, str(obj)) for obj in queryset[:limit]]
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin defaults for large tables. Foreign keys in ``list_filter``
+    should use ``CappedRelatedFieldListFilter`` and editable foreign keys
+    ``autocomplete_fields``.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if isinstance(self.list_select_related, (list, tuple)) and self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
@@ -0,0 +1,197 @@
+"""
+Build-time CSS and icon pipeline (``python manage.py build_assets``).
+
+Replaces the in-browser Tailwind compiler and the Font Awesome / Google
+Fonts CDNs with files under ``static/build/``, which ``collectstatic``
+then hashes and compresses:
+
+* ``app.css``: Tailwind compiled from ``assets/css/app.css``. Tailwind
+  scans the templates and only emits the classes they use.
+* ``icons.css`` plus ``fa-<style>.woff2``: the Font Awesome rules and
+  glyphs for the icons the templates reference, nothing else.
+* ``inter-latin.woff2``: the self-hosted Inter variable font.
+"""
+import json
+import logging
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+
+BUILD_DIR = Path(settings.BASE_DIR) / 'static' / 'build'
+CSS_SOURCE = Path(settings.BASE_DIR) / 'assets' / 'css' / 'app.css'
+
+STYLES = {
+    'solid': ('Font Awesome 6 Free', 900, 'fa-solid-900.woff2'),
+    'regular': ('Font Awesome 6 Free', 400, 'fa-regular-400.woff2'),
+    'brands': ('Font Awesome 6 Brands', 400, 'fa-brands-400.woff2'),
+}
+STYLE_CLASSES = {
+    'fas': 'solid', 'fa-solid': 'solid',
+    'far': 'regular', 'fa-regular': 'regular',
+    'fab': 'brands', 'fa-brands': 'brands',
+}
+MODIFIERS = {
+    'fa-fw': '.fa-fw{text-align:center;width:1.25em}',
+    'fa-xs': '.fa-xs{font-size:.75em;line-height:.0833em;vertical-align:.125em}',
+    'fa-sm': '.fa-sm{font-size:.875em;line-height:.0714em;vertical-align:.0536em}',
+    'fa-lg': '.fa-lg{font-size:1.25em;line-height:.05em;vertical-align:-.075em}',
+    'fa-xl': '.fa-xl{font-size:1.5em;line-height:.0417em;vertical-align:-.125em}',
+    'fa-2x': '.fa-2x{font-size:2em}',
+    'fa-3x': '.fa-3x{font-size:3em}',
+    'fa-4x': '.fa-4x{font-size:4em}',
+    'fa-5x': '.fa-5x{font-size:5em}',
+    'fa-spin': (
+        '.fa-spin{animation:fa-spin 2s linear infinite}'
+        '@keyframes fa-spin{0%{transform:rotate(0)}to{transform:rotate(1turn)}}'
+    ),
+    'fa-pulse': (
+        '.fa-pulse{animation:fa-spin 1s steps(8) infinite}'
+        '@keyframes fa-spin{0%{transform:rotate(0)}to{transform:rotate(1turn)}}'
+    ),
+}
+_BASE_RULE = (
+    '.fa,.fas,.far,.fab,.fa-solid,.fa-regular,.fa-brands{'
+    '-moz-osx-font-smoothing:grayscale;-webkit-font-smoothing:antialiased;'
+    'display:inline-block;font-style:normal;font-variant:normal;'
+    'line-height:1;text-rendering:auto}'
+)
+_CLASS_STRING = re.compile(r'''["']([^"'\n]*\bfa-[a-z0-9-]+[^"'\n]*)["']''')
+_ICON_CLASS = re.compile(r'^fa-[a-z0-9-]+$')
+
+
+def template_files():
+    """
+    HTML templates of this project (Django's own admin templates excluded)
+    """
+    from django.template import engines
+
+    base = Path(settings.BASE_DIR).resolve()
+    seen = set()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            root = Path(directory).resolve()
+            if base not in root.parents and root != base:
+                continue
+            for path in root.rglob('*.html'):
+                if path not in seen:
+                    seen.add(path)
+                    yield path
+
+
+def scan_icons(paths):
+    """
+    ``{style: {icon names}}`` referenced by class strings in ``paths``.
+    Strings without an explicit style class default to solid.
+    """
+    used = {style: set() for style in STYLES}
+    modifiers = set()
+    for path in paths:
+        text = Path(path).read_text(encoding='utf-8')
+        for match in _CLASS_STRING.finditer(text):
+            classes = match.group(1).split()
+            style = next((STYLE_CLASSES[c] for c in classes if c in STYLE_CLASSES), 'solid')
+            for name in classes:
+                if name in MODIFIERS:
+                    modifiers.add(name)
+                elif name not in STYLE_CLASSES and _ICON_CLASS.match(name):
+                    used[style].add(name[3:])
+    return used, modifiers
+
+
+def _icon_index(fontawesome_dir):
+    """
+    ``{name or alias: (canonical name, codepoint, styles)}`` from the Font
+    Awesome metadata
+    """
+    with open(Path(fontawesome_dir) / 'metadata' / 'icons.json', encoding='utf-8') as handle:
+        icons = json.load(handle)
+    index = {}
+    for name, meta in icons.items():
+        entry = (name, int(meta['unicode'], 16), set(meta.get('styles', ())))
+        index[name] = entry
+        for alias in (meta.get('aliases') or {}).get('names', ()):
+            index.setdefault(alias, entry)
+    return index
+
+
+def _subset_font(source, target, codepoints):
+    from fontTools import subset
+
+    # Font Awesome's tables trip harmless fontTools warnings
+    logging.getLogger('fontTools').setLevel(logging.ERROR)
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, str(target), options)
+
+
+def build_icons(fontawesome_dir, paths, out_dir=BUILD_DIR):
+    """
+    Write ``icons.css`` and one subsetted webfont per style in use.
+    Returns ``(icon count, unknown names)``.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    used, modifiers = scan_icons(paths)
+    index = _icon_index(fontawesome_dir)
+
+    rules = [_BASE_RULE]
+    glyphs = {}
+    unknown = []
+    for style, names in used.items():
+        for name in sorted(names):
+            entry = index.get(name)
+            if entry is None or style not in entry[2]:
+                unknown.append(f'{style}:{name}')
+                continue
+            glyphs.setdefault(style, {})[name] = entry[1]
+
+    for style, icons in glyphs.items():
+        family, weight, webfont = STYLES[style]
+        target = f'fa-{style}.woff2'
+        _subset_font(Path(fontawesome_dir) / 'webfonts' / webfont,
+                     out_dir / target, set(icons.values()))
+        rules.append(
+            f'@font-face{{font-family:"{family}";font-style:normal;'
+            f'font-weight:{weight};font-display:block;'
+            f'src:url("{target}") format("woff2")}}'
+        )
+        selectors = ','.join(
+            f'.{css_class}' for css_class, mapped in STYLE_CLASSES.items() if mapped == style)
+        rules.append(f'{selectors}{{font-family:"{family}";font-weight:{weight}}}')
+        for name, codepoint in sorted(icons.items()):
+            rules.append(f'.fa-{name}:before{{content:"\\{codepoint:x}"}}')
+
+    rules.extend(MODIFIERS[name] for name in sorted(modifiers))
+    (out_dir / 'icons.css').write_text(''.join(rules), encoding='utf-8')
+    return sum(len(icons) for icons in glyphs.values()), unknown
+
+
+def build_css(tailwind_cli, out_dir=BUILD_DIR):
+    """
+    Compile and minify ``assets/css/app.css`` with the Tailwind CLI
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    command = tailwind_cli.split() + [
+        '--input', str(CSS_SOURCE),
+        '--output', str(out_dir / 'app.css'),
+        '--minify',
+    ]
+    subprocess.run(command, check=True, cwd=CSS_SOURCE.parent)
+
+
+def copy_fonts(inter_dir, out_dir=BUILD_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(Path(inter_dir) / 'files' / 'inter-latin-wght-normal.woff2',
+                    out_dir / 'inter-latin.woff2')
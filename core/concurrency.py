@@ -0,0 +1,103 @@
+"""
+Run independent ORM queries concurrently from async views.
+
+Django's async ORM methods (``acount()``, ``aaggregate()``...) all go
+through one thread-sensitive executor, so awaiting them with
+``asyncio.gather`` still runs them one after another. ``gather_queries``
+runs each callable in a small dedicated thread pool instead; connections
+are per thread, so every query gets its own connection (from the pool
+when ``DB_POOL`` is on) and the wall-clock time is that of the slowest
+query::
+
+    results = await gather_queries(
+        total=lambda: Employee.objects.filter(active=True).count(),
+        departments=lambda: list(Department.objects.filter(active=True)),
+    )
+
+Callables must fully evaluate their querysets (``list()``, ``count()``,
+``aggregate()``): lazy querysets would run later, outside the pool.
+Context variables (replica routing, request timings) are copied into the
+worker threads.
+
+The caller's pooled connections go back to the pool before the fan-out:
+a request holding one while its queries wait for more could otherwise
+exhaust a pool as small as the worker count. Inside a transaction
+(atomic blocks, tests) the callables run one after another on the
+caller's connection instead, since other connections cannot see its
+uncommitted rows.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+_executor = None
+_query_wrappers = []
+
+
+def register_query_wrapper(wrapper):
+    """
+    Install ``wrapper`` (see ``connection.execute_wrapper``) on the worker
+    threads' connections, e.g. for request instrumentation
+    """
+    if wrapper not in _query_wrappers:
+        _query_wrappers.append(wrapper)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_QUERY_WORKERS,
+            thread_name_prefix='orm-query',
+        )
+    return _executor
+
+
+def _run_in_worker(func):
+    def run():
+        # Honour CONN_MAX_AGE/health checks like a request boundary would;
+        # with pooling (CONN_MAX_AGE=0) this hands the connection back.
+        close_old_connections()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    for wrapper in _query_wrappers:
+                        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+                return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+def _release_connections():
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None and getattr(connection, 'pool', None) is not None:
+            connection.close()
+
+
+def _run_serially(queries):
+    return {name: func() for name, func in queries.items()}
+
+
+async def gather_queries(**queries):
+    """
+    Run the keyword callables concurrently and return ``{name: result}``
+    """
+    if await sync_to_async(_in_transaction)():
+        return await sync_to_async(_run_serially)(queries)
+    await sync_to_async(_release_connections)()
+
+    executor = _get_executor()
+    results = await asyncio.gather(*(
+        sync_to_async(_run_in_worker(func), thread_sensitive=False, executor=executor)()
+        for func in queries.values()
+    ))
+    return dict(zip(queries, results))
@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+
+@lru_cache(maxsize=None)
+def _assets_built():
+    """
+    Whether ``build_assets`` has run; checked once per process
+    """
+    path = 'build/app.css'
+    return bool(finders.find(path)) or staticfiles_storage.exists(path)
+
+
+def assets(request):
+    """
+    ``assets_built``: serve the compiled CSS and icons instead of the CDNs
+    (development checkouts without a build)
+    """
+    return {'assets_built': _assets_built()}
@@ -0,0 +1,235 @@
+"""
+Sliding-window rate limiting backed by Django's cache framework.
+
+Each limit keeps one counter per fixed window and estimates the sliding
+window as ``previous * (1 - elapsed) + current``, so a burst right after a
+window boundary is still throttled. Usage::
+
+    @ratelimit('login', ip='20/m', email='5/5m')
+    def login_view(request):
+        ...
+
+The check runs before the view body, so rejected requests never reach the
+password hasher or the database. ``Retry-After`` is the time until the
+estimate lets one more request through. When the cache is unreachable the
+request is let through (and logged) rather than failed.
+
+The counters must live in a cache shared by every worker (Redis): with a
+per-process backend each worker would keep its own windows and allow the
+limit once per worker. ``check_shared_cache`` (``manage.py check
+--deploy``) reports that as an error, and gunicorn refuses to start on it
+(``core.warmup``); runserver and tests run in one process and skip it.
+"""
+import hashlib
+import json
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_STATS_TIMEOUT = 7 * 86400
+# Backends whose data is private to one process
+_PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def parse_rate(rate):
+    """
+    Parse ``'5/m'``, ``'100/h'`` or ``'10/30s'`` into ``(limit, seconds)``
+    """
+    count, _, period = rate.partition('/')
+    unit = period[-1:]
+    multiplier = int(period[:-1] or 1)
+    if unit not in _PERIODS:
+        raise ValueError(f'Invalid rate: {rate!r}')
+    return int(count), multiplier * _PERIODS[unit]
+
+
+def _cache():
+    return caches[getattr(settings, 'RATELIMIT_CACHE', 'default')]
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """
+    Deployment check: the rate-limit cache is shared by the workers
+    """
+    if not getattr(settings, 'RATELIMIT_ENABLE', True):
+        return []
+    alias = getattr(settings, 'RATELIMIT_CACHE', 'default')
+    backend = type(caches[alias])
+    if not issubclass(backend, _PROCESS_LOCAL_BACKENDS):
+        return []
+    return [checks.Error(
+        f'Rate limits are kept in the per-process cache {alias!r} ({backend.__name__}): '
+        f'each worker allows the full limit.',
+        hint='Set CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and '
+             'CACHE_LOCATION=redis://<host>:6379/0 (or point RATELIMIT_CACHE at a shared cache).',
+        id='ratelimit.E001',
+    )]
+
+
+def client_ip(request):
+    """
+    Client IP, honouring the first ``X-Forwarded-For`` hop only when the
+    proxy in front of us (Traefik) is trusted to set it
+    """
+    if getattr(settings, 'RATELIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_email(request):
+    """
+    Email from a JSON or form POST body, normalised for use as a key
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except (ValueError, UnicodeDecodeError):
+            data = None
+        email = data.get('email') if isinstance(data, dict) else ''
+    else:
+        email = request.POST.get('email', '')
+    return str(email or '').strip().lower()
+
+
+_KEY_FUNCS = {
+    'ip': client_ip,
+    'email': request_email,
+}
+
+
+def hit(scope, kind, identifier, rate):
+    """
+    Count one request for ``identifier`` and report whether it is allowed.
+
+    Returns ``(allowed, retry_after_seconds)``.
+    """
+    limit, period = parse_rate(rate)
+    digest = hashlib.sha1(identifier.encode('utf-8')).hexdigest()
+    now = time.time()
+    window = int(now // period)
+    elapsed = (now % period) / period
+
+    cache = _cache()
+    current_key = f'rl:{scope}:{kind}:{digest}:{window}'
+    previous_key = f'rl:{scope}:{kind}:{digest}:{window - 1}'
+
+    cache.add(current_key, 0, timeout=period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(current_key, 1, timeout=period * 2)
+        current = 1
+    previous = cache.get(previous_key, 0)
+
+    estimated = previous * (1 - elapsed) + current
+    if estimated <= limit:
+        return True, 0
+    return False, _retry_after(limit, period, elapsed, previous, current)
+
+
+def _retry_after(limit, period, elapsed, previous, current):
+    """
+    Seconds until one more request fits: later in this window, once the
+    previous window weighs less, or else in the next one
+    """
+    if previous and current < limit:
+        # previous * (1 - x) + current + 1 <= limit
+        until = 1 - (limit - current - 1) / previous
+    else:
+        # Next window: current * (1 - x) + 1 <= limit
+        until = 1 + max(0.0, 1 - (limit - 1) / current)
+    return max(1, math.ceil((until - elapsed) * period))
+
+
+def _record(scope, outcome):
+    cache = _cache()
+    key = f'rl:stats:{scope}:{outcome}'
+    try:
+        cache.add(key, 0, timeout=_STATS_TIMEOUT)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=_STATS_TIMEOUT)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning('Rate limit stats for %s not recorded: %s', scope, exc)
+
+
+def get_stats(scopes):
+    """
+    Allowed/blocked counters per scope, e.g. ``{'login': {'allowed': 10, 'blocked': 2}}``
+    """
+    cache = _cache()
+    keys = [f'rl:stats:{scope}:{outcome}' for scope in scopes for outcome in ('allowed', 'blocked')]
+    values = cache.get_many(keys)
+    return {
+        scope: {
+            outcome: values.get(f'rl:stats:{scope}:{outcome}', 0)
+            for outcome in ('allowed', 'blocked')
+        }
+        for scope in scopes
+    }
+
+
+def ratelimit(scope, methods=('POST',), message=None, **rates):
+    """
+    Decorator limiting ``methods`` requests per key kind (``ip``, ``email``).
+
+    Rates given here are defaults; ``settings.RATELIMITS[scope]`` overrides
+    them per deploy. Excess requests get a 429 JSON response.
+    """
+    for kind in rates:
+        if kind not in _KEY_FUNCS:
+            raise ValueError(f'Unknown rate limit key: {kind!r}')
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if (request.method not in methods
+                    or not getattr(settings, 'RATELIMIT_ENABLE', True)):
+                return view_func(request, *args, **kwargs)
+
+            configured = dict(rates, **getattr(settings, 'RATELIMITS', {}).get(scope, {}))
+            for kind, rate in configured.items():
+                identifier = _KEY_FUNCS[kind](request)
+                if not identifier:
+                    continue
+                try:
+                    allowed, retry_after = hit(scope, kind, identifier, rate)
+                except Exception as exc:  # noqa: BLE001
+                    # Cache down: fail open, an outage must not lock users out
+                    logger.warning('Rate limit %s not checked: %s', scope, exc)
+                    continue
+                if not allowed:
+                    _record(scope, 'blocked')
+                    logger.warning('Rate limit %s exceeded for %s (%s)',
+                                   scope, kind, client_ip(request))
+                    response = JsonResponse({
+                        'success': False,
+                        'message': message or (
+                            'Muitas tentativas. Aguarde alguns instantes e '
+                            'tente novamente.'
+                        ),
+                    }, status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+
+            _record(scope, 'allowed')
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
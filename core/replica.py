@@ -0,0 +1,210 @@
+"""
+Read-replica routing for read-only, read-heavy code paths.
+
+Nothing goes to the replica by default. Views opt in with ``@read_replica``
+and other code with ``with use_replica():``; single querysets can use
+``.using(replica_alias())``. Reads fall back to the primary when:
+
+* no ``replica`` alias is configured (``DB_REPLICA_HOST`` unset),
+* the replica lags more than ``REPLICA_MAX_LAG_SECONDS`` or is unreachable,
+* the client wrote something in the last ``REPLICA_STICKY_SECONDS``
+  (``ReplicaMiddleware`` pins it to the primary with a short-lived cookie),
+  so users always read their own writes,
+* the code runs inside a transaction on the primary,
+* the code runs inside ``with use_primary():``.
+
+Writes and migrations always go to the primary.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_primary_pin'
+
+_use_replica = ContextVar('use_replica', default=False)
+_pinned = ContextVar('replica_pinned', default=False)
+
+# (checked_at, lag_seconds or None when unreachable), per process
+_lag_state = {'checked_at': float('-inf'), 'lag': None}
+
+_LAG_SQL = {
+    'postgresql': (
+        "SELECT CASE "
+        "WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+        "END"
+    ),
+}
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_lag():
+    """
+    Replication lag in seconds, cached for ``REPLICA_LAG_CHECK_SECONDS``.
+    ``None`` when the replica is not configured or cannot be reached.
+    """
+    if not replica_configured():
+        return None
+    now = time.monotonic()
+    if now - _lag_state['checked_at'] < settings.REPLICA_LAG_CHECK_SECONDS:
+        return _lag_state['lag']
+
+    connection = connections[REPLICA_ALIAS]
+    sql = _LAG_SQL.get(connection.vendor)
+    lag = 0.0
+    if sql is not None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError as exc:
+            logger.warning('Replica unavailable, reading from primary: %s', exc)
+            lag = None
+    _lag_state.update(checked_at=now, lag=lag)
+    return lag
+
+
+def replica_alias():
+    """
+    Alias to read from right now: the replica when it is healthy and the
+    current client is not pinned to the primary, otherwise the primary
+    """
+    if not replica_configured() or _pinned.get():
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    lag = replica_lag()
+    if lag is None or lag > settings.REPLICA_MAX_LAG_SECONDS:
+        return DEFAULT_DB_ALIAS
+    return REPLICA_ALIAS
+
+
+@contextmanager
+def use_replica():
+    """
+    Route ORM reads in the block to the replica (subject to the guards)
+    """
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Route ORM reads in the block to the primary, even inside
+    ``use_replica()``
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view_func):
+    """
+    View decorator: reads made by the view go to the replica. Session and
+    user lookups done by middleware before the view still use the primary.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped(request, *args, **kwargs):
+            with use_replica():
+                return await view_func(request, *args, **kwargs)
+        return _async_wrapped
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        with use_replica():
+            return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica inside ``use_replica()``; everything else to
+    the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return replica_alias()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """
+    Read-your-writes: a client that sent a non-safe request is pinned to the
+    primary for ``REPLICA_STICKY_SECONDS``, via a cookie so the pin holds
+    across gunicorn workers. Runs in the mode of the stack below it; the
+    pin is a context variable, so it reaches the synchronous code run from
+    an async stack too.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self.pin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.remember_write(request, response)
+
+    async def __acall__(self, request):
+        token = self.pin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.remember_write(request, response)
+
+    def pin(self, request):
+        writes = request.method not in self.SAFE_METHODS
+        return _pinned.set(writes or PIN_COOKIE in request.COOKIES)
+
+    def remember_write(self, request, response):
+        if request.method not in self.SAFE_METHODS and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
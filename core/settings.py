@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,15 +43,18 @@ INSTALLED_APPS = [
     'apps.accounts',
     'apps.dashboard',
     'apps.hr',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.replica.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,12 +71,14 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.assets',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 
 # Database
@@ -89,9 +94,57 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='bytenest123'),
         'HOST': config('DB_HOST', default='bytenest_db'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_HEALTH_CHECKS': config('DB_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+# Connection reuse. With DB_POOL each process keeps a psycopg pool of
+# DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections, so Postgres sees at most
+# workers * DB_POOL_MAX_SIZE connections. Without it, connections persist
+# for DB_CONN_MAX_AGE seconds (Django does not allow both at once).
+DB_POOL = config('DB_POOL', default=True, cast=bool)
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=6, cast=int),
+        # Seconds a request waits for a free connection before failing
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        'name': 'default',
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+# Read replica for reports and dashboard aggregates (core/replica.py).
+# Only views/blocks that opt in read from it; lagging or unreachable
+# replicas and clients that just wrote fall back to the primary.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_HOST:
+    _replica_options = dict(DATABASES['default']['OPTIONS'])
+    if 'pool' in _replica_options:
+        _replica_options['pool'] = dict(_replica_options['pool'], name='replica')
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=DB_REPLICA_HOST,
+        PORT=config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        OPTIONS=_replica_options,
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_ROUTERS = ['core.replica.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=5, cast=float)
+REPLICA_LAG_CHECK_SECONDS = config('REPLICA_LAG_CHECK_SECONDS', default=5, cast=float)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+
+# Threads per process running concurrent dashboard queries
+# (core/concurrency.py); each may hold a pooled connection, so keep
+# DB_POOL_MAX_SIZE above it or other requests queue behind the fan-out
+ASYNC_QUERY_WORKERS = config('ASYNC_QUERY_WORKERS', default=4, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,13 +195,38 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# Static files configuration for production
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Built by `manage.py build_assets` (static/build/), see core/assets.py
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# Hashed, compressed file names; WhiteNoise serves them with a one-year
+# immutable Cache-Control
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Asset build inputs (only needed where build_assets runs)
+TAILWIND_CLI = config('TAILWIND_CLI', default='tailwindcss')
+FONTAWESOME_DIR = config('FONTAWESOME_DIR', default='/opt/assets/fontawesome')
+INTER_FONT_DIR = config('INTER_FONT_DIR', default='/opt/assets/inter')
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Document downloads: '' streams them from Python (with Range support),
+# 'x-accel' hands them to nginx (X-Accel-Redirect to DOCUMENT_ACCEL_PREFIX,
+# an internal location aliased to MEDIA_ROOT), 'x-sendfile' to servers
+# honoring X-Sendfile
+DOCUMENT_SENDFILE = config('DOCUMENT_SENDFILE', default='')
+DOCUMENT_ACCEL_PREFIX = config('DOCUMENT_ACCEL_PREFIX', default='/protected-media/')
+# Unreferenced document blobs are deleted this long after their last use
+DOCUMENT_BLOB_GRACE_SECONDS = config('DOCUMENT_BLOB_GRACE_SECONDS', default=24 * 3600, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -166,4 +244,96 @@ LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
+# Performance instrumentation (apps/monitoring/middleware.py)
+# Server-Timing header with DB/template/view times, sent to staff users only
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=False, cast=bool)
+PERF_SAMPLE_RATE = config('PERF_SAMPLE_RATE', default=0.0, cast=float)
+PERF_LOG_PATH = config('PERF_LOG_PATH', default=str(BASE_DIR / 'logs' / 'requests.jsonl'))
+
+# Query tracker: N+1 / slow query detection (python manage.py query_report)
+QUERY_N_PLUS_ONE_THRESHOLD = config('QUERY_N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+QUERY_SLOW_MS = config('QUERY_SLOW_MS', default=200, cast=float)
+# Share of requests whose queries are fingerprinted for N+1 detection;
+# QUERY_TRACKING fingerprints all of them (development, load tests)
+QUERY_SAMPLE_RATE = config('QUERY_SAMPLE_RATE', default=0.0, cast=float)
+QUERY_TRACKING = config('QUERY_TRACKING', default=False, cast=bool)
+QUERY_LOG_PATH = config('QUERY_LOG_PATH', default=str(BASE_DIR / 'logs' / 'queries.jsonl'))
+# Share of over-budget requests (see apps/monitoring/budgets.py) that log a warning
+QUERY_BUDGET_SAMPLE_RATE = config('QUERY_BUDGET_SAMPLE_RATE', default=0.1, cast=float)
+
+# Query-plan checks (python manage.py explain_views)
+PLAN_COST_BUDGET = config('PLAN_COST_BUDGET', default=10000, cast=float)
+PLAN_SEQ_SCAN_MIN_ROWS = config('PLAN_SEQ_SCAN_MIN_ROWS', default=1000, cast=int)
+
+# HR analytics: days of daily headcount kept in HeadcountDay
+HEADCOUNT_HISTORY_DAYS = config('HEADCOUNT_HISTORY_DAYS', default=5 * 365 + 1, cast=int)
+# Upper bound on cached analytics; employee changes invalidate them sooner
+HR_ANALYTICS_CACHE_SECONDS = config('HR_ANALYTICS_CACHE_SECONDS', default=6 * 3600, cast=int)
+# Compa-ratios (salary / position base salary) outside this band are outliers
+COMPENSATION_BAND = (
+    config('COMPENSATION_BAND_MIN', default=0.8, cast=float),
+    config('COMPENSATION_BAND_MAX', default=1.2, cast=float),
+)
+# Evaluators whose mean grade is this many standard errors from the cycle
+# mean are flagged as lenient or severe (given enough evaluations)
+CALIBRATION_Z_THRESHOLD = config('CALIBRATION_Z_THRESHOLD', default=2.0, cast=float)
+CALIBRATION_MIN_EVALUATIONS = config('CALIBRATION_MIN_EVALUATIONS', default=5, cast=int)
+# Training locations any number of sessions can use at once (not rooms)
+TRAINING_SHARED_LOCATIONS = config('TRAINING_SHARED_LOCATIONS', default='Online', cast=Csv())
+
+# Admin changelists on large tables (core/admin_performance.py): planner
+# estimates above ADMIN_ESTIMATED_COUNT_MIN rows, exact counts capped at
+# ADMIN_COUNT_CAP, foreign-key filters capped at ADMIN_FILTER_CHOICES_LIMIT
+ADMIN_ESTIMATED_COUNT_MIN = config('ADMIN_ESTIMATED_COUNT_MIN', default=100000, cast=int)
+ADMIN_COUNT_CAP = config('ADMIN_COUNT_CAP', default=10000, cast=int)
+ADMIN_FILTER_CHOICES_LIMIT = config('ADMIN_FILTER_CHOICES_LIMIT', default=200, cast=int)
+
+# Prometheus metrics (/metrics). gunicorn.conf.py sets and prepares
+# PROMETHEUS_MULTIPROC_DIR so samples are aggregated across workers.
+# Scrapers send METRICS_TOKEN as a bearer token; without one the endpoint
+# only answers with DEBUG
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_RATELIMIT_SCOPES = ['login', 'contact']
+
+# Cache. Production needs a cache shared by the workers (rate limits,
+# see core/ratelimit.py): CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# and CACHE_LOCATION=redis://bytenestti_redis:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='bytenest'),
+    }
+}
 
+# Rate limiting (core/ratelimit.py). Per-scope overrides of the decorator
+# defaults, e.g. RATELIMITS = {'login': {'ip': '50/m', 'email': '10/5m'}}
+RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=True, cast=bool)
+RATELIMIT_CACHE = config('RATELIMIT_CACHE', default='default')
+RATELIMIT_TRUST_X_FORWARDED_FOR = config('RATELIMIT_TRUST_X_FORWARDED_FOR', default=False, cast=bool)
+RATELIMITS = {}
+
+# Email
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='ByteNest <no-reply@bytenestti.com.br>')
+
+# Landing page served pre-rendered from memory (apps/landing_page/prerender.py);
+# browsers revalidate after LANDING_PAGE_MAX_AGE, shared caches (Traefik,
+# CDN) keep it for LANDING_PAGE_SHARED_MAX_AGE
+LANDING_PAGE_PRERENDER = config('LANDING_PAGE_PRERENDER', default=True, cast=bool)
+LANDING_PAGE_MAX_AGE = config('LANDING_PAGE_MAX_AGE', default=300, cast=int)
+LANDING_PAGE_SHARED_MAX_AGE = config('LANDING_PAGE_SHARED_MAX_AGE', default=3600, cast=int)
+
+# Contact form delivery (transactional outbox, see apps/landing_page/outbox.py)
+CONTACT_NOTIFICATION_EMAILS = config('CONTACT_NOTIFICATION_EMAILS', default='contato@bytenestti.com.br', cast=Csv())
+CRM_WEBHOOK_URL = config('CRM_WEBHOOK_URL', default='')
+CRM_WEBHOOK_TIMEOUT = config('CRM_WEBHOOK_TIMEOUT', default=10, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config('OUTBOX_RETRY_BASE_SECONDS', default=30, cast=int)
+# Claimed messages are retried after this long if their dispatcher died
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', default=900, cast=int)
@@ -0,0 +1,134 @@
+import json
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import ratelimit, replica
+
+# Start of a 60 s window
+T0 = 60 * 1_000_000
+
+
+@ratelimit.ratelimit('test', ip='10/m', email='3/h')
+def view(request):
+    return HttpResponse('ok')
+
+
+@override_settings(RATELIMIT_ENABLE=True, RATELIMITS={}, RATELIMIT_CACHE='default')
+class RateLimitTests(SimpleTestCase):
+    """
+    Sliding-window estimate, 429 responses and isolation of the counters
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.factory = RequestFactory()
+        self.now = T0
+        patcher = mock.patch.object(ratelimit.time, 'time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, ip='10.0.0.1', email=''):
+        return view(self.factory.post('/', {'email': email} if email else {}, REMOTE_ADDR=ip))
+
+    def allowed(self, count, **kwargs):
+        return sum(self.post(**kwargs).status_code == 200 for _ in range(count))
+
+    def test_window_boundary_weighting(self):
+        self.now = T0 + 30
+        self.assertEqual(self.allowed(10), 10)
+        # Half-way through the next window the previous one still counts half
+        self.now = T0 + 60 + 30
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            self.assertEqual(self.allowed(6), 5)
+        # Two windows later it no longer counts
+        self.now = T0 + 180
+        self.assertEqual(self.allowed(10), 10)
+
+    def test_retry_after(self):
+        self.allowed(10)
+        self.now = T0 + 60 + 30
+        self.allowed(5)
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(json.loads(response.content)['success'], False)
+        # 10 * (1 - x) + 6 + 1 <= 10 from x = 0.7 on: 12 s later
+        self.assertEqual(response['Retry-After'], '12')
+        self.now += 12
+        self.assertEqual(self.post().status_code, 200)
+
+    def test_retry_after_in_the_next_window(self):
+        self.now = T0 + 45
+        self.allowed(10)
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            response = self.post()
+        # 11 * (1 - x) + 1 <= 10 from x = 2/11 of the next window on
+        self.assertEqual(response['Retry-After'], '26')
+        self.now += 26
+        self.assertEqual(self.post().status_code, 200)
+
+    def test_keys_are_isolated(self):
+        self.allowed(10, ip='10.0.0.1')
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            self.assertEqual(self.post(ip='10.0.0.1').status_code, 429)
+        self.assertEqual(self.post(ip='10.0.0.2').status_code, 200)
+
+        self.assertEqual(self.allowed(3, ip='10.0.1.1', email='a@example.com'), 3)
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            self.assertEqual(self.post(ip='10.0.1.2', email='A@example.com ').status_code, 429)
+        self.assertEqual(self.post(ip='10.0.1.3', email='b@example.com').status_code, 200)
+
+    def test_fail_open_when_the_cache_errors(self):
+        broken = mock.Mock(**{'add.side_effect': ConnectionError('redis down')})
+        with mock.patch.object(ratelimit, '_cache', return_value=broken), \
+                self.assertLogs('core.ratelimit', 'WARNING') as logs:
+            self.assertEqual(self.allowed(20), 20)
+        self.assertIn('not checked: redis down', logs.output[0])
+
+    def test_retry_after_helper(self):
+        # Blocked by the previous window: wait until it weighs little enough
+        self.assertEqual(ratelimit._retry_after(10, 60, 0.5, 10, 6), 12)
+        # Blocked by this window alone: the next one, weighted
+        self.assertEqual(ratelimit._retry_after(10, 60, 0.75, 0, 11), 26)
+        self.assertEqual(ratelimit._retry_after(1, 60, 0.5, 0, 1), 90)
+
+
+class ReplicaMiddlewareTests(SimpleTestCase):
+    """
+    Clients that write are pinned to the primary, in either mode
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.pinned = []
+
+    def view(self, request):
+        self.pinned.append(replica._pinned.get())
+        return HttpResponse()
+
+    async def async_view(self, request):
+        return self.view(request)
+
+    def test_sync(self):
+        middleware = replica.ReplicaMiddleware(self.view)
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertNotIn(replica.PIN_COOKIE, middleware(self.factory.get('/')).cookies)
+        with mock.patch.object(replica, 'replica_configured', return_value=True):
+            response = middleware(self.factory.post('/'))
+        self.assertEqual(response.cookies[replica.PIN_COOKIE].value, '1')
+        self.assertEqual(self.pinned, [False, True])
+
+    async def test_async(self):
+        middleware = replica.ReplicaMiddleware(self.async_view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with mock.patch.object(replica, 'replica_configured', return_value=True):
+            response = await middleware(self.factory.post('/'))
+        self.assertEqual(response.cookies[replica.PIN_COOKIE].value, '1')
+        self.factory.cookies[replica.PIN_COOKIE] = '1'
+        await middleware(self.factory.get('/'))
+        self.assertEqual(self.pinned, [True, True])
+        self.assertFalse(replica._pinned.get())
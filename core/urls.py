@@ -22,5 +22,6 @@ urlpatterns = [
     path('accounts/', include('apps.accounts.urls')),
     path('dashboard/', include('apps.dashboard.urls')),
     path('hr/', include('apps.hr.urls')),
+    path('', include('apps.monitoring.urls')),
     path('', include('apps.landing_page.urls')),
 ]
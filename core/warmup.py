@@ -0,0 +1,105 @@
+"""
+Warm-up run by gunicorn before a deploy starts taking traffic.
+
+``warm_up()`` runs once in the master after the app is preloaded, so the
+work is shared copy-on-write by every forked worker. It first fails the
+start when the cache deployment checks report an error (e.g. rate limits
+in a per-process cache), then loads URL resolvers,
+compiled templates, the static files manifest and the pre-rendered
+landing page. It must not touch the database; connections (and psycopg
+pools) cannot be shared across a fork.
+
+``warm_up_worker()`` runs in each worker before it accepts connections and
+does the per-process part: open the connection pool and load the
+content-type cache used by auth and admin.
+"""
+import logging
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def _template_names():
+    from django.template import engines
+
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            root = Path(directory)
+            for path in root.rglob('*.html'):
+                yield engine, path.relative_to(root).as_posix()
+
+
+def warm_up():
+    """
+    Load everything that is the same for all workers. Returns the number of
+    templates compiled.
+    """
+    from django.conf import settings
+    from django.core import checks
+    from django.core.exceptions import ImproperlyConfigured
+    from django.db import connections
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError
+    from django.urls import get_resolver
+
+    start = time.perf_counter()
+
+    messages = checks.run_checks(tags=[checks.Tags.caches], include_deployment_checks=True)
+    errors = [message for message in messages if message.is_serious()]
+    if errors:
+        raise ImproperlyConfigured('\n'.join(str(message) for message in errors))
+
+    # URLconf: import every view module and build the reverse lookup tables
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict  # noqa: B018
+
+    # Templates: the cached loader keeps the compiled templates in memory
+    compiled = 0
+    for engine, name in _template_names():
+        try:
+            engine.get_template(name)
+            compiled += 1
+        except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+            logger.warning('Warm-up could not compile %s: %s', name, exc)
+
+    # Static files manifest, loaded when the storage is first used
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    getattr(staticfiles_storage, 'hashed_files', None)
+
+    # Landing page HTML, served without the template engine afterwards
+    if settings.LANDING_PAGE_PRERENDER:
+        from apps.landing_page.prerender import prerender
+        prerender()
+
+    # Nothing above should connect, but never fork with an open connection
+    connections.close_all()
+    logger.info('Warm-up: %d templates compiled in %.0f ms',
+                compiled, (time.perf_counter() - start) * 1000)
+    return compiled
+
+
+def warm_up_worker():
+    """
+    Per-worker warm-up: open database connections and load reference caches
+    """
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+    from django.db import DatabaseError, close_old_connections, connections
+
+    start = time.perf_counter()
+    try:
+        for alias in connections:
+            pool = getattr(connections[alias], 'pool', None)
+            if pool is not None:
+                # Opens min_size connections in the background
+                pool.open(wait=False)
+            else:
+                connections[alias].ensure_connection()
+        ContentType.objects.get_for_models(*apps.get_models())
+    except DatabaseError as exc:
+        logger.warning('Worker warm-up skipped the database: %s', exc)
+    finally:
+        close_old_connections()
+    logger.info('Worker warm-up done in %.0f ms', (time.perf_counter() - start) * 1000)
@@ -0,0 +1,94 @@
+"""
+Gunicorn configuration, loaded automatically from the working directory.
+
+Every setting can be overridden from the environment (``GUNICORN_*``).
+Database connections grow with the worker count: each worker keeps up to
+``DB_POOL_MAX_SIZE`` pooled connections.
+"""
+import math
+import os
+import shutil
+
+
+def _cpu_count():
+    """
+    CPUs available to this container: the cgroup v2 quota when one is set,
+    otherwise the CPUs the process may run on
+    """
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as handle:
+            quota, period = handle.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0))
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# ASGI workers so async views (hr_dashboard, reports_analytics) can run
+# their queries concurrently; sync views run in a thread per request
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+workers = _env_int('GUNICORN_WORKERS', min(2 * _cpu_count() + 1,
+                                           _env_int('GUNICORN_MAX_WORKERS', 9)))
+# Only used by the gthread worker class
+threads = _env_int('GUNICORN_THREADS', 1)
+
+# Load the app once in the master; workers share its memory copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+# Recycle workers to cap memory growth; the jitter keeps them from all
+# restarting at the same moment
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Heartbeat files in memory: a slow container filesystem must not get
+# workers killed as unresponsive
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Prometheus multiprocess mode (apps/monitoring/metrics.py), for the
+# workers only: management commands run from the same image keep the
+# single-process registry. Prepared here because this file is read before
+# the app is loaded, while with preload_app the app (and its metrics) is
+# imported before on_starting. Emptied on every start so counters from
+# previous runs are not merged in; an explicitly empty value disables it.
+prometheus_multiproc_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+if prometheus_multiproc_dir:
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded and before any worker is
+    # forked, so preloaded workers inherit the warmed-up state
+    if server.cfg.preload_app:
+        from core.warmup import warm_up
+        server.log.info('Warm-up: %d templates compiled', warm_up())
+
+
+def post_worker_init(worker):
+    # The worker has loaded the app but is not accepting connections yet
+    from core.warmup import warm_up, warm_up_worker
+    if not worker.cfg.preload_app:
+        warm_up()
+    warm_up_worker()
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)